@@ -0,0 +1,207 @@
+"""
+이미지/마스크 에셋 등록소
+
+차량/아이템 이미지(배율/회전 적용 결과)와 충돌 마스크를 한 번 만들어 캐시 폴더의 팩 파일 하나에 원시 픽셀로 저장해 두고,
+다음 실행부터는 PNG/JPG 를 다시 디코딩하거나 크기를 바꾸지 않고 팩 파일에서 바로 읽는다.
+팩 파일은 mmap 으로 읽으므로 여러 작업 프로세스가 같은 파일을 열면 운영체제 페이지 캐시를 함께 쓴다.
+
+이미지는 처음 요청할 때 하나씩 읽고, 그때 화면(display)이 만들어져 있으면 화면 픽셀 형식으로
+convert()/convert_alpha() 해 두어 blit 할 때마다 형식 변환을 하지 않게 한다.
+화면이 없으면 변환 없이 돌려주므로 학습/서버 프로세스에서도 그대로 쓸 수 있다.
+
+팩 파일 이름은 에셋 목록과 원본 파일 내용의 해시로 정해지므로 원본 이미지나 목록이 바뀌면 새로 만들어진다.
+마스크 생성 방식을 바꾸면 PACK_VERSION 을 올린다.
+트랙 이미지는 트랙 패키지마다 따로 만든 AssetRegistry 팩 파일에 들어 있다 (track_package.track_assets).
+
+사용 예:
+    from assets import ASSETS
+    car = ASSETS.image("red-car")
+    python assets.py   # 팩 파일 미리 만들기 (배포/작업 프로세스 실행 전)
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+import pygame
+
+from mask_cache import CACHE_DIR
+from utils import scale_image
+
+PACK_VERSION = 1
+PACK_MAGIC = b"RACEPACK"
+
+# 이름 -> (원본 파일, 변환) 변환은 ("scale", 배율), ("size", (너비, 높이)), ("rotate", 각도), None 이면 원본 그대로
+IMAGES = {
+    "red-car": ("imgs/red-car.png", ("scale", 0.55)),
+    "blue-car": ("imgs/blue-car.png", ("scale", 0.55)),
+    "trap": ("imgs/trap.png", ("size", (25, 15))),
+    "boost": ("imgs/boost.png", ("size", (25, 15))),
+}
+
+# 이름 -> (이미지 이름, 마스크 생성 함수)
+MASKS = {
+    "trap": ("trap", pygame.mask.from_surface),
+    "boost": ("boost", pygame.mask.from_surface),
+}
+
+
+def load_source(path, transform):
+    """원본 이미지 파일을 읽어 변환 적용"""
+    image = pygame.image.load(path)
+    if transform is None:
+        return image
+    kind, value = transform
+    if kind == "scale":
+        return scale_image(image, value)
+    if kind == "size":
+        return pygame.transform.scale(image, value)
+    if kind == "rotate":
+        return pygame.transform.rotate(image, value)
+    raise ValueError(f"unknown transform: {kind}")
+
+
+def has_alpha(image):
+    """투명한 픽셀이 하나라도 있는지"""
+    if not image.get_flags() & pygame.SRCALPHA:
+        return False
+    return min(pygame.image.tobytes(image, "RGBA")[3::4]) < 255
+
+
+def display_ready():
+    """convert() 를 쓸 수 있는 화면이 있는지"""
+    return pygame.display.get_init() and pygame.display.get_surface() is not None
+
+
+class AssetRegistry:
+    def __init__(self, images=IMAGES, masks=MASKS, cache_dir=CACHE_DIR):
+        """
+        :param images: 이미지 목록 (IMAGES 형식)
+        :param masks: 마스크 목록 (MASKS 형식)
+        :param cache_dir: 팩 파일을 저장할 폴더
+        """
+        self.images = images
+        self.masks = masks
+        self.cache_dir = cache_dir
+        self._index = None      # 팩 파일 목차 {"images": {이름: [너비, 높이, 투명 여부, 위치, 길이]}, "masks": {...}}
+        self._data = None       # 팩 파일 픽셀 데이터 (mmap 또는 bytes)
+        self._loaded = {}       # ("image" | "mask", 이름) -> 읽어 둔 Surface/Mask
+
+    def pack_path(self):
+        """에셋 목록과 원본 파일 내용으로 정한 팩 파일 경로"""
+        digest = hashlib.sha1(f"{PACK_VERSION}:{sorted(self.images.items())}:{sorted(self.masks)}".encode())
+        for path in sorted({path for path, _ in self.images.values()}):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        return os.path.join(self.cache_dir, f"assets-{digest.hexdigest()}.pack")
+
+    def bake(self):
+        """
+        모든 이미지/마스크를 만들어 팩 파일 내용 생성
+        :return: 팩 파일 바이트
+        """
+        index = {"images": {}, "masks": {}}
+        chunks = []
+        offset = 0
+        sources = {}
+        for name, (path, transform) in self.images.items():
+            image = sources[name] = load_source(path, transform)
+            pixels = pygame.image.tobytes(image, "RGBA")
+            index["images"][name] = [*image.get_size(), has_alpha(image), offset, len(pixels)]
+            chunks.append(pixels)
+            offset += len(pixels)
+        for name, (image_name, builder) in self.masks.items():
+            mask = builder(sources[image_name])
+            surface = mask.to_surface(setcolor=(1, 1, 1, 255), unsetcolor=(0, 0, 0, 255))
+            pixels = pygame.image.tobytes(surface, "RGBA")[0::4]
+            index["masks"][name] = [*mask.get_size(), offset, len(pixels)]
+            chunks.append(pixels)
+            offset += len(pixels)
+
+        header = json.dumps(index).encode()
+        return b"".join([PACK_MAGIC, struct.pack("<I", len(header)), header, *chunks])
+
+    def load_index(self):
+        """팩 파일을 열고 (없거나 손상됐으면 새로 만들어) 목차 읽기"""
+        if self._index is not None:
+            return
+        path = self.pack_path()
+        if os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    self._read(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+                return
+            except (OSError, ValueError, struct.error):
+                pass  # 손상된 팩 파일은 다시 생성
+
+        data = self.bake()
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)  # 여러 프로세스가 동시에 만들어도 완성된 파일만 보이도록
+        except OSError:
+            pass
+        self._read(data)
+
+    def _read(self, data):
+        if data[:len(PACK_MAGIC)] != PACK_MAGIC:
+            raise ValueError("not an asset pack")
+        start = len(PACK_MAGIC) + 4
+        (header_size,) = struct.unpack("<I", data[len(PACK_MAGIC):start])
+        index = json.loads(bytes(data[start:start + header_size]))
+        if set(index["images"]) != set(self.images) or set(index["masks"]) != set(self.masks):
+            raise ValueError("asset pack does not match registry")
+        self._index = index
+        self._data = memoryview(data)[start + header_size:]
+
+    def size(self, name):
+        """이미지 크기 (너비, 높이) (이미지를 읽지 않고 목차에서 바로)"""
+        self.load_index()
+        width, height = self._index["images"][name][:2]
+        return width, height
+
+    def image(self, name):
+        """
+        이미지 (처음 요청할 때 팩 파일에서 읽음, 화면이 있으면 화면 픽셀 형식으로 변환)
+        :param name: IMAGES 의 키
+        :return: pygame.Surface (같은 이름이면 항상 같은 객체)
+        """
+        image = self._loaded.get(("image", name))
+        if image is None:
+            image = self.raw_image(name)
+            if display_ready():
+                image = image.convert_alpha() if self._index["images"][name][2] else image.convert()
+            self._loaded[("image", name)] = image
+        return image
+
+    def raw_image(self, name):
+        """팩 파일의 RGBA 픽셀 그대로 만든 새 이미지 (화면 형식으로 변환하지 않음, 마스크 계산용)"""
+        self.load_index()
+        width, height, _, offset, length = self._index["images"][name]
+        return pygame.image.frombytes(bytes(self._data[offset:offset + length]), (width, height), "RGBA")
+
+    def mask(self, name):
+        """
+        충돌 마스크 (처음 요청할 때 팩 파일에서 읽음)
+        :param name: MASKS 의 키
+        :return: pygame.Mask
+        """
+        mask = self._loaded.get(("mask", name))
+        if mask is None:
+            self.load_index()
+            width, height, offset, length = self._index["masks"][name]
+            surface = pygame.image.frombuffer(bytes(self._data[offset:offset + length]), (width, height), "P")
+            surface.set_colorkey(0)
+            mask = self._loaded[("mask", name)] = pygame.mask.from_surface(surface)
+        return mask
+
+
+ASSETS = AssetRegistry()
+
+
+if __name__ == "__main__":
+    ASSETS.load_index()
+    print(ASSETS.pack_path())
@@ -0,0 +1,440 @@
+"""
+N개의 독립적인 경기를 NumPy 배열로 한 번에 진행하는 배치 환경
+
+차량 상태(위치, 각도, 속도, 가속/감속 스택, 효과 종료 시간)를 모두 길이 N 배열로 보관하고
+이동, 감속(reduce_speed), 튕김(bounce), 결승선 조건(is_ready_for_finish)을 배열 연산 한 번으로 처리한다.
+진행 거리는 LapTracker 와 같은 방식으로 중앙선 진행 거리 지도를 한 번 조회해서 갱신한다.
+트랙 경계 충돌은 트랙 패키지의 경계 bool 격자를 차량 테두리 좌표로 인덱싱하고,
+collision.SweptCollider 와 같이 이동 구간을 따라 검사해 처음 부딪힌 지점에서 속도를 반사한다.
+차량 테두리 좌표는 ROTATION_CACHE 의 각도 구간별 회전 마스크에서 미리 뽑아 둔다.
+
+경기마다 학습 대상 차량 1대만 존재한다 (AI 차량 없음).
+"""
+import numpy as np
+
+from collision import SUBSTEP, REFINE_STEPS, MAX_PUSH, RESTITUTION, car_radius
+from game_info import GameInfo
+from lap_tracker import NUM_SECTORS, WRONG_WAY_DISTANCE, wrap_delta
+from mask_grid import mask_to_array, mask_points, sample_grid
+from settings import RED_CAR_IMG, TRAP, BOOST, FPS, TRAP_MASK, BOOST_MASK
+from simulation import ACTION_LEFT, ACTION_RIGHT, ACTION_FORWARD, ACTION_BACKWARD, DEFAULT_TRACK
+from track_package import load_track
+from utils import ROTATION_CACHE
+
+EFFECT_NONE, EFFECT_BOOST, EFFECT_TRAP = 0, 1, 2
+EFFECT_DURATION = 3     # 효과 지속 시간 (초)
+MAX_EFFECTS = 16        # 경기당 동시에 유지할 수 있는 효과 수
+
+
+class BatchRaceEnv:
+    def __init__(self, num_envs, trap_count=5, boost_count=5, dt=1 / FPS,
+                 max_vel=4, rotation_vel=6, max_steps=None, auto_reset=True, seed=None, track=None):
+        """
+        :param track: 모든 경기의 트랙 (track_package.Track 또는 트랙 폴더 경로, None 이면 DEFAULT_TRACK)
+        """
+        self.num_envs = num_envs
+        self.trap_count = trap_count
+        self.boost_count = boost_count
+        self.dt = dt
+        self.original_max_vel = float(max_vel)
+        self.rotation_vel = float(rotation_vel)
+        self.acceleration = 0.1
+        self.max_steps = max_steps
+        self.auto_reset = auto_reset
+        self.rng = np.random.default_rng(seed)
+
+        # 차량 테두리 좌표와 아이템 충돌 격자
+        self.car_radius = car_radius(RED_CAR_IMG)
+        self._build_car_points(RED_CAR_IMG)
+        self.trap_grid = mask_to_array(TRAP_MASK)
+        self.boost_grid = mask_to_array(BOOST_MASK)
+        self.set_track(DEFAULT_TRACK if track is None else track)
+
+        n = num_envs
+        self.x = np.zeros(n)
+        self.y = np.zeros(n)
+        self.angle = np.zeros(n)
+        self.vel = np.zeros(n)
+        self.max_vel = np.zeros(n)
+        self.last_s = np.zeros(n)     # 마지막으로 조회한 진행 거리
+        self.progress = np.zeros(n)   # 출발 이후 누적 진행 거리
+        self.best = np.zeros(n)       # 가장 멀리 나아간 누적 진행 거리
+        self.boost_stack = np.zeros(n, dtype=np.int64)
+        self.slow_stack = np.zeros(n, dtype=np.int64)
+        self.effect_end_times = np.zeros((n, MAX_EFFECTS))
+        self.effect_types = np.zeros((n, MAX_EFFECTS), dtype=np.int8)
+        self.time = np.zeros(n)
+        self.steps = np.zeros(n, dtype=np.int64)
+        self.traps = np.zeros((n, trap_count, 2), dtype=np.int64)
+        self.boosts = np.zeros((n, boost_count, 2), dtype=np.int64)
+
+    def set_track(self, track):
+        """
+        트랙 교체 (트랙 패키지의 격자/중앙선/아이템 좌표 표를 그대로 씀, 다음 reset 부터 새 트랙에서 진행)
+        :param track: track_package.Track 또는 트랙 폴더 경로
+        """
+        self.track = load_track(track)
+        self.racing_line = self.track.racing_line
+        self.border_grid = self.track.border_grid
+        self.border_field = self.track.collider.field
+        self.finish_grid = self.track.finish_grid
+        self.start_pos = self.track.start_grid(1)[0]
+
+        # 아이템 배치용 유효 좌표 표 (아이템 종류별, 좌상단 좌표)
+        self.trap_pool = self._spawn_pool(TRAP)
+        self.boost_pool = self._spawn_pool(BOOST)
+
+    def reset(self, env_mask=None):
+        """
+        선택한 경기를 처음 상태로 되돌림
+        :param env_mask: 초기화할 경기 bool 배열 (None 이면 전체)
+        :return: 관측값 (N, 6) 배열
+        """
+        if env_mask is None:
+            env_mask = np.ones(self.num_envs, dtype=bool)
+        count = int(env_mask.sum())
+
+        self.x[env_mask], self.y[env_mask] = self.start_pos
+        self.angle[env_mask] = self.track.start_angle
+        self.vel[env_mask] = 0
+        self.max_vel[env_mask] = self.original_max_vel
+        start_s = self._lookup_progress()[env_mask]
+        start_s = np.where(start_s < 0, 0, start_s)
+        self.last_s[env_mask] = start_s
+        self.progress[env_mask] = self.best[env_mask] = np.where(
+            start_s > self.racing_line.length / 2, start_s - self.racing_line.length, start_s
+        )
+        self.boost_stack[env_mask] = 0
+        self.slow_stack[env_mask] = 0
+        self.effect_types[env_mask] = EFFECT_NONE
+        self.time[env_mask] = 0
+        self.steps[env_mask] = 0
+        self.traps[env_mask] = self._spawn(self.trap_pool, (count, self.trap_count))
+        self.boosts[env_mask] = self._spawn(self.boost_pool, (count, self.boost_count))
+        return self.observe()
+
+    def step(self, actions):
+        """
+        모든 경기를 한 틱 진행
+        :param actions: (N,) int 배열, 각 원소는 ACTION_* 비트마스크
+        :return: (관측값, 종료 여부 (N,), 정보 dict)
+        """
+        actions = np.asarray(actions)
+        start_x, start_y = self.x.copy(), self.y.copy()
+        self.time += self.dt
+        self.steps += 1
+
+        self._clear_effects()
+
+        # 회전 (왼쪽, 오른쪽을 동시에 누르면 상쇄)
+        left = (actions & ACTION_LEFT) != 0
+        right = (actions & ACTION_RIGHT) != 0
+        self.angle += self.rotation_vel * (left.astype(float) - right)
+        radians = np.radians(self.angle)
+        sin, cos = np.sin(radians), np.cos(radians)
+
+        # 전진/후진/감속
+        forward = (actions & ACTION_FORWARD) != 0
+        backward = (actions & ACTION_BACKWARD) != 0
+        self.vel = np.where(forward, np.minimum(self.vel + self.acceleration, self.max_vel), self.vel)
+        self._move(forward, sin, cos)
+        self.vel = np.where(backward, np.maximum(self.vel - self.acceleration, -self.max_vel / 2), self.vel)
+        self._move(backward, sin, cos)
+
+        idle = ~(forward | backward)
+        half = self.acceleration / 2
+        reduced = np.where(self.vel > 0, np.maximum(self.vel - half, 0), np.minimum(self.vel + half, 0))
+        self.vel = np.where(idle, reduced, self.vel)
+        self._move(idle & (np.abs(self.vel) > 0.01), sin, cos)
+
+        progress = self._update_progress()
+
+        # 트랩/부스트
+        trap_hit = self._pick_up(self.traps, self.trap_pool, self.trap_grid, EFFECT_TRAP)
+        boost_hit = self._pick_up(self.boosts, self.boost_pool, self.boost_grid, EFFECT_BOOST)
+
+        # 트랙 경계 연속 충돌/결승선 충돌
+        border_hit = self._sweep(start_x, start_y, sin, cos)
+        finish_hit = ~border_hit & self._collide(self.finish_grid)
+        finished = finish_hit & self._ready_for_finish()
+        bounced = finish_hit & ~finished
+        if bounced.any():
+            # 튕겨 나가는 이동도 경계 연속 충돌 검사 (SweptCollider.bounce)
+            bounce_x, bounce_y = self.x.copy(), self.y.copy()
+            self._bounce(bounced, sin, cos)
+            border_hit |= self._sweep(bounce_x, bounce_y, sin, cos, bounced)
+
+        done = finished.copy()
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        if self.max_steps is not None:
+            truncated = ~done & (self.steps >= self.max_steps)
+
+        obs = self.observe()
+        info = {
+            "finished": finished,
+            "truncated": truncated,
+            "border_hit": border_hit,
+            "trap_hit": trap_hit,
+            "boost_hit": boost_hit,
+            "progress": progress / self.racing_line.length,  # 이번 틱에 나아간 거리 (한 바퀴 = 1)
+            "wrong_way": self.progress < self.best - WRONG_WAY_DISTANCE,
+        }
+        if self.auto_reset and (done | truncated).any():
+            info["terminal_obs"] = obs
+            obs = self.reset(done | truncated)
+        return obs, done | truncated, info
+
+    def observe(self):
+        """관측값: (x, y, sin(각도), cos(각도), 속도, 최대 속도)"""
+        radians = np.radians(self.angle)
+        return np.stack(
+            [self.x, self.y, np.sin(radians), np.cos(radians), self.vel, self.max_vel], axis=1
+        ).astype(np.float32)
+
+    def _build_car_points(self, image):
+        """각도 구간별 회전 테두리 좌표 표 (구간, 최대 좌표 수, 2) 생성, 빈 칸은 첫 좌표로 채움"""
+        step = ROTATION_CACHE.step
+        tables = []
+        for angle in range(0, 360, step):
+            mask, (dx, dy) = ROTATION_CACHE.get_border_mask(image, angle)
+            tables.append(mask_points(mask) + (dx, dy))
+
+        size = max(len(points) for points in tables)
+        self.car_points = np.stack([
+            np.concatenate([points, np.repeat(points[:1], size - len(points), axis=0)])
+            for points in tables
+        ])
+        self.car_point_bounds = np.stack([self.car_points.min(axis=1), self.car_points.max(axis=1)], axis=1)
+
+    def _angle_buckets(self):
+        step = ROTATION_CACHE.step
+        return np.round(self.angle / step).astype(np.int64) % (360 // step)
+
+    def sense(self, sensor):
+        """
+        모든 경기 차량의 광선 센서 값
+        :param sensor: sensors.RaySensor 객체
+        :return: (N, 광선 수) 배열
+        """
+        return sensor.cast(
+            self.x + RED_CAR_IMG.get_width() / 2, self.y + RED_CAR_IMG.get_height() / 2, self.angle
+        )
+
+    def _spawn_pool(self, image):
+        width, height = image.get_size()
+        xs, ys = self.track.spawn_table(width, height)
+        return np.stack([xs - width // 2, ys - height // 2], axis=1).astype(np.int64)
+
+    def _spawn(self, pool, shape):
+        return pool[self.rng.integers(0, len(pool), size=shape)]
+
+    def _move(self, env_mask, sin, cos):
+        """AbstractCar.move 와 동일: 너무 느리면 멈추고, 아니면 각도 방향으로 이동"""
+        stopped = env_mask & (np.abs(self.vel) < 0.01)
+        self.vel[stopped] = 0
+        moving = env_mask & ~stopped
+        vel = np.where(moving, self.vel, 0)
+
+        self.y -= cos * vel
+        self.x -= sin * vel
+
+    def _bounce(self, env_mask, sin, cos):
+        self.vel = np.where(env_mask, -self.vel, self.vel)
+        self._move(env_mask, sin, cos)
+
+    def _collide(self, grid):
+        """현재 각도의 차량 테두리 좌표를 grid 에 찍어 하나라도 겹치면 True"""
+        return self._overlap_count(grid, self.car_points[self._angle_buckets()], self.x, self.y) > 0
+
+    @staticmethod
+    def _overlap_count(grid, points, xs, ys):
+        """차량 테두리 좌표 (K, 점 수, 2) 를 좌상단 (xs, ys) (K,) 에 놓았을 때 grid 와 겹치는 점 수 (K,)"""
+        px = xs.astype(np.int64)[:, None] + points[:, :, 0]
+        py = ys.astype(np.int64)[:, None] + points[:, :, 1]
+        return sample_grid(grid, px, py).sum(axis=1)
+
+    def _sweep(self, start_x, start_y, sin, cos, env_mask=None):
+        """
+        SweptCollider.sweep + AbstractCar.reflect 와 같은 연속 충돌 처리
+        출발 위치의 거리장 값으로 이번 틱에 경계에 닿을 수 없는 경기는 건너뛰고, 나머지만 SUBSTEP 간격으로 검사한다.
+        :param env_mask: 검사할 경기 bool 배열 (N,) (None 이면 모든 경기)
+        :return: 트랙 경계에 부딪힌 경기 bool 배열 (N,)
+        """
+        hit = np.zeros(self.num_envs, dtype=bool)
+        move_x, move_y = self.x - start_x, self.y - start_y
+        length = np.hypot(move_x, move_y)
+
+        height, width = self.border_field.shape
+        cx = (start_x + RED_CAR_IMG.get_width() / 2).astype(np.int64)
+        cy = (start_y + RED_CAR_IMG.get_height() / 2).astype(np.int64)
+        inside = (cx >= 0) & (cx < width) & (cy >= 0) & (cy < height)
+        clearance = np.where(
+            inside, self.border_field[np.clip(cy, 0, height - 1), np.clip(cx, 0, width - 1)], 0
+        ) - self.car_radius
+        candidates = (clearance <= 0) | (clearance < length)
+        if env_mask is not None:
+            candidates &= env_mask
+        ids = np.nonzero(candidates)[0]
+        if len(ids) == 0:
+            return hit
+
+        grid = self.border_grid
+        points = self.car_points[self._angle_buckets()[ids]]
+        sx, sy, mx, my = start_x[ids], start_y[ids], move_x[ids], move_y[ids]
+        steps = np.maximum(np.ceil(length[ids] / SUBSTEP), 1)
+
+        # 출발 위치부터 겹친 경기는 밀어내기, 나머지는 거리장으로 안전한 구간을 건너뛴 뒤 처음 겹치는 시점 찾기
+        # (배열 인덱스는 ids 안에서의 위치, 아직 검사 중인 경기만 남기며 진행)
+        free = np.maximum(clearance[ids], 0)
+        stuck = np.zeros(len(ids), dtype=bool)
+        maybe_stuck = np.nonzero(free == 0)[0]
+        stuck[maybe_stuck] = self._overlap_count(grid, points[maybe_stuck], sx[maybe_stuck], sy[maybe_stuck]) > 0
+        k = np.floor(free * steps / np.maximum(length[ids], 1e-12)) + 1
+        t_free = np.minimum((k - 1) / steps, 1.0)
+        t_hit = np.full(len(ids), np.inf)
+        march = np.nonzero(~stuck)[0]
+        while len(march):
+            march = march[k[march] <= steps[march]]
+            t = k[march] / steps[march]
+            overlap = self._overlap_count(grid, points[march], sx[march] + mx[march] * t, sy[march] + my[march] * t) > 0
+            t_hit[march[overlap]] = t[overlap]
+            t_free[march[~overlap]] = t[~overlap]
+            march = march[~overlap]
+            k[march] += 1
+
+        swept = np.nonzero(np.isfinite(t_hit))[0]
+        for _ in range(REFINE_STEPS):
+            t = (t_free[swept] + t_hit[swept]) / 2
+            overlap = self._overlap_count(grid, points[swept], sx[swept] + mx[swept] * t, sy[swept] + my[swept] * t) > 0
+            t_hit[swept[overlap]] = t[overlap]
+            t_free[swept[~overlap]] = t[~overlap]
+
+        contact = np.nonzero(stuck | np.isfinite(t_hit))[0]
+        if len(contact) == 0:
+            return hit
+        points, sx, sy, mx, my = points[contact], sx[contact], sy[contact], mx[contact], my[contact]
+        stuck, t_free, t_hit = stuck[contact], t_free[contact], t_hit[contact]
+
+        # 접촉 법선: 겹친 위치에서 상하좌우 1픽셀 옮겼을 때 겹치는 점 수의 차이
+        t = np.where(stuck, 0.0, t_hit)
+        hx, hy = sx + mx * t, sy + my * t
+        counts = self._overlap_count(
+            grid, np.concatenate([points] * 4),
+            np.concatenate([hx - 1, hx + 1, hx, hx]), np.concatenate([hy, hy, hy - 1, hy + 1]),
+        ).reshape(4, -1)
+        nx = (counts[0] - counts[1]).astype(float)
+        ny = (counts[2] - counts[3]).astype(float)
+        norm = np.hypot(nx, ny)
+        move_norm = np.maximum(np.hypot(mx, my), 1e-12)
+        nx = np.where(norm > 0, nx / np.maximum(norm, 1e-12), -mx / move_norm)
+        ny = np.where(norm > 0, ny / np.maximum(norm, 1e-12), -my / move_norm)
+
+        # 부딪히기 직전 위치로 되돌리고, 출발부터 겹친 경기는 법선 방향으로 밀어냄
+        new_x, new_y = sx + mx * t_free, sy + my * t_free
+        pushing = np.nonzero(stuck)[0]
+        for _ in range(MAX_PUSH):
+            pushing = pushing[self._overlap_count(grid, points[pushing], new_x[pushing], new_y[pushing]) > 0]
+            if len(pushing) == 0:
+                break
+            new_x[pushing] += nx[pushing]
+            new_y[pushing] += ny[pushing]
+
+        contact_ids = ids[contact]
+        self.x[contact_ids] = new_x
+        self.y[contact_ids] = new_y
+
+        # 진행 방향 속도 반사 (collision.reflect_velocity)
+        dot = -sin[contact_ids] * nx - cos[contact_ids] * ny
+        vel = self.vel[contact_ids]
+        self.vel[contact_ids] = np.where(vel * dot < 0, vel * (1 - (1 + RESTITUTION) * dot * dot), vel)
+        hit[contact_ids] = True
+        return hit
+
+    def _lookup_progress(self):
+        return self.racing_line.progress_at_many(
+            self.x + RED_CAR_IMG.get_width() / 2, self.y + RED_CAR_IMG.get_height() / 2
+        )
+
+    def _update_progress(self):
+        """LapTracker.update 와 동일: 진행 거리 지도 조회 후 누적/최고 진행 거리 갱신, 변화량 반환"""
+        s = self._lookup_progress()
+        valid = s >= 0
+        delta = np.where(valid, wrap_delta(s, self.last_s, self.racing_line.length), 0.0)
+        self.last_s = np.where(valid, s, self.last_s)
+        self.progress += delta
+        self.best = np.maximum(self.best, self.progress)
+        return delta
+
+    def _ready_for_finish(self):
+        """GameInfo.is_ready_for_finish 와 동일한 조건 (경기마다 첫 랩만 진행)"""
+        last_sector = self.racing_line.length * (NUM_SECTORS - 1) / NUM_SECTORS
+        return (
+            (self.time >= GameInfo.MIN_TIME)
+            & (self.best >= last_sector)
+            & (self.progress >= self.best - WRONG_WAY_DISTANCE)
+            & (self.vel > 0)
+        )
+
+    def _pick_up(self, positions, pool, item_grid, effect_type):
+        """
+        경기마다 최대 1개의 아이템을 먹고 효과 적용, 먹은 아이템은 새 위치로 이동
+        :return: 아이템을 먹은 경기 bool 배열 (N,)
+        """
+        picked = np.zeros(self.num_envs, dtype=bool)
+        item_height, item_width = item_grid.shape
+        car_x = self.x.astype(np.int64)
+        car_y = self.y.astype(np.int64)
+
+        # 경계 상자가 겹치는 후보만 정밀 검사
+        buckets = self._angle_buckets()
+        low = self.car_point_bounds[buckets, 0]
+        high = self.car_point_bounds[buckets, 1]
+        dx = car_x[:, None] - positions[:, :, 0]
+        dy = car_y[:, None] - positions[:, :, 1]
+        near = (
+            (dx + high[:, None, 0] >= 0) & (dx + low[:, None, 0] < item_width)
+            & (dy + high[:, None, 1] >= 0) & (dy + low[:, None, 1] < item_height)
+        )
+        env_ids, item_ids = np.nonzero(near)
+        if len(env_ids) == 0:
+            return picked
+
+        points = self.car_points[buckets[env_ids]]
+        hits = sample_grid(
+            item_grid,
+            dx[env_ids, item_ids][:, None] + points[:, :, 0],
+            dy[env_ids, item_ids][:, None] + points[:, :, 1],
+        ).any(axis=1)
+        env_ids, item_ids = env_ids[hits], item_ids[hits]
+        env_ids, first = np.unique(env_ids, return_index=True)
+        item_ids = item_ids[first]
+        if len(env_ids) == 0:
+            return picked
+
+        positions[env_ids, item_ids] = self._spawn(pool, len(env_ids))
+        self._add_effect(env_ids, effect_type)
+        picked[env_ids] = True
+        return picked
+
+    def _add_effect(self, env_ids, effect_type):
+        """비어 있는(또는 가장 먼저 끝나는) 슬롯에 효과 종료 시간 기록"""
+        ends = np.where(self.effect_types[env_ids] == EFFECT_NONE, -np.inf, self.effect_end_times[env_ids])
+        slots = np.argmin(ends, axis=1)
+        self.effect_end_times[env_ids, slots] = self.time[env_ids] + EFFECT_DURATION
+        self.effect_types[env_ids, slots] = effect_type
+        self._update_max_vel(env_ids)  # AbstractCar.apply_effect 처럼 바로 반영
+
+    def _clear_effects(self):
+        """AbstractCar.clear_effect 와 동일: 끝난 효과 제거 후 스택과 최대 속도 재계산"""
+        expired = self.effect_end_times <= self.time[:, None]
+        self.effect_types[expired] = EFFECT_NONE
+        self._update_max_vel(slice(None))
+
+    def _update_max_vel(self, env_ids):
+        """효과 슬롯으로 스택을 다시 세고 최대 속도 재계산 (슬롯을 덮어쓴 효과도 빠짐)"""
+        types = self.effect_types[env_ids]
+        self.boost_stack[env_ids] = (types == EFFECT_BOOST).sum(axis=1)
+        self.slow_stack[env_ids] = (types == EFFECT_TRAP).sum(axis=1)
+        self.max_vel[env_ids] = (
+            self.original_max_vel * (1.3 ** self.boost_stack[env_ids]) * (0.7 ** self.slow_stack[env_ids])
+        )
@@ -0,0 +1,288 @@
+"""
+시뮬레이션/렌더링 핵심 경로 벤치마크
+
+각 항목을 따로 측정해서 JSON 으로 저장하고, 저장해 둔 기준(baseline) 결과와 비교해 느려진 항목을 찾는다.
+화면 없이(SDL dummy 드라이버) 실행되므로 학습 서버에서도 그대로 돌릴 수 있다.
+
+사용 예:
+    python benchmark.py --output baseline.json
+    python benchmark.py --baseline baseline.json            # 기준보다 10% 이상 느려지면 종료 코드 1
+    python benchmark.py --only car_move_collide draw_frame  # 일부 항목만 측정
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+# pygame 을 import 하기 전에 화면/소리 없는 드라이버 지정
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+DEFAULT_THRESHOLD = 0.10  # 기준 대비 이 비율 이상 나빠지면 성능 저하로 판단
+REPEAT = 5                # 측정 반복 횟수 (중앙값 사용)
+
+BENCHMARKS = {}
+
+
+def benchmark(name, unit, higher_is_better):
+    """측정 함수 등록 데코레이터 (측정 함수는 값 하나를 반환)"""
+    def register(func):
+        BENCHMARKS[name] = (func, unit, higher_is_better)
+        return func
+    return register
+
+
+def timed(func, number, repeat=REPEAT):
+    """func 을 number 번 호출하는 시간을 repeat 번 재서 1회 평균 시간(초)의 중앙값 반환"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    return statistics.median(times)
+
+
+@benchmark("create_border_mask", "ms", higher_is_better=False)
+def bench_create_border_mask():
+    from settings import RED_CAR_IMG
+    from utils import create_border_mask
+    return timed(lambda: create_border_mask(RED_CAR_IMG), number=200) * 1000
+
+
+@benchmark("car_move_collide", "steps/s", higher_is_better=True)
+def bench_car_move_collide():
+    """차량 한 대의 회전 + 이동 + 트랙 경계 연속 충돌 검사"""
+    from cars import PlayerCar
+    from simulation import BORDER_COLLIDER, DEFAULT_TRACK
+
+    car = PlayerCar(4, 6)
+    car.start_pos, car.start_angle = DEFAULT_TRACK.start_grid(1)[0], DEFAULT_TRACK.start_angle
+    car.reset()
+    car.vel = 2
+
+    def step():
+        car.rotate(left=True)
+        car.move()
+        contact = BORDER_COLLIDER.sweep(car)
+        if contact:
+            car.reflect(contact)
+        car.last_position = (car.x, car.y)
+
+    return 1 / timed(step, number=5000)
+
+
+@benchmark("clear_effects", "us/car", higher_is_better=False)
+def bench_clear_effects():
+    """효과가 걸려 있는 차량의 틱마다 효과 만료 검사 (만료되는 효과 없음)"""
+    from cars import PlayerCar
+
+    car = PlayerCar(4, 6, clock=lambda: 0.0)
+    for effect_type in ("boost", "trap", "boost"):
+        car.apply_effect(effect_type)
+    return timed(car.clear_effect, number=20000) * 1e6
+
+
+@benchmark("item_spawn", "us/item", higher_is_better=False)
+def bench_item_spawn():
+    """유효 좌표 표를 만든 뒤 아이템 위치 100개 생성"""
+    import random
+
+    import items
+    import simulation  # noqa: F401  (items.TRACK_MASK 주입)
+    from settings import TRAP
+
+    rng = random.Random(0)
+    width, height = TRAP.get_size()
+    items.get_spawn_table(width, height)
+    return timed(lambda: items.generate_random_positions(100, width, height, rng), number=200) / 100 * 1e6
+
+
+@benchmark("spawn_table_build", "ms", higher_is_better=False)
+def bench_spawn_table_build():
+    import items
+    import simulation  # noqa: F401
+    from settings import TRAP
+    return timed(lambda: items.build_spawn_table(*TRAP.get_size()), number=5) * 1000
+
+
+@benchmark("draw_frame", "ms", higher_is_better=False)
+def bench_draw_frame():
+    """변경 영역만 다시 그리는 한 프레임 (차량 2대 이동, 아이템 10개, HUD)"""
+    return _draw_frame(full_redraw=False)
+
+
+@benchmark("draw_frame_full", "ms", higher_is_better=False)
+def bench_draw_frame_full():
+    """화면 전체를 다시 그리는 한 프레임"""
+    return _draw_frame(full_redraw=True)
+
+
+def _draw_frame(full_redraw):
+    from renderer import DirtyRenderer
+    from settings import MAIN_FONT, WIDTH, HEIGHT
+    from simulation import RaceSim, ACTION_FORWARD, ACTION_LEFT
+
+    win = pygame.display.set_mode((WIDTH, HEIGHT))
+    sim = RaceSim(seed=0)
+    renderer = DirtyRenderer(win, sim.track.background_layers(), MAIN_FONT)
+    sim.reset()
+
+    def frame():
+        sim.step(ACTION_FORWARD | ACTION_LEFT)
+        if full_redraw:
+            renderer.invalidate()
+        renderer.draw(sim.manager.cars, sim.items.sprites(), [
+            f"Level {sim.game_info.level}",
+            f"Time: {round(sim.clock.now)}s",
+            f"Vel: {round(sim.player_car.vel, 1)}px/s",
+        ])
+
+    step_time = timed(lambda: sim.step(ACTION_FORWARD | ACTION_LEFT), number=200)
+    return (timed(frame, number=200) - step_time) * 1000
+
+
+@benchmark("episode_throughput", "steps/s", higher_is_better=True)
+def bench_episode_throughput():
+    """화면 없는 RaceSim 경기 진행 (무작위 행동, 경기가 끝나면 reset)"""
+    from simulation import RaceSim
+
+    sim = RaceSim(seed=0)
+    sim.reset()
+    rng = np.random.default_rng(0)
+    actions = rng.integers(0, 16, size=100000).tolist()
+    index = [0]
+
+    def step():
+        _, done, _ = sim.step(actions[index[0] % len(actions)])
+        index[0] += 1
+        if done:
+            sim.reset()
+
+    return 1 / timed(step, number=3000)
+
+
+@benchmark("batch_env_throughput", "steps/s", higher_is_better=True)
+def bench_batch_env_throughput():
+    """BatchRaceEnv 256개 경기 동시 진행 (경기 수 x 틱)"""
+    from batch_env import BatchRaceEnv
+
+    num_envs = 256
+    env = BatchRaceEnv(num_envs, seed=0)
+    env.reset()
+    rng = np.random.default_rng(0)
+    return num_envs / timed(lambda: env.step(rng.integers(0, 16, size=num_envs)), number=100)
+
+
+@benchmark("neural_ai_inference", "ms/tick", higher_is_better=False)
+def bench_neural_ai_inference():
+    """경기 64개 x AI 차량 4대의 관측 수집 + 정책 한 번 실행 (PolicyBatcher.flush)"""
+    from neural_driver import MLPPolicy, PolicyBatcher, STATE_DIM, NUM_ACTIONS
+    from simulation import RaceSim
+
+    batcher = PolicyBatcher(MLPPolicy.random((STATE_DIM, 64, 64, NUM_ACTIONS), seed=0))
+    sims = [RaceSim(seed=i, ai_count=4, ai_driver=batcher) for i in range(64)]  # 배처는 차량을 약한 참조로만 보관
+    for sim in sims:
+        sim.reset()
+    return timed(batcher.flush, number=200) * 1000
+
+
+@benchmark("multiplayer_room_tick", "us/tick", higher_is_better=False)
+def bench_multiplayer_room_tick():
+    """8인 멀티플레이 방 한 틱 (입력 처리 + 진행 + 참가자별 delta 스냅샷 인코딩, 전송 제외)"""
+    from multiplayer import RaceRoom
+    from simulation import ACTION_FORWARD, ACTION_LEFT
+
+    room = RaceRoom("bench", seed=0)
+    players = [room.join() for _ in range(8)]
+    seq = [0]
+
+    def tick():
+        seq[0] += 1
+        for i, player in enumerate(players):
+            # 두 틱 전 스냅샷을 받은 상태로 가정 (ack 기준 delta)
+            player.push(seq[0], room.tick - 2, ACTION_FORWARD | (ACTION_LEFT if i % 2 else 0))
+        room.update()
+
+    return timed(tick, number=600) * 1e6
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def run(names=None):
+    """
+    벤치마크 실행
+    :param names: 실행할 항목 이름 목록 (None 이면 전체)
+    :return: {"environment": {...}, "results": {이름: {"value", "unit", "higher_is_better"}}}
+    """
+    results = {}
+    for name, (func, unit, higher_is_better) in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        value = func()
+        results[name] = {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+        print(f"{name:24s} {value:14.3f} {unit}")
+    return {"environment": environment(), "results": results}
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    기준 결과와 비교
+    :return: 성능이 threshold 이상 나빠진 항목 이름 목록
+    """
+    regressions = []
+    print(f"\n{'benchmark':24s} {'baseline':>14s} {'current':>14s} {'change':>9s}")
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None or not base["value"]:
+            continue
+        change = result["value"] / base["value"] - 1
+        worse = -change if result["higher_is_better"] else change
+        flag = "  REGRESSION" if worse > threshold else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:24s} {base['value']:14.3f} {result['value']:14.3f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="시뮬레이션/렌더링 벤치마크")
+    parser.add_argument("--output", help="결과를 저장할 JSON 파일")
+    parser.add_argument("--baseline", help="비교할 기준 결과 JSON 파일")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="성능 저하로 판단할 비율 (기본 0.10 = 10%%)")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="실행할 항목")
+    args = parser.parse_args(argv)
+
+    current = run(args.only)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
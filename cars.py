@@ -1,56 +1,73 @@
 import pygame
+import copy
+import heapq
 import math
+import struct
 import time
 
-from utils import blit_rotate_center
-
-def create_border_mask(surface):
-    """
-    차량의 테두리 마스크 생성
-    :param surface: 차량 이미지 (pygame.Surface)
-    :return: 테두리 마스크 (pygame.Mask)
-    """
-    original_mask = pygame.mask.from_surface(surface)
-    border_mask = pygame.mask.Mask(surface.get_size())
-
-    for x in range(surface.get_width()):
-        for y in range(surface.get_height()):
-            if original_mask.get_at((x, y)) == 1:
-                # 테두리의 픽셀만 포함
-                if (
-                    x == 0 or y == 0 or
-                    x == surface.get_width() - 1 or y == surface.get_height() - 1 or
-                    original_mask.get_at((x - 1, y)) == 0 or
-                    original_mask.get_at((x + 1, y)) == 0 or
-                    original_mask.get_at((x, y - 1)) == 0 or
-                    original_mask.get_at((x, y + 1)) == 0
-                ):
-                    border_mask.set_at((x, y), 1)
-
-    return border_mask
+import numpy as np
+
+from collision import reflect_velocity
+from utils import blit_rotate_center, ROTATION_CACHE
+from racing_line import steer_towards
+
+
+EFFECT_DURATION = 3  # 아이템 효과 지속 시간 (초)
+EFFECT_CODES = {"boost": 1, "trap": 2}  # 고정 크기 기록의 효과 종류 번호 (batch_env.EFFECT_* 와 같음)
+EFFECT_NAMES = {code: name for name, code in EFFECT_CODES.items()}
+RECORD_EFFECTS = 16  # 고정 크기 기록에 담을 수 있는 동시 효과 수
+
+# 고정 크기 차량 상태 기록 (little-endian, 정렬 없음): (이름, struct 형식)
+# 스냅샷/공유 메모리 전송용, CAR_DTYPE 은 같은 배치의 NumPy 구조체 자료형
+RECORD_FIELDS = (
+    ("x", "d"), ("y", "d"), ("angle", "d"), ("vel", "d"), ("max_vel", "d"),
+    ("last_x", "d"), ("last_y", "d"), ("effect_end_time", "d"),
+    ("boost_stack", "H"), ("slow_stack", "H"), ("boosted", "?"), ("slowed", "?"), ("effect_count", "B"),
+    ("effect_end_times", f"{RECORD_EFFECTS}d"), ("effect_types", f"{RECORD_EFFECTS}B"),
+)
+CAR_RECORD = struct.Struct("<" + "".join(fmt for _, fmt in RECORD_FIELDS))
+CAR_DTYPE = np.dtype([
+    (name, "<" + fmt[-1], (int(fmt[:-1]),)) if len(fmt) > 1 else (name, "<" + fmt)
+    for name, fmt in RECORD_FIELDS
+])
 
 
 class AbstractCar:
-    def __init__(self, max_vel, rotation_vel):
+    # 스냅샷(get_state/set_state)에 저장하는 매 틱 바뀌는 상태
+    STATE_FIELDS = (
+        "x", "y", "angle", "vel", "max_vel", "boost_stack", "slow_stack", "effect_end_times",
+        "boosted", "slowed", "effect_end_time", "last_position",
+    )
+    # 인스턴스 dict 없이 고정 슬롯에 속성 저장 (차량 수가 많은 학습/서버에서 메모리와 속성 접근 비용 절약)
+    __slots__ = (
+        "img", "clock", "max_vel", "original_max_vel", "vel", "rotation_vel", "angle", "x", "y", "acceleration",
+        "start_pos", "start_angle", "boost_stack", "slow_stack", "effect_end_times",
+        "boosted", "slowed", "effect_end_time", "last_position", "border_contact",
+    )
+
+    def __init__(self, max_vel, rotation_vel, clock=time.time):
         self.img = self.IMG
+        self.clock = clock  # 현재 시간(초)을 반환하는 함수 (시뮬레이션에서는 고정 간격 시계 주입)
         self.max_vel = max_vel
         self.original_max_vel = max_vel  # 원래 속도 저장
         self.vel = 0
         self.rotation_vel = rotation_vel
-        self.angle = 270  # 초기 방향
-        self.x, self.y = self.START_POS
+        # 출발 위치/각도는 RaceManager.assign_grid 가 트랙 출발 격자에서 차량마다 지정
+        self.start_pos = (0, 0)
+        self.start_angle = 0
+        self.angle = self.start_angle  # 초기 방향
+        self.x, self.y = self.start_pos
         self.acceleration = 0.1
 
         self.boost_stack = 0  # 가속 효과 누적 횟수
         self.slow_stack = 0   # 감속 효과 누적 횟수
-        self.effect_end_times = []  # 효과 종료 시간 저장
+        self.effect_end_times = []  # (종료 시간, 효과 종류) 최소 힙 (가장 먼저 끝나는 효과가 맨 앞)
 
         self.boosted = False
         self.slowed = False
         self.effect_end_time = 0
-        self.last_position = (self.x, self.y)  # 이전 위치
-        self.total_distance = 0  # 누적 이동 거리
-        self.border_mask = create_border_mask(self.img)  # 테두리 마스크 생성
+        self.last_position = (self.x, self.y)  # 이번 틱 출발 위치 (경계 충돌 검사 후 갱신)
+        self.border_contact = None  # 이번 틱 트랙 경계 충돌 지점 (collision.Contact, 없으면 None)
 
     def rotate(self, left=False, right=False):
         if left:
@@ -59,7 +76,7 @@ class AbstractCar:
             self.angle -= self.rotation_vel
 
     def draw(self, win):
-        blit_rotate_center(win, self.img, (self.x, self.y), self.angle)
+        return blit_rotate_center(win, self.img, (self.x, self.y), self.angle)
 
     def move_forward(self):
         self.vel = min(self.vel + self.acceleration, self.max_vel)
@@ -75,9 +92,7 @@ class AbstractCar:
             self.vel = 0
             return
 
-        # 현재 위치를 이전 위치로 저장
-        self.last_position = (self.x, self.y)
-
+        # last_position 은 그대로 두어 한 틱 안의 이동(전진 + 후진 등)을 모두 경계 충돌 검사 구간에 포함
         radians = math.radians(self.angle)
         vertical = math.cos(radians) * self.vel
         horizontal = math.sin(radians) * self.vel
@@ -86,16 +101,74 @@ class AbstractCar:
         self.y -= vertical
         self.x -= horizontal
 
-        # 누적 이동 거리 계산
-        self.total_distance += math.sqrt(vertical**2 + horizontal**2)
+    def rotated_mask(self):
+        """
+        현재 각도로 회전된 테두리 마스크와 그 좌상단 좌표
+        :return: (pygame.Mask, x, y)
+        """
+        mask, (dx, dy) = ROTATION_CACHE.get_border_mask(self.img, self.angle)
+        return mask, int(self.x) + dx, int(self.y) + dy
 
     def collide(self, mask, x=0, y=0):
-        offset = (int(self.x - x), int(self.y - y))
-        poi = mask.overlap(self.border_mask, offset)  # 테두리 마스크 사용
+        car_mask, car_x, car_y = self.rotated_mask()
+        offset = (int(car_x - x), int(car_y - y))
+        poi = mask.overlap(car_mask, offset)  # 회전된 테두리 마스크 사용
         return poi
 
+    def sense(self, sensor):
+        """
+        광선 센서로 트랙 경계까지 거리 측정
+        :param sensor: sensors.RaySensor 객체
+        :return: 광선별 거리 배열
+        """
+        return sensor.cast_cars([self])[0]
+
+    def get_state(self):
+        """현재 상태 스냅샷 (dict)"""
+        return {field: copy.copy(getattr(self, field)) for field in self.STATE_FIELDS}
+
+    def set_state(self, state):
+        """get_state 로 저장한 상태로 되돌림"""
+        for field in self.STATE_FIELDS:
+            setattr(self, field, copy.copy(state[field]))
+
+    def to_record(self):
+        """현재 상태를 고정 크기 기록(CAR_RECORD) 바이트로"""
+        buffer = bytearray(CAR_RECORD.size)
+        self.pack_into(buffer)
+        return bytes(buffer)
+
+    def pack_into(self, buffer, offset=0):
+        """
+        현재 상태를 버퍼에 고정 크기 기록으로 씀 (공유 메모리, CAR_DTYPE 배열의 한 행 등)
+        :param buffer: 쓰기 가능한 버퍼 (bytearray, memoryview, shared_memory.buf)
+        :param offset: 기록을 쓸 위치 (바이트)
+        """
+        effects = self.effect_end_times
+        if len(effects) > RECORD_EFFECTS:
+            raise ValueError(f"car has {len(effects)} active effects, record holds {RECORD_EFFECTS}")
+        padding = RECORD_EFFECTS - len(effects)
+        CAR_RECORD.pack_into(
+            buffer, offset,
+            self.x, self.y, self.angle, self.vel, self.max_vel, *self.last_position, self.effect_end_time,
+            self.boost_stack, self.slow_stack, self.boosted, self.slowed, len(effects),
+            *[end_time for end_time, _ in effects], *[0.0] * padding,
+            *[EFFECT_CODES[effect_type] for _, effect_type in effects], *[0] * padding,
+        )
+
+    def from_record(self, buffer, offset=0):
+        """pack_into/to_record 로 쓴 기록으로 상태를 되돌림 (set_state 와 같은 필드)"""
+        values = CAR_RECORD.unpack_from(buffer, offset)
+        (self.x, self.y, self.angle, self.vel, self.max_vel, last_x, last_y, self.effect_end_time,
+         self.boost_stack, self.slow_stack, self.boosted, self.slowed, count) = values[:13]
+        self.last_position = (last_x, last_y)
+        end_times = values[13:13 + count]
+        types = values[13 + RECORD_EFFECTS:13 + RECORD_EFFECTS + count]
+        self.effect_end_times = [(end_time, EFFECT_NAMES[code]) for end_time, code in zip(end_times, types)]
+
     def reset(self):
-        self.x, self.y = self.START_POS
+        self.x, self.y = self.start_pos
+        self.last_position = (self.x, self.y)
         self.angle = 0
         self.vel = 0
         self.boosted = False
@@ -104,27 +177,39 @@ class AbstractCar:
     def apply_effect(self, effect_type):
         if effect_type == "boost":
             self.boost_stack += 1  # 가속 효과 누적
-            self.max_vel = self.original_max_vel * (1.3 ** self.boost_stack)
         elif effect_type == "trap":
             self.slow_stack += 1  # 감속 효과 누적
-            self.max_vel = self.original_max_vel * (0.7 ** self.slow_stack)
-        
-        # 각 효과의 종료 시간을 개별적으로 관리
-        self.effect_end_times.append((time.time() + 3, effect_type))  # 효과 타입과 종료 시간 저장
+        self.update_max_vel()
+
+        # 각 효과의 종료 시간을 개별적으로 관리 (종료 시간 기준 최소 힙)
+        heapq.heappush(self.effect_end_times, (self.clock() + EFFECT_DURATION, effect_type))
 
     def clear_effect(self):
-        current_time = time.time()
-        
-        # 유효한 효과만 유지
-        self.effect_end_times = [
-            (end_time, effect_type) for end_time, effect_type in self.effect_end_times if end_time > current_time
-        ]
-        
-        # 효과 스택 다시 계산
-        self.boost_stack = sum(1 for _, effect_type in self.effect_end_times if effect_type == "boost")
-        self.slow_stack = sum(1 for _, effect_type in self.effect_end_times if effect_type == "trap")
-        
-        # 스택을 기반으로 속도 재계산
+        """끝난 효과 제거 (매 틱 호출, 힙 맨 앞 효과가 끝나지 않았으면 아무것도 하지 않음)"""
+        effects = self.effect_end_times
+        if not effects:
+            return
+        current_time = self.clock()
+        if effects[0][0] > current_time:
+            return
+
+        while effects and effects[0][0] <= current_time:
+            _, effect_type = heapq.heappop(effects)
+            if effect_type == "boost":
+                self.boost_stack -= 1
+            elif effect_type == "trap":
+                self.slow_stack -= 1
+        self.update_max_vel()
+
+    def reset_effects(self):
+        """모든 효과 제거 후 원래 속도로"""
+        self.effect_end_times = []
+        self.boost_stack = 0
+        self.slow_stack = 0
+        self.update_max_vel()
+
+    def update_max_vel(self):
+        """효과 스택을 기반으로 최대 속도 재계산"""
         self.max_vel = self.original_max_vel * (1.3 ** self.boost_stack) * (0.7 ** self.slow_stack)
 
     def bounce(self):
@@ -134,17 +219,26 @@ class AbstractCar:
         self.vel = -self.vel
         self.move()
 
+    def reflect(self, contact):
+        """
+        연속 충돌 검사로 찾은 지점에서 멈추고 접촉 법선에 대해 속도를 반사
+        :param contact: collision.Contact 객체
+        """
+        self.x, self.y = contact.x, contact.y
+        self.vel = reflect_velocity(self.vel, self.angle, contact.normal)
+
 
 class PlayerCar(AbstractCar):
     IMG = None  # 실제 이미지는 main에서 로드 후 클래스 속성에 할당
-    START_POS = (490, 10)
+    __slots__ = ()
 
-    def __init__(self, max_vel, rotation_vel):
-        super().__init__(max_vel, rotation_vel)
+    def __init__(self, max_vel, rotation_vel, clock=time.time):
+        super().__init__(max_vel, rotation_vel, clock)
 
     def reset(self):
-        self.x, self.y = self.START_POS
-        self.angle = 270  # 초기 각도
+        self.x, self.y = self.start_pos
+        self.last_position = (self.x, self.y)
+        self.angle = self.start_angle  # 초기 각도
         self.vel = 0
         self.boosted = False
         self.slowed = False
@@ -165,20 +259,30 @@ class PlayerCar(AbstractCar):
 
 class AICar(AbstractCar):
     IMG = None  # 실제 이미지는 main에서 로드 후 클래스 속성에 할당
-    START_POS = (490, 50)
+    STATE_FIELDS = AbstractCar.STATE_FIELDS + ("current_point", "progress")
+    LOOKAHEAD = 40  # 중앙선에서 현재 진행 거리보다 이만큼 앞의 점을 목표로 삼음 (픽셀)
+    __slots__ = ("path", "current_point", "racing_line", "progress")
 
-    def __init__(self, max_vel, rotation_vel, path):
-        super().__init__(max_vel, rotation_vel)
-        self.path = path
+    def __init__(self, max_vel, rotation_vel, path=None, clock=time.time, racing_line=None):
+        """
+        :param path: 순서대로 따라갈 경로 점 목록 (racing_line 이 없을 때 사용)
+        :param racing_line: racing_line.RacingLine 객체, 있으면 중앙선을 따라 한 바퀴씩 반복 주행
+        """
+        super().__init__(max_vel, rotation_vel, clock)
+        self.path = path or []
         self.current_point = 0
+        self.racing_line = racing_line
+        self.progress = 0.0  # 중앙선 기준 마지막 진행 거리
 
     def reset(self):
-        self.x, self.y = self.START_POS
-        self.angle = 270  # 초기 각도
+        self.x, self.y = self.start_pos
+        self.last_position = (self.x, self.y)
+        self.angle = self.start_angle  # 초기 각도
         self.vel = 0
         self.boosted = False
         self.slowed = False
         self.current_point = 0
+        self.progress = 0.0
 
     def update_path_point(self):
         """현재 경로 점에 도달했는지 확인 후, 다음 경로 점으로 이동"""
@@ -211,7 +315,22 @@ class AICar(AbstractCar):
 
         return angle_diff
 
+    def follow_racing_line(self):
+        """진행 거리 지도로 현재 위치를 찾고, 중앙선 위 앞쪽 목표점을 향해 회전 후 가속"""
+        line = self.racing_line
+        progress = line.progress_at(self.x + self.img.get_width() / 2, self.y + self.img.get_height() / 2)
+        if progress is not None:  # 트랙에서 멀리 벗어나면 마지막 진행 거리 유지
+            self.progress = progress
+
+        steer_towards(self, *line.point_at(self.progress + self.LOOKAHEAD))
+        self.vel = min(self.vel + self.acceleration, self.max_vel)
+        AbstractCar.move(self)
+
     def move(self):
+        if self.racing_line is not None:
+            self.follow_racing_line()
+            return
+
         if self.current_point >= len(self.path):
             return
 
@@ -231,3 +350,8 @@ class AICar(AbstractCar):
 
         self.y -= vertical
         self.x -= horizontal
+
+    def bounce(self):
+        # 튕겨날 때는 경로를 따라가지 않고 반대 방향으로만 이동
+        self.vel = -self.vel
+        AbstractCar.move(self)
@@ -0,0 +1,180 @@
+"""
+트랙 경계와의 연속 충돌 검사 (continuous collision detection)
+
+AbstractCar.move 는 매 틱 vel 픽셀씩 순간 이동하므로 끝 위치만 검사하면 부스트가 겹쳐 빨라졌을 때
+얇은 경계를 뚫고 지나가거나, 경계 안쪽 깊이 들어간 채로 bounce 되어 끼일 수 있다.
+SweptCollider 는 이번 틱 이동 구간(last_position -> 현재 위치)을 따라가며 처음 부딪히는 시점(time of impact)과
+접촉 법선을 구한다.
+
+경계까지의 체비셰프 거리장(sensors.compute_distance_field)으로 차량 외접원이 경계에 닿지 않는 거리만큼은
+한 번에 건너뛰고(ray march), 경계 근처에서만 SUBSTEP 픽셀 간격으로 회전 테두리 마스크를 겹쳐 본다.
+접촉 법선은 충돌 위치에서 차량 마스크를 상하좌우로 1픽셀씩 옮겼을 때 겹치는 면적의 차이로 구한다.
+"""
+import math
+
+from mask_cache import load_or_build_array, mask_key
+from sensors import compute_distance_field
+from utils import ROTATION_CACHE
+
+SUBSTEP = 1.0       # 경계 근처에서 한 번에 이동하며 검사하는 거리 (픽셀, 가장 얇은 경계보다 작아야 함)
+REFINE_STEPS = 4    # 충돌 구간을 이분 탐색으로 좁히는 횟수
+MAX_PUSH = 8        # 겹친 채로 시작했을 때 법선 방향으로 밀어내는 최대 거리 (픽셀)
+FIELD_RANGE = 64    # 거리장 최대 거리 (이보다 먼 경계는 64 로 취급하므로 항상 안전한 쪽으로 판단)
+RESTITUTION = 1.0   # 반발 계수 (1 이면 정면 충돌 시 속도가 그대로 반대가 되어 기존 bounce 와 같음)
+
+
+def car_radius(image):
+    """회전해도 차량 테두리가 벗어나지 않는 이미지 중심 기준 반지름 (정수 좌표 내림 오차 포함)"""
+    return math.hypot(*image.get_size()) / 2 + 2
+
+
+def reflect_velocity(vel, angle, normal, restitution=RESTITUTION):
+    """
+    진행 방향 속도를 접촉 법선에 대해 반사한 뒤 진행 방향 성분만 남김 (차량은 옆으로 미끄러지지 않음)
+    정면 충돌이면 -vel * restitution, 비스듬히 부딪히면 진행 방향 속도가 조금만 줄어든다.
+    :param vel: 진행 방향 속도 (AbstractCar.vel)
+    :param angle: 차량 각도 (도)
+    :param normal: 경계에서 차량 쪽을 향하는 단위 법선 (nx, ny)
+    :return: 새 속도
+    """
+    radians = math.radians(angle)
+    dot = -math.sin(radians) * normal[0] - math.cos(radians) * normal[1]
+    if vel * dot >= 0:  # 이미 경계에서 멀어지는 중
+        return vel
+    return vel * (1 - (1 + restitution) * dot * dot)
+
+
+class Contact:
+    """이동 구간에서 처음 부딪힌 지점"""
+    __slots__ = ("toi", "x", "y", "normal")
+
+    def __init__(self, toi, x, y, normal):
+        self.toi = toi          # 이동 구간에서 부딪힌 시점 (0 = 출발 위치, 1 = 도착 위치)
+        self.x = x              # 부딪히기 직전 겹치지 않는 차량 좌상단 좌표
+        self.y = y
+        self.normal = normal    # 경계에서 차량 쪽을 향하는 단위 법선 (nx, ny)
+
+    def __repr__(self):
+        return f"Contact(toi={self.toi:.3f}, pos=({self.x:.1f}, {self.y:.1f}), normal={self.normal})"
+
+
+class SweptCollider:
+    def __init__(self, mask, x=0, y=0, substep=SUBSTEP, field=None):
+        """
+        :param mask: 부딪힐 경계 마스크 (Track.border_mask)
+        :param x: 마스크 좌상단 x 좌표
+        :param y: 마스크 좌상단 y 좌표
+        :param substep: 경계 근처에서 검사 간격 (픽셀)
+        :param field: 미리 계산한 FIELD_RANGE 거리장 (None 이면 디스크 캐시에서 읽거나 계산)
+        """
+        self.mask = mask
+        self.x, self.y = x, y
+        self.substep = substep
+        if field is None:
+            field = load_or_build_array(
+                mask_key(f"distance-field-{FIELD_RANGE}", mask),
+                lambda: compute_distance_field(mask, FIELD_RANGE),
+            )
+        self.field = field
+
+    def clearance(self, x, y):
+        """(x, y) 에서 가장 가까운 경계까지 거리의 하한 (마스크 밖이면 0)"""
+        px, py = int(x) - self.x, int(y) - self.y
+        height, width = self.field.shape
+        if 0 <= px < width and 0 <= py < height:
+            return int(self.field[py, px])
+        return 0
+
+    def _offset(self, dx, dy, x, y):
+        return int(x) + dx - self.x, int(y) + dy - self.y
+
+    def _overlap(self, car_mask, dx, dy, x, y):
+        return self.mask.overlap(car_mask, self._offset(dx, dy, x, y)) is not None
+
+    def _normal(self, car_mask, dx, dy, x, y, fallback):
+        """겹친 면적이 줄어드는 방향 (경계 밖을 향하는 법선), 구할 수 없으면 fallback 의 반대 방향"""
+        ox, oy = self._offset(dx, dy, x, y)
+        area = self.mask.overlap_area
+        nx = area(car_mask, (ox - 1, oy)) - area(car_mask, (ox + 1, oy))
+        ny = area(car_mask, (ox, oy - 1)) - area(car_mask, (ox, oy + 1))
+        norm = math.hypot(nx, ny)
+        if norm:
+            return nx / norm, ny / norm
+        norm = math.hypot(*fallback)
+        return (-fallback[0] / norm, -fallback[1] / norm) if norm else (0.0, 0.0)
+
+    def sweep(self, car):
+        """
+        차량의 이번 틱 이동 구간을 따라 경계와 처음 부딪히는 지점 찾기
+        회전 마스크는 현재 각도를 사용한다 (틱 안에서 회전이 이동보다 먼저 일어남).
+        :param car: AbstractCar 객체 (last_position 에서 현재 위치로 이동했다고 봄)
+        :return: Contact, 부딪히지 않았으면 None
+        """
+        car_mask, (dx, dy) = ROTATION_CACHE.get_border_mask(car.img, car.angle)
+        sx, sy = car.last_position
+        move_x, move_y = car.x - sx, car.y - sy
+        length = math.hypot(move_x, move_y)
+        half_w, half_h = car.img.get_width() / 2, car.img.get_height() / 2
+        radius = car_radius(car.img)
+
+        if self._overlap(car_mask, dx, dy, sx, sy):
+            return self._depenetrate(car_mask, dx, dy, sx, sy, (move_x, move_y))
+
+        # 거리장으로 안전한 만큼 건너뛰고, 경계 근처에서는 substep 간격으로 마스크 검사
+        travelled = 0.0
+        while travelled < length:
+            t = travelled / length
+            free = self.clearance(sx + move_x * t + half_w, sy + move_y * t + half_h) - radius
+            if free >= self.substep:
+                travelled += free
+                continue
+
+            next_travelled = min(travelled + self.substep, length)
+            t_next = next_travelled / length
+            if self._overlap(car_mask, dx, dy, sx + move_x * t_next, sy + move_y * t_next):
+                return self._refine(car_mask, dx, dy, sx, sy, (move_x, move_y), t, t_next)
+            travelled = next_travelled
+        return None
+
+    def resolve(self, car):
+        """
+        sweep 으로 찾은 지점에서 멈추고 반사한 뒤, 현재 위치를 다음 이동 구간의 출발점(last_position)으로 기록
+        :return: Contact, 부딪히지 않았으면 None
+        """
+        contact = self.sweep(car)
+        if contact:
+            car.reflect(contact)
+        car.last_position = (car.x, car.y)
+        return contact
+
+    def bounce(self, car):
+        """
+        car.bounce() 로 튕겨 나간 이동도 경계 연속 충돌 검사 (결승선/차량 충돌 후 얇은 경계를 뚫지 않도록)
+        같은 각도로 움직이므로 last_position 이 아직 틱 출발 위치여도 한 직선 구간으로 검사된다.
+        :return: Contact, 부딪히지 않았으면 None
+        """
+        car.bounce()
+        return self.resolve(car)
+
+    def _refine(self, car_mask, dx, dy, sx, sy, move, t_free, t_hit):
+        """겹치지 않는 t_free 와 겹치는 t_hit 사이를 이분 탐색으로 좁힘"""
+        move_x, move_y = move
+        for _ in range(REFINE_STEPS):
+            t = (t_free + t_hit) / 2
+            if self._overlap(car_mask, dx, dy, sx + move_x * t, sy + move_y * t):
+                t_hit = t
+            else:
+                t_free = t
+
+        normal = self._normal(car_mask, dx, dy, sx + move_x * t_hit, sy + move_y * t_hit, move)
+        return Contact(t_free, sx + move_x * t_free, sy + move_y * t_free, normal)
+
+    def _depenetrate(self, car_mask, dx, dy, x, y, move):
+        """출발 위치부터 겹쳐 있으면 (경계 쪽으로 회전한 경우 등) 법선 방향으로 밀어냄"""
+        normal = self._normal(car_mask, dx, dy, x, y, move)
+        for _ in range(MAX_PUSH):
+            if not self._overlap(car_mask, dx, dy, x, y):
+                break
+            x += normal[0]
+            y += normal[1]
+        return Contact(0.0, x, y, normal)
@@ -0,0 +1,61 @@
+"""
+게임 시계와 난수 생성기
+
+GameInfo, 차량(AbstractCar), 아이템(items/ItemManager)은 모두 time.time 과 random 모듈 대신
+여기서 만든 시계(현재 시간을 반환하는 함수)와 random.Random 객체를 주입받을 수 있다.
+같은 시드와 같은 입력이면 경기를 똑같이 재현할 수 있고, 고정 간격 시계를 쓰면
+벽시계 속도와 관계없이(예: 실제 시간의 100배 속도로) 효과 지속 시간과 MIN_TIME 조건이 그대로 적용된다.
+"""
+import random
+import time
+
+from settings import FPS
+
+
+class SimClock:
+    """
+    고정 시간 간격으로 진행되는 시뮬레이션 시계
+    호출하면 현재 시뮬레이션 시간(초)을 반환하므로 time.time 대신 주입할 수 있다.
+    """
+
+    def __init__(self, dt=1 / FPS, start=0.0):
+        self.dt = dt
+        self.start = start
+        self.ticks = 0
+
+    def __call__(self):
+        # 누적 덧셈 오차가 없도록 틱 수로 계산
+        return self.start + self.ticks * self.dt
+
+    @property
+    def now(self):
+        return self()
+
+    def advance(self, ticks=1):
+        self.ticks += ticks
+
+    def reset(self, start=0.0):
+        self.start = start
+        self.ticks = 0
+
+
+class GameContext:
+    """
+    한 경기에서 공유하는 시계와 난수 생성기 묶음
+    :param seed: 난수 시드 (None 이면 매번 다른 배치)
+    :param clock: 시계 함수 (None 이면 time.time)
+    """
+
+    def __init__(self, seed=None, clock=None):
+        self.seed = seed
+        self.clock = clock or time.time
+        self.rng = random.Random(seed)
+
+    def reseed(self, seed):
+        self.seed = seed
+        self.rng.seed(seed)
+
+    @classmethod
+    def simulated(cls, seed=None, dt=1 / FPS):
+        """고정 간격 시계를 사용하는 재현 가능한 컨텍스트"""
+        return cls(seed, SimClock(dt))
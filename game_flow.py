@@ -0,0 +1,99 @@
+"""
+레벨 시작/종료 흐름 상태 기계
+
+대기(키 입력) -> 카운트다운 -> 주행 -> 결과 표시 -> 대기 순서로 진행한다.
+pygame.time.wait 으로 멈추는 대신 메인 루프가 매 틱 update() 를 호출해 시간이 지나면 다음 상태로 넘어가므로
+배너를 띄우는 동안에도 화면 갱신과 입력 처리가 계속된다.
+headless 모드에서는 배너와 카운트다운 없이 바로 다음 레벨을 시작한다.
+"""
+import math
+import time
+
+WAITING = "waiting"        # 키 입력 대기
+COUNTDOWN = "countdown"    # 출발 카운트다운
+RACING = "racing"          # 주행 중
+RESULT = "result"          # 결과 배너 표시
+
+COUNTDOWN_TIME = 3   # 출발 카운트다운 (초)
+RESULT_TIME = 5      # 결과 배너 표시 시간 (초)
+IDLE_FPS = 15        # 대기/결과 화면 프레임 제한
+
+
+class GameFlow:
+    def __init__(self, game_info, clock=time.time, headless=False,
+                 countdown_time=COUNTDOWN_TIME, result_time=RESULT_TIME):
+        """
+        :param game_info: GameInfo 객체
+        :param clock: 현재 시간(초)을 반환하는 함수
+        :param headless: True 면 배너/카운트다운 없이 바로 진행
+        """
+        self.game_info = game_info
+        self.clock = clock
+        self.headless = headless
+        self.countdown_time = countdown_time
+        self.result_time = result_time
+        self.state = WAITING
+        self.state_start = clock()
+        self.message = None
+
+    def _enter(self, state):
+        self.state = state
+        self.state_start = self.clock()
+
+    def _start_race(self):
+        self.game_info.start_level()
+        self._enter(RACING)
+
+    @property
+    def racing(self):
+        return self.state == RACING
+
+    @property
+    def idle(self):
+        """화면에 움직이는 것이 없는 상태 (프레임 제한을 낮춰도 됨)"""
+        return self.state in (WAITING, RESULT)
+
+    def frame_rate(self, fps):
+        return IDLE_FPS if self.idle else fps
+
+    def on_key(self):
+        """키 입력: 대기 중이면 카운트다운 시작, 결과 표시 중이면 건너뜀"""
+        if self.state == WAITING:
+            self._enter(COUNTDOWN)
+        elif self.state == RESULT:
+            self._enter(WAITING)
+
+    def show_result(self, message):
+        """결승선 통과 결과 배너 표시 (headless 모드에서는 무시)"""
+        if self.headless:
+            return
+        self.message = message
+        self._enter(RESULT)
+
+    def update(self):
+        """매 틱 호출: 경과 시간에 따라 다음 상태로 전환"""
+        elapsed = self.clock() - self.state_start
+
+        if self.state == RACING and not self.game_info.started:
+            # 다음 레벨로 넘어가거나 경기가 초기화됨
+            self._enter(WAITING)
+        elif self.state == RESULT and elapsed >= self.result_time:
+            self._enter(WAITING)
+        elif self.state == COUNTDOWN and elapsed >= self.countdown_time:
+            self._start_race()
+
+        if self.state == WAITING and self.headless:
+            self._start_race()
+
+    def banner(self):
+        """현재 상태에서 화면 가운데에 띄울 문자열 (없으면 None)"""
+        if self.headless:
+            return None
+        if self.state == WAITING:
+            return f"Press any key to start level {self.game_info.level}!"
+        if self.state == COUNTDOWN:
+            remaining = self.countdown_time - (self.clock() - self.state_start)
+            return f"Level {self.game_info.level} starts in {max(math.ceil(remaining), 1)}"
+        if self.state == RESULT:
+            return self.message
+        return None
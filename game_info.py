@@ -2,14 +2,21 @@ import time
 
 class GameInfo:
     LEVELS = 3
-    MIN_DISTANCE = 5000  # 최소 이동 거리 (픽셀)
     MIN_TIME = 20        # 최소 경과 시간 (초)
 
-    def __init__(self, level=1):
+    def __init__(self, lap_tracker, level=1, clock=time.time):
         self.level = level
+        self.clock = clock  # 현재 시간(초)을 반환하는 함수
+        self.lap_tracker = lap_tracker  # lap_tracker.LapTracker (트랙을 따라 한 바퀴 돌았는지 판단, 필수)
         self.started = False
         self.level_start_time = 0
 
+    def get_state(self):
+        return self.level, self.started, self.level_start_time
+
+    def set_state(self, state):
+        self.level, self.started, self.level_start_time = state
+
     def next_level(self):
         self.level += 1
         self.started = False
@@ -23,12 +30,12 @@ class GameInfo:
 
     def start_level(self):
         self.started = True
-        self.level_start_time = time.time()
+        self.level_start_time = self.clock()
 
     def get_level_time(self):
         if not self.started:
             return 0
-        return round(time.time() - self.level_start_time)
+        return round(self.clock() - self.level_start_time)
 
     def is_ready_for_finish(self, car):
         """
@@ -40,12 +47,12 @@ class GameInfo:
             return False
 
         # 경과 시간 체크
-        elapsed_time = time.time() - self.level_start_time
+        elapsed_time = self.clock() - self.level_start_time
         if elapsed_time < self.MIN_TIME:
             return False
 
-        # 최소 이동 거리 확인
-        if car.total_distance < self.MIN_DISTANCE:
+        # 마지막 구간까지 순서대로 통과했는지 확인
+        if not self.lap_tracker.ready_for_finish(car):
             return False
         
         # 차량 속도와 방향 확인
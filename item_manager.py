@@ -0,0 +1,128 @@
+"""
+트랩/부스트 아이템 관리자
+
+아이템을 균일 격자(uniform grid)에 등록해 두고, 차량의 회전된 테두리 마스크 영역과 겹치는
+격자 칸의 아이템만 경계 상자 -> 마스크 순서로 검사한다 (broad phase / narrow phase).
+아이템 마스크는 종류별로 한 번만 만들어 재사용하며, 모든 차량의 아이템 획득을 처리한다.
+"""
+import items
+
+
+class ItemManager:
+    def __init__(self, kinds, cell_size=64, rng=None, track=None):
+        """
+        :param kinds: {종류 이름: (이미지, 마스크)}, 종류 이름은 apply_effect 의 effect_type ("trap", "boost")
+        :param cell_size: 격자 한 칸 크기 (픽셀)
+        :param rng: 아이템 배치용 random.Random (None 이면 random 모듈)
+        :param track: tracks.Track (미리 계산된 유효 좌표 표 사용, None 이면 items.TRACK_MASK 기준)
+        """
+        self.kinds = kinds
+        self.cell_size = cell_size
+        self.rng = rng
+        self.track = track
+        self.on_spawn = None  # spawn 으로 생긴 아이템마다 on_spawn(종류, 좌상단 좌표) 호출 (리플레이 기록용)
+        self._items = {}  # 아이템 id -> (종류, (x, y), 너비, 높이)
+        self._cells = {}  # (칸 x, 칸 y) -> 아이템 id 집합
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def _cell_range(self, x, y, width, height):
+        size = self.cell_size
+        for cell_x in range(x // size, (x + width - 1) // size + 1):
+            for cell_y in range(y // size, (y + height - 1) // size + 1):
+                yield cell_x, cell_y
+
+    def add(self, kind, pos):
+        """아이템 하나를 pos(좌상단) 에 추가하고 id 반환"""
+        item_id = self._next_id
+        self._next_id += 1
+        pos = (int(pos[0]), int(pos[1]))
+        width, height = self.kinds[kind][0].get_size()
+        self._items[item_id] = (kind, pos, width, height)
+        for cell in self._cell_range(pos[0], pos[1], width, height):
+            self._cells.setdefault(cell, set()).add(item_id)
+        return item_id
+
+    def remove(self, item_id):
+        kind, pos, width, height = self._items.pop(item_id)
+        for cell in self._cell_range(pos[0], pos[1], width, height):
+            ids = self._cells[cell]
+            ids.discard(item_id)
+            if not ids:
+                del self._cells[cell]
+
+    def clear(self):
+        self._items.clear()
+        self._cells.clear()
+
+    def get_state(self):
+        """아이템 배치 스냅샷 (id 순서까지 그대로 복원되도록 id 포함)"""
+        return dict(self._items), self._next_id
+
+    def set_state(self, state):
+        items_by_id, next_id = state
+        self.clear()
+        for item_id, (kind, pos, width, height) in sorted(items_by_id.items()):
+            self._items[item_id] = (kind, pos, width, height)
+            for cell in self._cell_range(pos[0], pos[1], width, height):
+                self._cells.setdefault(cell, set()).add(item_id)
+        self._next_id = next_id
+
+    def spawn(self, kind, count):
+        """도로 위 무작위 위치에 아이템 count 개 생성 (아이템 전체가 도로 안에 들어가도록 중심 기준 배치)"""
+        width, height = self.kinds[kind][0].get_size()
+        table = self.track.spawn_table(width, height) if self.track is not None else None
+        for x, y in items.generate_random_positions(count, width, height, self.rng, table):
+            pos = (x - width // 2, y - height // 2)
+            self.add(kind, pos)
+            if self.on_spawn is not None:
+                self.on_spawn(kind, pos)
+
+    def positions(self, kind):
+        return [item[1] for item in self._items.values() if item[0] == kind]
+
+    def sprites(self):
+        """그리기용 [(이미지, 좌표), ...]"""
+        return [(self.kinds[item[0]][0], item[1]) for item in self._items.values()]
+
+    def query(self, x, y, width, height):
+        """사각형 영역과 경계 상자가 겹치는 아이템 id 목록 (broad phase)"""
+        candidates = set()
+        for cell in self._cell_range(x, y, width, height):
+            candidates.update(self._cells.get(cell, ()))
+
+        result = []
+        for item_id in candidates:
+            _, pos, item_width, item_height = self._items[item_id]
+            if (pos[0] < x + width and x < pos[0] + item_width
+                    and pos[1] < y + height and y < pos[1] + item_height):
+                result.append(item_id)
+        return sorted(result)
+
+    def pick_up(self, cars):
+        """
+        각 차량이 밟은 아이템을 종류별로 최대 1개씩 획득
+        획득한 아이템은 제거 후 새 위치에 다시 생성하고, 차량에 효과를 적용한다.
+        :param cars: AbstractCar 목록
+        :return: [(차량, 종류), ...] 획득 목록
+        """
+        picked = []
+        for car in cars:
+            car_mask, car_x, car_y = car.rotated_mask()
+            width, height = car_mask.get_size()
+
+            taken = set()
+            for item_id in self.query(car_x, car_y, width, height):
+                kind, pos = self._items[item_id][:2]
+                if kind in taken:
+                    continue
+                item_mask = self.kinds[kind][1]
+                if item_mask.overlap(car_mask, (car_x - pos[0], car_y - pos[1])):
+                    taken.add(kind)
+                    picked.append((car, kind))
+                    self.remove(item_id)
+                    self.spawn(kind, 1)
+                    car.apply_effect(kind)
+        return picked
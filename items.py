@@ -1,11 +1,21 @@
 import pygame
 import random
 
+import numpy as np
+
+from mask_grid import mask_to_array
+
 # 아래 두 전역 변수는 main.py에서 로드된 TRACK_MASK를 주입받거나,
 # 혹은 여기서도 직접 로드가 가능하지만, 일반적으로는 main에서 전달받는 방식을 권장합니다.
-TRACK_MASK = None  
+TRACK_MASK = None
 WIDTH, HEIGHT = 0, 0
 
+# 아이템 크기별 유효 중심 좌표 표: (너비, 높이) -> (xs, ys)
+# TRACK_MASK 가 바뀌면 다시 계산한다.
+_spawn_tables = {}
+_spawn_tables_mask = None
+
+
 def is_item_inside_track(x, y, width, height):
     """
     아이템의 전체 영역이 도로 내부에 있는지 확인
@@ -34,26 +44,69 @@ def is_item_inside_track(x, y, width, height):
     return True
 
 
-def generate_random_positions(count, item_width, item_height):
+def build_spawn_table(item_width, item_height, track_mask=None):
     """
-    도로 내부에 아이템 전체가 포함되도록 무작위 좌표를 생성
-    :param count: 생성할 좌표 개수
+    아이템 전체 영역이 도로 안에 들어가는 모든 중심 좌표 계산
+    TRACK_MASK 를 아이템 크기만큼 침식(erosion)한 결과로, 누적합(summed-area table)으로 한 번에 구한다.
     :param item_width: 아이템의 너비
     :param item_height: 아이템의 높이
-    :return: [(x1, y1), (x2, y2), ...]
+    :param track_mask: 도로 마스크 (None 이면 TRACK_MASK)
+    :return: (xs, ys) int 배열 - 같은 인덱스가 한 좌표
     """
-    positions = []
-    attempts = 0
+    grid = mask_to_array(TRACK_MASK if track_mask is None else track_mask)
+    height, width = grid.shape
+    half_width, half_height = item_width // 2, item_height // 2
+
+    # 경계 밖으로 나가지 않는 중심 좌표 범위
+    if width <= 2 * half_width or height <= 2 * half_height:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)
+
+    sums = np.zeros((height + 1, width + 1), dtype=np.int64)
+    sums[1:, 1:] = grid.cumsum(axis=0).cumsum(axis=1)
+
+    # 중심이 (x, y) 인 사각형 [x - hw, x + hw] x [y - hh, y + hh] 의 도로 픽셀 수
+    size_x, size_y = 2 * half_width + 1, 2 * half_height + 1
+    area = (
+        sums[size_y:, size_x:] - sums[:-size_y, size_x:]
+        - sums[size_y:, :-size_x] + sums[:-size_y, :-size_x]
+    )
+    ys, xs = np.nonzero(area == size_x * size_y)
+    return (xs + half_width).astype(np.int32), (ys + half_height).astype(np.int32)
 
-    while len(positions) < count and attempts < 1000:
-        x = random.randint(0, WIDTH - 1)
-        y = random.randint(0, HEIGHT - 1)
 
-        if is_item_inside_track(x, y, item_width, item_height):
-            positions.append((x, y))
+def get_spawn_table(item_width, item_height):
+    """아이템 크기별 유효 중심 좌표 표 (처음 요청 시 계산 후 저장)"""
+    global _spawn_tables_mask
+    if _spawn_tables_mask is not TRACK_MASK:
+        _spawn_tables.clear()
+        _spawn_tables_mask = TRACK_MASK
 
-        attempts += 1
+    key = (item_width, item_height)
+    if key not in _spawn_tables:
+        _spawn_tables[key] = build_spawn_table(item_width, item_height)
+    return _spawn_tables[key]
 
-    if len(positions) < count:
-        print(f"Warning: Only {len(positions)} positions generated out of {count}")
+
+def generate_random_positions(count, item_width, item_height, rng=None, table=None):
+    """
+    도로 내부에 아이템 전체가 포함되도록 무작위 좌표를 생성
+    미리 계산한 유효 좌표 표에서 고르므로 도로 위 자리가 하나라도 있으면 항상 count 개를 반환한다.
+    :param count: 생성할 좌표 개수
+    :param item_width: 아이템의 너비
+    :param item_height: 아이템의 높이
+    :param rng: random.Random 객체 (같은 시드면 같은 배치, None 이면 random 모듈 사용)
+    :param table: 유효 중심 좌표 표 (xs, ys) (None 이면 TRACK_MASK 기준 get_spawn_table)
+    :return: [(x1, y1), (x2, y2), ...] 아이템 중심 좌표
+    """
+    rng = rng or random
+    xs, ys = table if table is not None else get_spawn_table(item_width, item_height)
+
+    if len(xs) == 0:
+        print(f"Warning: No valid position for {item_width}x{item_height} item")
+        return []
+
+    positions = []
+    for _ in range(count):
+        index = rng.randrange(len(xs))
+        positions.append((int(xs[index]), int(ys[index])))
     return positions
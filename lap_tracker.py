@@ -0,0 +1,133 @@
+"""
+중앙선 진행 거리 기반 랩 추적기
+
+racing_line.RacingLine 의 픽셀별 진행 거리 지도를 매 틱 한 번 조회해서
+차량별 누적 진행 거리, 구간(sector) 통과 시각, 랩 수, 역주행 여부를 갱신한다.
+누적 이동 거리(total_distance) 대신 트랙을 따라 실제로 나아간 거리로 결승선 통과 조건을 판단하므로
+제자리에서 돌거나 앞뒤로 왕복해서는 조건을 채울 수 없다.
+"""
+import copy
+import time
+
+NUM_SECTORS = 3             # 한 바퀴를 나누는 구간 수 (마지막 구간에 들어와야 결승선 통과 가능)
+WRONG_WAY_DISTANCE = 100    # 최고 진행 거리보다 이만큼 뒤로 가면 역주행 (픽셀)
+
+
+def wrap_delta(s, last_s, length):
+    """
+    한 바퀴 길이 length 인 진행 거리의 변화량 (결승선을 넘으면 -length/2 ~ length/2 로 감음)
+    스칼라와 numpy 배열 모두 사용 가능
+    """
+    return (s - last_s + length / 2) % length - length / 2
+
+
+class CarProgress:
+    """차량 한 대의 랩 진행 상태"""
+
+    def __init__(self, s, now):
+        self.last_s = s          # 마지막으로 조회한 진행 거리 (0 ~ 한 바퀴 길이)
+        self.progress = s        # 출발 이후 누적 진행 거리 (뒤로 가면 줄어듦)
+        self.best = s            # 지금까지 가장 멀리 나아간 누적 진행 거리
+        self.lap = 0             # 완주한 랩 수
+        self.sector = 0          # 현재 랩에서 도달한 구간 번호
+        self.sector_start = now
+        self.lap_start = now
+        self.sector_times = []   # [(랩, 구간, 걸린 시간), ...]
+        self.lap_times = []
+        self.wrong_way = False
+
+
+def _copy_progress(state):
+    state = copy.copy(state)
+    state.sector_times = list(state.sector_times)
+    state.lap_times = list(state.lap_times)
+    return state
+
+
+class LapTracker:
+    def __init__(self, racing_line, num_sectors=NUM_SECTORS, clock=time.time):
+        """
+        :param racing_line: racing_line.RacingLine 객체
+        :param num_sectors: 한 바퀴를 나누는 구간 수
+        :param clock: 현재 시간(초)을 반환하는 함수
+        """
+        self.num_sectors = num_sectors
+        self.clock = clock
+        self.set_line(racing_line)
+
+    def set_line(self, racing_line):
+        """중앙선 교체 (트랙 교체 시, 모든 차량 진행 상태를 지움)"""
+        self.line = racing_line
+        self.sector_length = racing_line.length / self.num_sectors
+        self._states = {}  # 차량 -> CarProgress
+
+    def _lookup(self, car):
+        return self.line.progress_at(car.x + car.img.get_width() / 2, car.y + car.img.get_height() / 2)
+
+    def reset(self, car):
+        """차량의 진행 상태를 현재 위치 기준으로 처음부터 다시 시작"""
+        s = self._lookup(car) or 0.0
+        state = CarProgress(s, self.clock())
+        if s > self.line.length / 2:
+            # 출발선 뒤쪽에서 출발하면 음수 진행 거리에서 시작
+            state.progress = state.best = s - self.line.length
+        self._states[car] = state
+        return state
+
+    def remove(self, car):
+        """경기에서 빠진 차량의 진행 상태 삭제"""
+        self._states.pop(car, None)
+
+    def state(self, car):
+        state = self._states.get(car)
+        return state if state is not None else self.reset(car)
+
+    def get_state(self, car):
+        """차량 진행 상태 스냅샷"""
+        return _copy_progress(self.state(car))
+
+    def set_state(self, car, state):
+        self._states[car] = _copy_progress(state)
+
+    def update(self, car):
+        """
+        차량의 진행 상태 갱신 (매 틱 차량마다 한 번 호출)
+        :return: 이번 틱에 중앙선을 따라 나아간 거리 (픽셀, 뒤로 가면 음수)
+        """
+        state = self.state(car)
+        s = self._lookup(car)
+        if s is None:  # 트랙에서 멀리 벗어나면 진행 상태 유지
+            return 0.0
+
+        delta = wrap_delta(s, state.last_s, self.line.length)
+        state.last_s = s
+        state.progress += delta
+
+        if state.progress > state.best:
+            state.best = state.progress
+            self._advance_sectors(state)
+        state.wrong_way = state.progress < state.best - WRONG_WAY_DISTANCE
+        return delta
+
+    def _advance_sectors(self, state):
+        length = self.line.length
+        while state.best >= state.lap * length + (state.sector + 1) * self.sector_length:
+            now = self.clock()
+            state.sector_times.append((state.lap, state.sector, now - state.sector_start))
+            state.sector_start = now
+            state.sector += 1
+            if state.sector == self.num_sectors:
+                state.lap_times.append(now - state.lap_start)
+                state.lap_start = now
+                state.lap += 1
+                state.sector = 0
+
+    def ready_for_finish(self, car):
+        """현재 랩의 마지막 구간까지 순서대로 도달했고 역주행 중이 아닌지"""
+        state = self.state(car)
+        return state.sector == self.num_sectors - 1 and not state.wrong_way
+
+    def lap_fraction(self, car):
+        """현재 랩 진행률 (0 ~ 1)"""
+        state = self.state(car)
+        return min(max((state.progress - state.lap * self.line.length) / self.line.length, 0.0), 1.0)
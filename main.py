@@ -1,167 +1,127 @@
-import pygame
+import os
 import random
-import time
-import math
-
-from utils import scale_image, blit_text_center
-from cars import PlayerCar, AICar
-from cars import create_border_mask
-from game_info import GameInfo
-import items
-
-pygame.init()
-pygame.font.init()
-
-# 기본 설정
-FPS = 60
-MAIN_FONT = pygame.font.SysFont("comicsans", 35)
-
-# 이미지 로드 및 변환
-GRASS = scale_image(pygame.image.load("imgs/grass.jpg"), 2.5)
-TRACK = scale_image(pygame.image.load("imgs/track.png"), 0.9)
-TRACK_BORDER = scale_image(pygame.image.load("imgs/track-border.png"), 0.9)
-
-FINISH = pygame.image.load("imgs/finish.png")
-FINISH = pygame.transform.rotate(FINISH, 90)  # 90도 회전
-FINISH_POSITION = (445, 3)
-
-RED_CAR = scale_image(pygame.image.load("imgs/red-car.png"), 0.55)
-BLUE_CAR = scale_image(pygame.image.load("imgs/blue-car.png"), 0.55)
-TRAP = pygame.transform.scale(pygame.image.load("imgs/trap.png"), (25, 15))
-BOOST = pygame.transform.scale(pygame.image.load("imgs/boost.png"), (25, 15))
-
-# 마스크 생성
-TRACK_MASK = pygame.mask.from_threshold(TRACK, (33, 33, 33), (10, 10, 10))
-TRACK_BORDER_MASK = pygame.mask.from_surface(TRACK_BORDER)
-FINISH_MASK = pygame.mask.from_surface(
-    pygame.transform.scale(FINISH, (FINISH.get_width() + 10, FINISH.get_height() + 10))
-)
 
-WIDTH, HEIGHT = TRACK.get_width(), TRACK.get_height()
+import pygame
+
+from settings import WIDTH, HEIGHT
+
+# 이미지를 쓰는 모듈(settings 이미지, simulation)보다 먼저 화면을 만들어야 이미지가 화면 픽셀 형식으로 변환된다
 WIN = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Racing Game!")
 
-# cars.py에서 가져온 클래스들에 이미지 할당
-PlayerCar.IMG = RED_CAR
-AICar.IMG = BLUE_CAR
-
-# items.py 전역변수 설정
-items.TRACK_MASK = TRACK_MASK
-items.WIDTH, items.HEIGHT = WIDTH, HEIGHT
+from cars import PlayerCar, AICar  # noqa: E402
+from game_clock import GameContext  # noqa: E402
+from game_flow import GameFlow  # noqa: E402
+from game_info import GameInfo  # noqa: E402
+from lap_tracker import LapTracker  # noqa: E402
+from profiler import FrameProfiler  # noqa: E402
+from race_manager import RaceManager  # noqa: E402
+from replay import ReplayRecorder  # noqa: E402
+from settings import FPS, MAIN_FONT  # noqa: E402
+from renderer import DirtyRenderer  # noqa: E402
+from simulation import (  # noqa: E402
+    ACTION_LEFT, ACTION_RIGHT, ACTION_FORWARD, ACTION_BACKWARD,
+    PLAYER_WON, AI_WON,
+    apply_action, create_item_manager, resolve_race,
+)
+from track_package import DEFAULT_TRACK_PATH, load_track  # noqa: E402
 
-# 아이템(트랩, 부스트) 마스크
-TRAP_MASK = pygame.mask.from_surface(TRAP)
-BOOST_MASK = pygame.mask.from_surface(BOOST)
+# RACING_TRACK 환경 변수에 트랙 폴더 경로를 지정하면 그 트랙에서 경기 (기본: tracks/default)
+TRACK_PATH = os.environ.get("RACING_TRACK", DEFAULT_TRACK_PATH)
+track = load_track(TRACK_PATH)
+if track.size != (WIDTH, HEIGHT):
+    WIN = pygame.display.set_mode(track.size)
 
 # 이미지 목록
-images = [
-    (GRASS, (0, 0)),
-    (TRACK, (0, 0)),
-    (FINISH, FINISH_POSITION),
-    (TRACK_BORDER, (0, 0)),
-]
-
-# 게임 정보, 플레이어/AI 차량 생성
-game_info = GameInfo()
-player_car = PlayerCar(max_vel=4, rotation_vel=6)
-ai_car = AICar(max_vel=4, rotation_vel=6, path=[(200, 200), (300, 300), (400, 200), (300, 100)])
-
-# 아이템(트랩, 부스트) 위치 생성
-BOOST_WIDTH, BOOST_HEIGHT = BOOST.get_width(), BOOST.get_height()
-TRAP_WIDTH, TRAP_HEIGHT = TRAP.get_width(), TRAP.get_height()
-
-traps = items.generate_random_positions(5, TRAP_WIDTH, TRAP_HEIGHT)
-boosts = items.generate_random_positions(5, BOOST_WIDTH, BOOST_HEIGHT)
-
+images = track.background_layers()
+renderer = DirtyRenderer(WIN, images, MAIN_FONT)
 
-def draw(win, images, player_car, ai_car, game_info, traps, boosts):
-    for img, pos in images:
-        win.blit(img, pos)
+# 주행 틱마다 1/FPS 초씩 진행하는 게임 시계와 시드 고정 난수 (같은 입력이면 RaceSim 으로 그대로 재현 가능)
+context = GameContext.simulated(random.randrange(2 ** 31))
+game_clock = context.clock
 
-    for trap_pos in traps:
-        win.blit(TRAP, trap_pos)
+# RACING_AI_POLICY 환경 변수에 정책 파일(.npz 또는 .onnx)을 지정하면 AI 차량을 학습한 정책으로 운전
+AI_POLICY_PATH = os.environ.get("RACING_AI_POLICY")
 
-    for boost_pos in boosts:
-        win.blit(BOOST, boost_pos)
+# RACING_RECORD 환경 변수에 파일 경로를 지정하면 경기를 리플레이로 기록 (python replay.py 경로 로 재생)
+# 리플레이는 중앙선을 따르는 AICar 로 다시 진행하므로 정책으로 운전하는 경기는 기록하지 않음
+RECORD_PATH = os.environ.get("RACING_RECORD")
+if RECORD_PATH and AI_POLICY_PATH:
+    print("RACING_RECORD is ignored: replays cannot reproduce RACING_AI_POLICY races")
+    RECORD_PATH = None
+recorder = ReplayRecorder(context.seed, trap_count=5, boost_count=5, track=TRACK_PATH) if RECORD_PATH else None
 
-    level_text = MAIN_FONT.render(f"Level {game_info.level}", 1, (255, 255, 255))
-    win.blit(level_text, (WIDTH - level_text.get_width() - 10, 10))
+# RACING_PROFILE 환경 변수에 파일 경로를 지정하면 단계별 프레임 시간을 측정해 화면에 표시하고 종료 시 저장
+# (.json 이면 Chrome trace, 아니면 CSV, F3: 오버레이 켜기/끄기)
+PROFILE_PATH = os.environ.get("RACING_PROFILE")
+profiler = FrameProfiler(enabled=bool(PROFILE_PATH))
 
-    time_text = MAIN_FONT.render(f"Time: {game_info.get_level_time()}s", 1, (255, 255, 255))
-    win.blit(time_text, (WIDTH - time_text.get_width() - 10, 50))
-
-    vel_text = MAIN_FONT.render(f"Vel: {round(player_car.vel, 1)}px/s", 1, (255, 255, 255))
-    win.blit(vel_text, (WIDTH - vel_text.get_width() - 10, 90))
-
-    player_car.draw(win)
-    ai_car.draw(win)
-    pygame.display.update()
+# 게임 정보, 플레이어/AI 차량 생성
+lap_tracker = LapTracker(track.racing_line, clock=game_clock)
+game_info = GameInfo(clock=game_clock, lap_tracker=lap_tracker)
+player_car = PlayerCar(max_vel=4, rotation_vel=6, clock=game_clock)
+if AI_POLICY_PATH:
+    from neural_driver import PolicyBatcher, load_policy
+    ai_car = PolicyBatcher(load_policy(AI_POLICY_PATH)).make_car(
+        4, 6, clock=game_clock, racing_line=track.racing_line, track=track,
+    )
+else:
+    ai_car = AICar(max_vel=4, rotation_vel=6, clock=game_clock, racing_line=track.racing_line)
+race = RaceManager([player_car, ai_car], lap_tracker, track)
+
+# 레벨 시작/결과 화면 흐름 (화면 없는 dummy 드라이버면 배너 없이 바로 진행)
+flow = GameFlow(game_info, headless=os.environ.get("SDL_VIDEODRIVER") == "dummy")
+
+# 아이템(트랩, 부스트) 생성
+item_manager = create_item_manager(rng=context.rng, track=track)
+if recorder:
+    recorder.watch(item_manager)
+item_manager.spawn("trap", 5)
+item_manager.spawn("boost", 5)
+
+
+def draw(win, images, player_car, cars, game_info, item_manager):
+    # 배경(images)은 renderer 가 미리 합성해 두었으므로 움직이는 요소만 전달
+    sprites = item_manager.sprites()
+    overlay = profiler.overlay_sprite()
+    if overlay:
+        sprites.append(overlay)
+    hud_lines = [
+        f"Level {game_info.level}",
+        f"Time: {game_info.get_level_time()}s",
+        f"Vel: {round(player_car.vel, 1)}px/s",
+        f"Lap: {round(lap_tracker.lap_fraction(player_car) * 100)}%",
+    ]
+    if lap_tracker.state(player_car).wrong_way:
+        hud_lines.append("Wrong way!")
+    renderer.draw(cars, sprites, hud_lines, flow.banner())
 
 
 def move_player(player_car):
     keys = pygame.key.get_pressed()
-    moved = False
+    action = 0
 
     if keys[pygame.K_a]:
-        player_car.rotate(left=True)
+        action |= ACTION_LEFT
     if keys[pygame.K_d]:
-        player_car.rotate(right=True)
+        action |= ACTION_RIGHT
     if keys[pygame.K_w]:
-        moved = True
-        player_car.move_forward()
+        action |= ACTION_FORWARD
     if keys[pygame.K_s]:
-        moved = True
-        player_car.move_backward()
-
-    if not moved:
-        player_car.reduce_speed()
-
-
-def handle_collision(car, game_info, opponent_car=None):
-    # 트랙 경계 충돌 처리
-    if car.collide(TRACK_BORDER_MASK):
-        car.bounce()
-    else:
-        # 결승선 충돌 확인
-        finish_poi = car.collide(FINISH_MASK, *FINISH_POSITION)
-        if finish_poi:
-            if not game_info.is_ready_for_finish(car):
-                car.bounce()
-                return
-
-            # 플레이어 차일 경우
-            if car is player_car:
-                if game_info.level < game_info.LEVELS:
-                    game_info.next_level()
-                    car.reset()
-                    if opponent_car:
-                        opponent_car.reset()
-                else:
-                    blit_text_center(WIN, MAIN_FONT, "You won against AI!!")
-                    pygame.display.update()
-                    pygame.time.wait(5000)
-                    game_info.reset()
-                    car.reset()
-                    if opponent_car:
-                        opponent_car.reset()
-            else:
-                # AI 차량이 결승선 통과 시
-                blit_text_center(WIN, MAIN_FONT, "AI Wins!")
-                pygame.display.update()
-                pygame.time.wait(5000)
-                game_info.reset()
-                car.reset()
-                if opponent_car:
-                    opponent_car.reset()
+        action |= ACTION_BACKWARD
+
+    apply_action(player_car, action)
+    return action
+
 
-    # 플레이어와 AI 간 충돌
-    if opponent_car:
-        if car.collide(opponent_car.border_mask, opponent_car.x, opponent_car.y):
-            car.bounce()
-            opponent_car.bounce()
+def handle_collision(race, game_info):
+    result, _ = resolve_race(race, game_info, player_car)
 
-    # 마지막 위치 업데이트
-    car.last_position = (car.x, car.y)
+    if result == PLAYER_WON:
+        flow.show_result("You won against AI!!")
+    elif result == AI_WON:
+        # AI 차량이 결승선 통과 시
+        flow.show_result("AI Wins!")
 
 
 def main():
@@ -169,70 +129,66 @@ def main():
     clock = pygame.time.Clock()
 
     while run:
-        clock.tick(FPS)
+        # 대기/결과 화면에서는 프레임 수를 낮춰 CPU 사용을 줄임
+        clock.tick(flow.frame_rate(FPS))
+        profiler.begin_frame()
 
-        # 레벨 시작 전 대기
-        while not game_info.started:
-            blit_text_center(WIN, MAIN_FONT, f"Press any key to start level {game_info.level}!")
-            pygame.display.update()
+        # 이벤트 처리
+        with profiler.phase("events"):
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     run = False
-                    pygame.quit()
-                    return
+                    break
                 if event.type == pygame.KEYDOWN:
-                    game_info.start_level()
-
-        # 아이템 효과 해제 체크
-        if time.time() >= player_car.effect_end_time:
-            player_car.clear_effect()
+                    if event.key == pygame.K_F3:
+                        profiler.show_overlay = not profiler.show_overlay
+                        continue
+                    flow.on_key()
+
+            # 카운트다운/결과 표시 시간 경과 처리
+            flow.update()
+
+        if flow.racing:
+            game_clock.advance()
+
+            # 아이템 효과 해제 체크
+            race.clear_effects()
+
+            # 플레이어 이동, AI 이동
+            with profiler.phase("input"):
+                action = move_player(player_car)
+                if recorder:
+                    recorder.record(action)
+            with profiler.phase("ai"):
+                for car in race.cars:
+                    if car is not player_car:
+                        car.move()
+            with profiler.phase("progress"):
+                race.update_progress()
+
+            # 트랩/부스트 충돌 (모든 차량)
+            with profiler.phase("items"):
+                item_manager.pick_up(race.cars)
+
+            # 충돌 처리
+            with profiler.phase("collision"):
+                handle_collision(race, game_info)
+
+            # 레벨/게임 종료 체크
+            if game_info.game_finished():
+                flow.show_result("You won the game!")
+                game_info.reset()
+                race.reset()
 
         # 화면 그리기
-        draw(WIN, images, player_car, ai_car, game_info, traps, boosts)
-
-        # 이벤트 처리
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                run = False
-                break
-
-        # 플레이어 이동, AI 이동
-        move_player(player_car)
-        ai_car.move()
-
-        # 트랩 충돌
-        for trap_pos in traps:
-            if player_car.collide(pygame.mask.from_surface(TRAP), *trap_pos):
-                traps.remove(trap_pos)
-                new_trap = items.generate_random_positions(1, TRAP_WIDTH, TRAP_HEIGHT)
-                if new_trap:
-                    traps.append(new_trap[0])
-                player_car.apply_effect("trap")
-                break
-
-        # 부스트 충돌
-        for boost_pos in boosts:
-            if player_car.collide(pygame.mask.from_surface(BOOST), *boost_pos):
-                boosts.remove(boost_pos)
-                new_boost = items.generate_random_positions(1, BOOST_WIDTH, BOOST_HEIGHT)
-                if new_boost:
-                    boosts.append(new_boost[0])
-                player_car.apply_effect("boost")
-                break
-
-        # 충돌 처리
-        handle_collision(player_car, game_info, opponent_car=ai_car)
-        handle_collision(ai_car, game_info, opponent_car=player_car)
-
-        # 레벨/게임 종료 체크
-        if game_info.game_finished():
-            blit_text_center(WIN, MAIN_FONT, "You won the game!")
-            pygame.display.update()
-            pygame.time.wait(5000)
-            game_info.reset()
-            player_car.reset()
-            ai_car.reset()
-
+        with profiler.phase("draw"):
+            draw(WIN, images, player_car, race.cars, game_info, item_manager)
+        profiler.end_frame()
+
+    if recorder:
+        recorder.save(RECORD_PATH)
+    if PROFILE_PATH:
+        profiler.export(PROFILE_PATH)
     pygame.quit()
 
 if __name__ == "__main__":
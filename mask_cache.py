@@ -0,0 +1,53 @@
+"""
+마스크 파생 데이터 디스크 캐시
+
+마스크 내용으로 만든 해시를 키로 마스크에서 계산한 배열(거리장, 중앙선 등)을 .npy 파일로 저장해 두고,
+다음 실행이나 작업 프로세스 생성 시에는 다시 계산하지 않고 읽어 온다.
+캐시 폴더는 RACING_CACHE_DIR 환경 변수로 바꿀 수 있다.
+"""
+import hashlib
+import os
+
+import numpy as np
+import pygame
+
+CACHE_DIR = os.environ.get("RACING_CACHE_DIR", os.path.join(".cache", "masks"))
+CACHE_VERSION = 2  # 캐시하는 데이터의 계산 방식이 바뀌면 올려서 기존 캐시 무효화
+
+
+def mask_key(tag, mask):
+    """
+    마스크 내용으로 캐시 키 생성 (마스크에서 계산하는 거리장 등 파생 데이터용)
+    :param tag: 데이터 종류 (예: "distance-field")
+    :param mask: pygame.Mask
+    """
+    surface = mask.to_surface(setcolor=(1, 1, 1, 255), unsetcolor=(0, 0, 0, 255))
+    digest = hashlib.sha1(f"{CACHE_VERSION}:{tag}:{mask.get_size()}:".encode())
+    digest.update(pygame.image.tobytes(surface, "RGBA")[0::4])
+    return f"{tag}-{digest.hexdigest()}"
+
+
+def load_or_build_array(key, builder):
+    """
+    캐시에 있으면 읽고, 없으면 builder() 로 만든 뒤 .npy 파일로 저장
+    캐시 폴더에 쓸 수 없으면 저장 없이 만든 배열을 그대로 반환한다.
+    :param key: mask_key 로 만든 키
+    :param builder: 배열을 만드는 인자 없는 함수
+    :return: numpy.ndarray
+    """
+    path = os.path.join(CACHE_DIR, key + ".npy")
+    if os.path.exists(path):
+        try:
+            return np.load(path)
+        except (OSError, ValueError):
+            pass  # 손상된 캐시는 다시 생성
+
+    array = builder()
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+        np.save(tmp_path, array)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+    return array
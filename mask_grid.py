@@ -0,0 +1,72 @@
+"""
+pygame.Mask 와 NumPy 배열 간 변환 도구
+배열은 항상 (높이, 너비) 순서의 bool 배열로, grid[y, x] 로 접근한다.
+"""
+import numpy as np
+import pygame
+
+
+def mask_to_array(mask):
+    """
+    마스크를 bool 배열로 변환
+    :param mask: pygame.Mask
+    :return: (높이, 너비) bool 배열
+    """
+    surface = mask.to_surface(setcolor=(255, 255, 255, 255), unsetcolor=(0, 0, 0, 255))
+    return pygame.surfarray.array_red(surface).T > 0
+
+
+def array_to_mask(grid):
+    """
+    mask_to_array 의 반대 변환
+    :param grid: (높이, 너비) bool 배열
+    :return: pygame.Mask
+    """
+    height, width = grid.shape
+    surface = pygame.image.frombuffer(np.ascontiguousarray(grid, dtype=np.uint8).tobytes(), (width, height), "P")
+    surface.set_colorkey(0)
+    return pygame.mask.from_surface(surface)
+
+
+def mask_points(mask):
+    """
+    마스크에서 값이 1인 픽셀 좌표 목록
+    :param mask: pygame.Mask
+    :return: (개수, 2) int 배열, 각 행은 (x, y)
+    """
+    ys, xs = np.nonzero(mask_to_array(mask))
+    return np.stack([xs, ys], axis=1)
+
+
+def place_mask(mask, size, position):
+    """
+    마스크를 지정한 크기의 빈 배열 위 position(좌상단)에 배치
+    :param mask: pygame.Mask
+    :param size: 전체 배열 크기 (너비, 높이)
+    :param position: 마스크 좌상단 좌표 (x, y)
+    :return: (높이, 너비) bool 배열
+    """
+    width, height = size
+    grid = np.zeros((height, width), dtype=bool)
+    src = mask_to_array(mask)
+    x, y = position
+
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + src.shape[1], width), min(y + src.shape[0], height)
+    if x0 < x1 and y0 < y1:
+        grid[y0:y1, x0:x1] = src[y0 - y:y1 - y, x0 - x:x1 - x]
+    return grid
+
+
+def sample_grid(grid, xs, ys):
+    """
+    여러 좌표에서 grid 값을 한 번에 조회 (범위 밖은 False)
+    :param grid: (높이, 너비) bool 배열
+    :param xs: x 좌표 int 배열
+    :param ys: y 좌표 int 배열 (xs 와 같은 shape)
+    :return: xs 와 같은 shape 의 bool 배열
+    """
+    height, width = grid.shape
+    inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+    values = grid[np.clip(ys, 0, height - 1), np.clip(xs, 0, width - 1)]
+    return values & inside
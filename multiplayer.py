@@ -0,0 +1,723 @@
+"""
+네트워크 멀티플레이 서버/클라이언트 (asyncio)
+
+서버가 경기 상태를 결정한다 (authoritative). 방(RaceRoom)마다 PlayerCar, GameInfo, 아이템을 가지고 있고,
+태스크 하나가 모든 방을 고정 틱 간격으로 진행한 다음 접속한 클라이언트마다 이진 상태 스냅샷을 보낸다.
+스냅샷에는 클라이언트가 마지막으로 받았다고 알려 준(ack) 틱의 스냅샷과 비교해 바뀐 값만 담는다 (delta 압축).
+같은 틱을 기준으로 하는 클라이언트끼리는 인코딩 결과를 함께 쓰므로, 방 하나의 틱 비용은 참가자 수가 아니라
+서로 다른 기준 틱의 수만큼 늘어난다. 보내지 못한 데이터가 쌓인 느린 클라이언트는 그 틱 스냅샷을 건너뛴다.
+기준이 항상 클라이언트가 받은 스냅샷이므로, 건너뛰어도 다음 스냅샷을 그대로 풀 수 있다.
+
+클라이언트(RaceClient)는 자기 차량을 입력 즉시 로컬에서 예측해 움직인다 (apply_action + 트랙 경계 충돌).
+스냅샷이 오면 서버가 마지막으로 처리한 입력 번호(ack) 시점의 서버 상태로 되돌리고,
+서버가 아직 처리하지 않은 입력을 다시 적용한다 (reconcile).
+입력이 늦어 서버가 마지막 행동을 대신 적용한 틱(held)이 있으면, 서버는 입력이 한꺼번에 도착했을 때
+이미 지나간 틱의 입력을 그만큼 건너뛰어 따라잡는다 (가장 최근 입력은 항상 한 번은 적용).
+예측 차량은 서버 틱과 같은 시계(SimClock)로 움직여 아이템 효과도 서버와 같은 틱에 끝난다.
+차량 간 충돌, 아이템, 결승선처럼 예측하지 않는 결과는 이때 서버 상태로 바로잡힌다.
+
+메시지 (TCP, little-endian, FRAME(본문 길이, 종류) + 본문):
+    JOIN      클라이언트 -> 서버  방 이름 (utf-8)
+    WELCOME   서버 -> 클라이언트  WELCOME_HEAD + 트랙 폴더 경로 (utf-8)
+    INPUT     클라이언트 -> 서버  INPUT_BODY (입력 번호, 마지막으로 받은 스냅샷 틱, 행동 비트마스크)
+    SNAPSHOT  서버 -> 클라이언트  SNAPSHOT_HEAD + 사라진 차량 슬롯 + 차량 delta + 사라진 아이템 id + 새 아이템
+    ERROR     서버 -> 클라이언트  오류 메시지 (utf-8, 방이 가득 찬 경우 등) 후 연결 종료
+
+차량 delta 는 CAR_HEAD(슬롯, 바뀐 필드 비트마스크) 뒤에 바뀐 필드 값만 CAR_FIELDS 순서대로 담는다 (고정소수점 정수).
+효과 목록이 바뀌었으면 그 뒤에 효과 수(B)와 EFFECT(종료 시간, 종류) 목록을 붙인다.
+아이템은 생긴 뒤 움직이지 않으므로 사라진 id 와 새로 생긴 아이템만 보낸다.
+
+사용 예:
+    python multiplayer.py serve --port 7777                  # 서버
+    python multiplayer.py play --host 127.0.0.1 --room lobby # 창을 띄워 접속 (W/A/S/D)
+    python multiplayer.py loopback --rooms 16 --players 4    # 한 프로세스에서 서버 + 봇 클라이언트로 시험
+"""
+import asyncio
+import math
+import time
+from collections import deque, namedtuple
+import struct
+
+from cars import EFFECT_CODES, EFFECT_NAMES, PlayerCar
+from game_clock import GameContext, SimClock
+from game_info import GameInfo
+from lap_tracker import LapTracker
+from race_manager import RaceManager
+from settings import FPS
+from simulation import DEFAULT_TRACK, apply_action, create_item_manager, resolve_race
+from track_package import load_track
+
+PORT = 7777
+PROTOCOL_VERSION = 2
+ROOM_SIZE = 8                 # 방 하나의 최대 참가자 수
+HISTORY = 64                  # delta 기준으로 보관하는 스냅샷 수 (틱), ack 가 이보다 오래되면 전체 스냅샷을 보냄
+MAX_QUEUED_INPUTS = 8         # 플레이어별로 쌓아 두는 입력 수 (넘치면 오래된 입력부터 버림)
+MAX_WRITE_BUFFER = 64 * 1024  # 보내지 못한 데이터가 이보다 많으면 이번 틱 스냅샷을 건너뜀 (바이트)
+MAX_LAG = 0.25                # 틱 루프가 이보다 밀리면 밀린 틱을 따라잡지 않고 현재 시각부터 다시 셈 (초)
+
+FRAME = struct.Struct("<HB")  # 본문 길이, 메시지 종류
+JOIN, WELCOME, INPUT, SNAPSHOT, ERROR = range(1, 6)
+
+WELCOME_HEAD = struct.Struct("<HBHff")  # 프로토콜 버전, 슬롯, 초당 틱 수, 최고 속도, 회전 속도
+INPUT_BODY = struct.Struct("<IIB")      # 입력 번호, 마지막으로 받은 스냅샷 틱, 행동
+# 틱, 기준 틱, 처리한 마지막 입력 번호, 끝난 경기 수, 마지막 우승 슬롯,
+# 바뀐 차량 수, 사라진 차량 수, 사라진 아이템 수, 새 아이템 수
+SNAPSHOT_HEAD = struct.Struct("<IIIHBBBHH")
+CAR_HEAD = struct.Struct("<BB")         # 슬롯, 바뀐 필드 비트마스크
+ITEM_ID = struct.Struct("<I")
+ITEM = struct.Struct("<IBhh")           # 아이템 id, 종류, x, y
+EFFECT_COUNT = struct.Struct("<B")
+EFFECT = struct.Struct("<dB")           # 효과 종료 시간 (서버 시계, 초), 종류 (cars.EFFECT_CODES)
+ITEM_KINDS = ("trap", "boost")
+NO_BASELINE = 0xFFFFFFFF                # 기준 없음 (전체 스냅샷)
+NO_WINNER = 0xFF
+
+# 차량 상태 필드 (이름, 형식), 값은 고정소수점 정수
+# 마지막 필드 effects 는 ((종료 시간, 종류 번호), ...) 가변 길이라 EFFECT_COUNT + EFFECT 목록으로 따로 담음
+CAR_FIELDS = (
+    ("x", "i"),        # 1/POS_SCALE 픽셀
+    ("y", "i"),
+    ("angle", "H"),    # 0~360 도, 1/ANGLE_SCALE 도
+    ("vel", "h"),      # 1/VEL_SCALE 픽셀/틱
+    ("max_vel", "h"),
+    ("effects", None),
+)
+POS_SCALE = 64
+ANGLE_SCALE = 100
+VEL_SCALE = 1000
+FIELD_MASK = (1 << len(CAR_FIELDS)) - 1
+FIXED_MASK = FIELD_MASK >> 1   # 고정 크기 필드 비트
+EFFECTS_BIT = 1 << (len(CAR_FIELDS) - 1)
+# 비트마스크 -> 바뀐 고정 크기 필드만 담는 구조체 (인코딩/디코딩할 때마다 형식 문자열을 만들지 않도록 미리 만듦)
+FIELD_STRUCTS = [
+    struct.Struct("<" + "".join(fmt for i, (_, fmt) in enumerate(CAR_FIELDS[:-1]) if mask >> i & 1))
+    for mask in range(FIXED_MASK + 1)
+]
+
+CarState = namedtuple("CarState", "x y angle vel max_vel effects")  # effects: ((종료 시간, 효과 종류), ...)
+Snapshot = namedtuple("Snapshot", "tick ack races winner cars items")  # cars: 슬롯 -> 정수 필드, items: id -> (종류, x, y)
+
+
+def quantize_car(car):
+    """차량 상태를 CAR_FIELDS 순서의 정수 튜플로"""
+    return (
+        round(car.x * POS_SCALE),
+        round(car.y * POS_SCALE),
+        round(car.angle % 360 * ANGLE_SCALE) % (360 * ANGLE_SCALE),
+        max(-32768, min(32767, round(car.vel * VEL_SCALE))),
+        max(-32768, min(32767, round(car.max_vel * VEL_SCALE))),
+        tuple(sorted((end_time, EFFECT_CODES[effect_type]) for end_time, effect_type in car.effect_end_times)),
+    )
+
+
+def car_state(values):
+    """quantize_car 결과를 CarState 로"""
+    x, y, angle, vel, max_vel, effects = values
+    return CarState(
+        x / POS_SCALE, y / POS_SCALE, angle / ANGLE_SCALE, vel / VEL_SCALE, max_vel / VEL_SCALE,
+        tuple((end_time, EFFECT_NAMES[code]) for end_time, code in effects),
+    )
+
+
+def encode_delta(cars, items, base_cars, base_items):
+    """
+    기준 스냅샷과 비교해 바뀐 부분만 인코딩
+    :param cars: 슬롯 -> quantize_car 결과
+    :param items: 아이템 id -> (종류 번호, x, y)
+    :param base_cars: 기준 스냅샷의 cars (전체 스냅샷이면 빈 dict)
+    :param base_items: 기준 스냅샷의 items
+    :return: ((바뀐 차량 수, 사라진 차량 수, 사라진 아이템 수, 새 아이템 수), 본문 바이트)
+    """
+    removed_cars = bytes(slot for slot in base_cars if slot not in cars)
+    car_parts = []
+    changed = 0
+    for slot, values in cars.items():
+        old = base_cars.get(slot)
+        if old is None:
+            mask = FIELD_MASK
+        else:
+            mask = 0
+            for i in range(len(values)):
+                if values[i] != old[i]:
+                    mask |= 1 << i
+            if not mask:
+                continue
+        changed += 1
+        car_parts.append(CAR_HEAD.pack(slot, mask))
+        car_parts.append(FIELD_STRUCTS[mask & FIXED_MASK].pack(
+            *[value for i, value in enumerate(values[:-1]) if mask >> i & 1]
+        ))
+        if mask & EFFECTS_BIT:
+            effects = values[-1]
+            car_parts.append(EFFECT_COUNT.pack(len(effects)) + b"".join(EFFECT.pack(*effect) for effect in effects))
+    removed_items = [ITEM_ID.pack(item_id) for item_id in base_items if item_id not in items]
+    added_items = [ITEM.pack(item_id, *item) for item_id, item in items.items() if item_id not in base_items]
+
+    counts = (changed, len(removed_cars), len(removed_items), len(added_items))
+    return counts, b"".join([removed_cars, *car_parts, *removed_items, *added_items])
+
+
+def decode_snapshot(data, baselines):
+    """
+    SNAPSHOT 본문 풀기
+    :param baselines: 틱 -> 이전에 받은 Snapshot (기준 스냅샷을 찾을 곳)
+    :return: Snapshot
+    """
+    tick, base_tick, ack, races, winner, car_count, removed_count, removed_items, added_items = \
+        SNAPSHOT_HEAD.unpack_from(data)
+    if base_tick == NO_BASELINE:
+        cars, items = {}, {}
+    else:
+        base = baselines[base_tick]
+        cars, items = dict(base.cars), dict(base.items)
+
+    offset = SNAPSHOT_HEAD.size
+    for slot in data[offset:offset + removed_count]:
+        cars.pop(slot, None)
+    offset += removed_count
+
+    for _ in range(car_count):
+        slot, mask = CAR_HEAD.unpack_from(data, offset)
+        offset += CAR_HEAD.size
+        fields = FIELD_STRUCTS[mask & FIXED_MASK]
+        changed = iter(fields.unpack_from(data, offset))
+        offset += fields.size
+        old = cars.get(slot) or (0,) * (len(CAR_FIELDS) - 1) + ((),)
+        values = [next(changed) if mask >> i & 1 else old[i] for i in range(len(CAR_FIELDS) - 1)]
+        effects = old[-1]
+        if mask & EFFECTS_BIT:
+            (count,) = EFFECT_COUNT.unpack_from(data, offset)
+            offset += EFFECT_COUNT.size
+            effects = tuple(EFFECT.unpack_from(data, offset + i * EFFECT.size) for i in range(count))
+            offset += count * EFFECT.size
+        cars[slot] = (*values, effects)
+
+    for _ in range(removed_items):
+        items.pop(ITEM_ID.unpack_from(data, offset)[0], None)
+        offset += ITEM_ID.size
+    for _ in range(added_items):
+        item_id, kind, x, y = ITEM.unpack_from(data, offset)
+        items[item_id] = (kind, x, y)
+        offset += ITEM.size
+
+    return Snapshot(tick, ack, races, None if winner == NO_WINNER else winner, cars, items)
+
+
+def prune_history(history, tick):
+    """
+    tick 기준으로 HISTORY 틱보다 오래된 스냅샷 삭제 (건너뛴 틱이 있어도 오래된 것은 모두)
+    :param history: 틱 -> 스냅샷 (틱이 늘어나는 순서로 넣은 dict)
+    """
+    oldest = tick - HISTORY
+    while history:
+        first = next(iter(history))
+        if first > oldest:
+            break
+        del history[first]
+
+
+async def read_message(reader):
+    """:return: (메시지 종류, 본문) 연결이 끊기면 asyncio.IncompleteReadError"""
+    size, kind = FRAME.unpack(await reader.readexactly(FRAME.size))
+    return kind, await reader.readexactly(size)
+
+
+def write_message(writer, kind, payload=b""):
+    writer.write(FRAME.pack(len(payload), kind) + payload)
+
+
+class RoomPlayer:
+    """방 참가자 (차량, 아직 처리하지 않은 입력, 받은 스냅샷 ack)"""
+
+    def __init__(self, slot, car, writer=None):
+        """
+        :param slot: 방 안의 참가자 번호 (스냅샷의 차량 슬롯)
+        :param writer: asyncio.StreamWriter (None 이면 스냅샷을 인코딩만 하고 보내지 않음, 벤치마크용)
+        """
+        self.slot = slot
+        self.car = car
+        self.writer = writer
+        self.inputs = deque()    # (입력 번호, 행동)
+        self.action = 0          # 입력이 밀리면 마지막 행동을 계속 적용
+        self.last_seq = 0        # 이 번호까지의 입력은 처리했거나 버렸음 (스냅샷 ack)
+        self.held = 0            # 입력이 없어 마지막 행동을 대신 적용한 뒤 아직 따라잡지 못한 틱 수
+        self.acked_tick = NO_BASELINE  # 클라이언트가 받은 마지막 스냅샷 틱 (delta 기준)
+
+    def push(self, seq, acked_tick, action):
+        """
+        도착한 입력을 순서대로 추가
+        쌓인 입력이 MAX_QUEUED_INPUTS 를 넘으면 가장 오래된 입력을 버리고 ack 를 넘겨서,
+        클라이언트도 버린 입력을 다시 적용하지 않게 한다.
+        """
+        self.acked_tick = acked_tick
+        self.inputs.append((seq, action))
+        if len(self.inputs) > MAX_QUEUED_INPUTS:
+            self.last_seq, _ = self.inputs.popleft()
+
+    def next_action(self):
+        """
+        이번 틱에 적용할 행동 (틱마다 입력 한 칸씩 소비, 입력이 없으면 마지막 행동을 대신 적용하고 held 증가)
+        held 틱이 남아 있고 뒤에 새 입력이 더 있으면, 맨 앞 입력은 이미 대신 채운 틱의 늦은 입력이므로 건너뛴다.
+        가장 최근 입력은 건너뛰지 않아 도착한 행동은 적어도 한 번 적용된다.
+        """
+        inputs = self.inputs
+        if not inputs:
+            self.held = min(self.held + 1, MAX_QUEUED_INPUTS)
+            return self.action
+        while self.held and len(inputs) > 1:
+            self.last_seq, _ = inputs.popleft()
+            self.held -= 1
+        self.last_seq, self.action = inputs.popleft()
+        return self.action
+
+    def backlog(self):
+        """아직 보내지 못한 바이트 수"""
+        return self.writer.transport.get_write_buffer_size() if self.writer is not None else 0
+
+    def send(self, kind, payload):
+        if self.writer is not None:
+            write_message(self.writer, kind, payload)
+
+
+class RaceRoom:
+    """서버의 경기 방 하나 (RaceSim 과 같은 규칙으로 진행, 모든 차량이 원격 플레이어)"""
+
+    def __init__(self, name, seed=None, track=None, trap_count=5, boost_count=5, max_vel=4, rotation_vel=6,
+                 dt=1 / FPS):
+        """
+        :param name: 방 이름 (클라이언트가 JOIN 에 보내는 이름)
+        :param track: 경기 트랙 (track_package.Track 또는 트랙 폴더 경로, None 이면 DEFAULT_TRACK)
+        """
+        self.name = name
+        self.max_vel = max_vel
+        self.rotation_vel = rotation_vel
+        self.context = GameContext.simulated(seed, dt)
+        self.clock = self.context.clock
+        self.track = DEFAULT_TRACK if track is None else load_track(track)
+        self.lap_tracker = LapTracker(self.track.racing_line, clock=self.clock)
+        self.game_info = GameInfo(clock=self.clock, lap_tracker=self.lap_tracker)
+        self.manager = RaceManager([], self.lap_tracker, self.track)
+        self.items = create_item_manager(trap_count, boost_count, rng=self.context.rng, track=self.track)
+        self.players = {}        # 슬롯 -> RoomPlayer
+        self.races = 0           # 끝난 경기 수
+        self.winner = None       # 마지막 경기 우승 슬롯
+        self._history = {}       # 틱 -> (cars, items) delta 기준 스냅샷
+
+        # 통계
+        self.tick_time = 0.0     # step + broadcast 누적 시간 (초)
+        self.snapshots_sent = 0
+        self.bytes_sent = 0
+
+    @property
+    def tick(self):
+        return self.clock.ticks
+
+    def join(self, writer=None):
+        """
+        참가자 추가 (빈 슬롯 중 가장 작은 번호, 출발 격자에서 출발)
+        :return: RoomPlayer
+        """
+        free = [slot for slot in range(ROOM_SIZE) if slot not in self.players]
+        if not free:
+            raise ValueError(f"room {self.name!r} is full")
+        car = PlayerCar(self.max_vel, self.rotation_vel, clock=self.clock)
+        self.manager.add_car(car)
+        player = self.players[free[0]] = RoomPlayer(free[0], car, writer)
+        return player
+
+    def leave(self, player):
+        del self.players[player.slot]
+        self.manager.remove_car(player.car)
+
+    def step(self):
+        """한 틱 진행 (RaceSim.step 과 같은 순서, 결승선을 먼저 통과한 차량이 우승하고 모두 출발 격자로)"""
+        if not self.game_info.started:
+            self.game_info.start_level()
+        self.clock.advance()
+
+        self.manager.clear_effects()
+        for player in self.players.values():
+            apply_action(player.car, player.next_action())
+        self.manager.update_progress()
+        self.items.pick_up(self.manager.cars)
+
+        result, car = resolve_race(self.manager, self.game_info)
+        if result:
+            self.races += 1
+            self.winner = next(slot for slot, player in self.players.items() if player.car is car)
+
+    def broadcast(self):
+        """참가자마다 각자 ack 한 틱을 기준으로 delta 스냅샷 전송"""
+        cars = {slot: quantize_car(player.car) for slot, player in self.players.items()}
+        items = {
+            item_id: (ITEM_KINDS.index(kind), *pos)
+            for item_id, (kind, pos, _, _) in self.items.get_state()[0].items()
+        }
+        self._history[self.tick] = (cars, items)
+        prune_history(self._history, self.tick)
+
+        winner = NO_WINNER if self.winner is None else self.winner
+        encoded = {}  # 기준 틱 -> encode_delta 결과 (같은 기준이면 한 번만 인코딩)
+        for player in self.players.values():
+            if player.backlog() > MAX_WRITE_BUFFER:
+                continue
+            base_tick = player.acked_tick if player.acked_tick in self._history else NO_BASELINE
+            delta = encoded.get(base_tick)
+            if delta is None:
+                base_cars, base_items = self._history.get(base_tick, ({}, {}))
+                delta = encoded[base_tick] = encode_delta(cars, items, base_cars, base_items)
+            counts, body = delta
+            payload = SNAPSHOT_HEAD.pack(
+                self.tick, base_tick, player.last_seq, self.races, winner, *counts,
+            ) + body
+            player.send(SNAPSHOT, payload)
+            self.snapshots_sent += 1
+            self.bytes_sent += FRAME.size + len(payload)
+
+    def update(self):
+        """step + broadcast (소요 시간을 통계에 더함)"""
+        start = time.perf_counter()
+        self.step()
+        self.broadcast()
+        self.tick_time += time.perf_counter() - start
+
+
+class RaceServer:
+    def __init__(self, host="127.0.0.1", port=PORT, tick_rate=FPS, track=None):
+        """
+        :param port: 0 이면 빈 포트를 골라 start 후 self.port 에 저장
+        :param tick_rate: 초당 틱 수 (모든 방 공통)
+        :param track: 새로 만드는 방의 트랙 (None 이면 DEFAULT_TRACK)
+        """
+        self.host = host
+        self.port = port
+        self.tick_rate = tick_rate
+        self.track = track
+        self.rooms = {}  # 방 이름 -> RaceRoom
+        self.ticks = 0
+        self.late_ticks = 0  # MAX_LAG 넘게 밀려 건너뛴 횟수
+        self._server = None
+        self._task = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._task = asyncio.create_task(self._tick_loop())
+
+    async def close(self):
+        self._task.cancel()
+        self._server.close()
+        await self._server.wait_closed()
+
+    def tick(self):
+        """모든 방 한 틱 진행 후 스냅샷 전송"""
+        for room in list(self.rooms.values()):
+            room.update()
+        self.ticks += 1
+
+    async def _tick_loop(self):
+        loop = asyncio.get_running_loop()
+        period = 1 / self.tick_rate
+        next_time = loop.time()
+        while True:
+            self.tick()
+            next_time += period
+            delay = next_time - loop.time()
+            if delay < -MAX_LAG:
+                self.late_ticks += 1
+                next_time = loop.time()
+            await asyncio.sleep(max(delay, 0))
+
+    async def _handle(self, reader, writer):
+        room = player = None
+        try:
+            kind, payload = await read_message(reader)
+            if kind != JOIN:
+                return
+            name = payload.decode()
+            room = self.rooms.get(name)
+            if room is None:
+                room = self.rooms[name] = RaceRoom(name, track=self.track, dt=1 / self.tick_rate)
+            try:
+                player = room.join(writer)
+            except ValueError as error:
+                write_message(writer, ERROR, str(error).encode())
+                return
+            write_message(writer, WELCOME, WELCOME_HEAD.pack(
+                PROTOCOL_VERSION, player.slot, self.tick_rate, room.max_vel, room.rotation_vel,
+            ) + room.track.path.encode())
+
+            while True:
+                kind, payload = await read_message(reader)
+                if kind == INPUT:
+                    player.push(*INPUT_BODY.unpack(payload))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass  # 연결 끊김
+        finally:
+            if player is not None:
+                room.leave(player)
+            if room is not None and not room.players and self.rooms.get(room.name) is room:
+                del self.rooms[room.name]
+            writer.close()
+
+    def stats(self):
+        """방별 평균 틱 비용과 스냅샷 크기"""
+        rooms = list(self.rooms.values())
+        ticks = sum(room.tick for room in rooms)
+        snapshots = sum(room.snapshots_sent for room in rooms)
+        return {
+            "rooms": len(rooms),
+            "players": sum(len(room.players) for room in rooms),
+            "room_tick_us": sum(room.tick_time for room in rooms) / max(ticks, 1) * 1e6,
+            "snapshot_bytes": sum(room.bytes_sent for room in rooms) / max(snapshots, 1),
+            "late_ticks": self.late_ticks,
+        }
+
+
+class RaceClient:
+    """
+    서버에 접속해 자기 차량을 예측 이동하고 스냅샷으로 바로잡는 클라이언트
+    connect() 후 틱마다 step(action) 을 부르면 된다 (서버와 같은 초당 틱 수로).
+    """
+
+    def __init__(self, room="lobby", host="127.0.0.1", port=PORT):
+        self.room = room
+        self.host = host
+        self.port = port
+        self.slot = None
+        self.tick_rate = FPS
+        self.track = None
+        self.car = None          # 예측 중인 자기 차량 (PlayerCar)
+        self.snapshot = None     # 마지막으로 받은 Snapshot
+        self.seq = 0             # 마지막으로 보낸 입력 번호
+        self.pending = deque()   # 서버가 아직 처리하지 않은 (입력 번호, 행동)
+        self.correction = 0.0    # 마지막 reconcile 에서 예측 위치가 바뀐 거리 (픽셀)
+        self.closed = False
+        self._baselines = {}     # 틱 -> Snapshot (delta 기준)
+        self._reader = self._writer = None
+        self._received = None
+        self._task = None
+
+    async def connect(self):
+        """접속해서 방에 들어가고 첫 스냅샷을 받을 때까지 기다림"""
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        write_message(self._writer, JOIN, self.room.encode())
+        kind, payload = await read_message(self._reader)
+        if kind != WELCOME:
+            raise ConnectionError(payload.decode() if kind == ERROR else f"unexpected message {kind}")
+        version, self.slot, self.tick_rate, max_vel, rotation_vel = WELCOME_HEAD.unpack_from(payload)
+        if version != PROTOCOL_VERSION:
+            raise ConnectionError(f"protocol version {version} != {PROTOCOL_VERSION}")
+        self.track = load_track(payload[WELCOME_HEAD.size:].decode())
+        self.car = PlayerCar(max_vel, rotation_vel, clock=SimClock(1 / self.tick_rate))
+
+        self._received = asyncio.Event()
+        self._task = asyncio.create_task(self._receive())
+        await self._received.wait()
+        if self.snapshot is None:
+            raise ConnectionError("connection closed before the first snapshot")
+
+    async def close(self):
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+        await self._task
+
+    def step(self, action):
+        """
+        행동을 서버에 보내고 자기 차량을 바로 예측 이동
+        :param action: ACTION_* 비트마스크
+        """
+        if self.closed:
+            return
+        self.seq += 1
+        self.pending.append((self.seq, action))
+        self._predict(action)
+        write_message(self._writer, INPUT, INPUT_BODY.pack(self.seq, self.snapshot.tick, action))
+
+    def _predict(self, action):
+        """서버 틱의 자기 차량 효과 만료 + 이동 + 트랙 경계 충돌 부분만 재현"""
+        car = self.car
+        car.clock.advance()
+        car.clear_effect()
+        apply_action(car, action)
+        car.border_contact = self.track.collider.resolve(car)
+
+    def remote_cars(self):
+        """다른 참가자 차량 {슬롯: CarState} (마지막 스냅샷 기준)"""
+        return {slot: car_state(values) for slot, values in self.snapshot.cars.items() if slot != self.slot}
+
+    async def _receive(self):
+        try:
+            while True:
+                kind, payload = await read_message(self._reader)
+                if kind == SNAPSHOT:
+                    self._reconcile(decode_snapshot(payload, self._baselines))
+                    self._received.set()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.closed = True
+            self._received.set()
+
+    def _reconcile(self, snapshot):
+        """서버가 처리한 입력까지의 서버 상태로 되돌리고, 처리되지 않은 입력을 다시 적용"""
+        first = self.snapshot is None
+        self.snapshot = snapshot
+        self._baselines[snapshot.tick] = snapshot
+        prune_history(self._baselines, snapshot.tick)
+
+        values = snapshot.cars.get(self.slot)
+        if values is None:
+            return
+        while self.pending and self.pending[0][0] <= snapshot.ack:
+            self.pending.popleft()
+
+        car = self.car
+        predicted = (car.x, car.y)
+        state = car_state(values)
+        car.clock.ticks = snapshot.tick
+        car.x, car.y, car.angle, car.vel, car.max_vel = state[:5]
+        car.effect_end_times = list(state.effects)  # 정렬된 목록이라 그대로 최소 힙
+        car.boost_stack = sum(1 for _, effect_type in state.effects if effect_type == "boost")
+        car.slow_stack = sum(1 for _, effect_type in state.effects if effect_type == "trap")
+        car.last_position = (car.x, car.y)
+        for _, action in self.pending:
+            self._predict(action)
+        # 첫 스냅샷은 예측이 아니라 출발 위치 지정이므로 보정 거리에서 뺌
+        self.correction = 0.0 if first else math.hypot(car.x - predicted[0], car.y - predicted[1])
+
+
+async def play(room, host, port):
+    """창을 띄워 접속 (W/A/S/D 로 운전, 다른 참가자는 파란 차량)"""
+    import pygame
+
+    from settings import WIDTH, HEIGHT
+    win = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption(f"Racing Game! - {room}")
+
+    from settings import BLUE_CAR_IMG, TRAP, BOOST
+    from simulation import ACTION_LEFT, ACTION_RIGHT, ACTION_FORWARD, ACTION_BACKWARD
+    from utils import blit_rotate_center
+
+    client = RaceClient(room, host, port)
+    await client.connect()
+    layers = client.track.background_layers()
+    item_images = (TRAP, BOOST)
+
+    loop = asyncio.get_running_loop()
+    period = 1 / client.tick_rate
+    next_time = loop.time()
+    while not client.closed:
+        if any(event.type == pygame.QUIT for event in pygame.event.get()):
+            break
+
+        keys = pygame.key.get_pressed()
+        action = 0
+        if keys[pygame.K_a]:
+            action |= ACTION_LEFT
+        if keys[pygame.K_d]:
+            action |= ACTION_RIGHT
+        if keys[pygame.K_w]:
+            action |= ACTION_FORWARD
+        if keys[pygame.K_s]:
+            action |= ACTION_BACKWARD
+        client.step(action)
+
+        for image, pos in layers:
+            win.blit(image, pos)
+        for kind, x, y in client.snapshot.items.values():
+            win.blit(item_images[kind], (x, y))
+        for state in client.remote_cars().values():
+            blit_rotate_center(win, BLUE_CAR_IMG, (state.x, state.y), state.angle)
+        client.car.draw(win)
+        pygame.display.update()
+
+        next_time += period
+        await asyncio.sleep(max(next_time - loop.time(), 0))
+    await client.close()
+
+
+async def loopback(rooms, players, seconds, tick_rate=FPS, seed=0):
+    """
+    한 프로세스에서 서버와 봇 클라이언트를 127.0.0.1 로 연결해 시험
+    봇은 전진하면서 무작위로 방향을 바꾼다.
+    :return: 서버 통계 + 클라이언트 보정 거리 통계
+    """
+    import random
+
+    from simulation import ACTION_LEFT, ACTION_RIGHT, ACTION_FORWARD
+
+    server = RaceServer(port=0, tick_rate=tick_rate)
+    await server.start()
+    clients = [RaceClient(f"room-{r}", port=server.port) for r in range(rooms) for _ in range(players)]
+    await asyncio.gather(*(client.connect() for client in clients))
+
+    rng = random.Random(seed)
+    steering = [0] * len(clients)
+    corrections = []
+    loop = asyncio.get_running_loop()
+    period = 1 / tick_rate
+    next_time = loop.time()
+    for _ in range(round(seconds * tick_rate)):
+        for i, client in enumerate(clients):
+            if rng.random() < 0.05:
+                steering[i] = rng.choice((0, ACTION_LEFT, ACTION_RIGHT))
+            client.step(ACTION_FORWARD | steering[i])
+            corrections.append(client.correction)
+        next_time += period
+        await asyncio.sleep(max(next_time - loop.time(), 0))
+
+    # 입력이 서버 경기에 실제로 반영됐는지 확인 (서버 차량이 출발 격자를 떠났는지)
+    cars = [player.car for room in server.rooms.values() for player in room.players.values()]
+    moved = sum(math.hypot(car.x - car.start_pos[0], car.y - car.start_pos[1]) > 1 for car in cars)
+    if not moved:
+        raise RuntimeError("no server car left the start grid: client inputs are not applied")
+
+    stats = server.stats()
+    stats["moved_cars"] = moved / len(cars)
+    stats["pending_inputs"] = sum(len(client.pending) for client in clients) / len(clients)
+    stats["mean_correction"] = sum(corrections) / len(corrections)
+    stats["max_correction"] = max(corrections)
+    await asyncio.gather(*(client.close() for client in clients))
+    await server.close()
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="레이싱 멀티플레이 서버/클라이언트")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="서버 실행")
+    serve_parser.add_argument("--host", default="0.0.0.0")
+    serve_parser.add_argument("--port", type=int, default=PORT)
+    serve_parser.add_argument("--tick-rate", type=int, default=FPS)
+    serve_parser.add_argument("--track", default=None, help="트랙 폴더 (기본: tracks/default)")
+    play_parser = commands.add_parser("play", help="창을 띄워 접속")
+    play_parser.add_argument("--host", default="127.0.0.1")
+    play_parser.add_argument("--port", type=int, default=PORT)
+    play_parser.add_argument("--room", default="lobby")
+    loopback_parser = commands.add_parser("loopback", help="서버 + 봇 클라이언트 시험")
+    loopback_parser.add_argument("--rooms", type=int, default=16)
+    loopback_parser.add_argument("--players", type=int, default=4)
+    loopback_parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        async def serve():
+            server = RaceServer(args.host, args.port, args.tick_rate, args.track)
+            await server.start()
+            print(f"listening on {args.host}:{server.port} ({args.tick_rate} ticks/s)")
+            while True:
+                await asyncio.sleep(10)
+                print(server.stats())
+
+        asyncio.run(serve())
+    elif args.command == "play":
+        asyncio.run(play(args.room, args.host, args.port))
+    else:
+        for key, value in asyncio.run(loopback(args.rooms, args.players, args.seconds)).items():
+            print(f"{key:16s} {value:.2f}" if isinstance(value, float) else f"{key:16s} {value}")
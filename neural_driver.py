@@ -0,0 +1,314 @@
+"""
+학습한 정책으로 AI 차량을 운전하는 배치 추론 드라이버
+
+AICar.move 는 차량마다 규칙 기반으로 운전한다. NeuralAICar 는 대신 PolicyBatcher 에 등록해 두고 행동을 받아 운전한다.
+한 틱에 행동이 남아 있지 않은 차량이 처음 움직이면 배처가 같은 프로세스의 모든 등록 차량(여러 경기에 걸쳐)의
+관측을 배열 하나로 모아 정책을 한 번만 실행하고 행동을 차량별로 나눠 준다. 차량마다 추론을 호출하지 않으므로
+코어당 달릴 수 있는 학습된 상대 차량 수가 정책 호출 비용이 아니라 배열 연산 비용으로 정해진다.
+배처는 차량을 약한 참조로만 들고 있으므로 경기를 버리면 그 차량은 다음 계산부터 빠진다.
+
+관측은 BatchRaceEnv.observe() 와 같은 (x, y, sin(각도), cos(각도), 속도, 최대 속도) 라서 RacingVectorEnv 로 학습한 정책을
+그대로 쓸 수 있고, rays 를 주면 광선 센서 거리 / max_range 를 뒤에 붙인다 (같은 트랙 차량끼리 한 번에 발사).
+행동은 플레이어와 같은 ACTION_* 비트마스크 (simulation.apply_action 규칙).
+
+정책:
+    MLPPolicy   NumPy 다층 퍼셉트론 (.npz 가중치 w0, b0, w1, b1, ...)
+    OnnxPolicy  onnxruntime CPU 세션 (.onnx, onnxruntime 이 설치된 경우)
+    load_policy 확장자로 둘 중 하나를 고름
+
+사용 예:
+    batcher = PolicyBatcher(load_policy("policy.npz"))
+    sims = [RaceSim(seed=i, ai_count=3, ai_driver=batcher) for i in range(64)]
+    for sim in sims:
+        sim.step(action)   # 모든 경기 AI 차량의 행동은 틱마다 정책 한 번으로 계산
+"""
+import os
+import time
+import weakref
+
+import numpy as np
+
+from cars import AbstractCar, AICar, PlayerCar
+from sensors import RaySensor
+from simulation import DEFAULT_TRACK, apply_action
+
+STATE_DIM = 6     # (x, y, sin(각도), cos(각도), 속도, 최대 속도)
+NUM_ACTIONS = 16  # W/A/S/D 조합 수 (MLPPolicy 출력층 크기)
+
+
+class MLPPolicy:
+    """tanh 은닉층 + 행동별 점수(logit) 출력층, 점수가 가장 큰 행동을 고름"""
+
+    def __init__(self, weights, biases):
+        """
+        :param weights: 층별 가중치 [(입력 크기, 출력 크기), ...], 마지막 층 출력 크기는 NUM_ACTIONS
+        :param biases: 층별 편향 [(출력 크기,), ...]
+        """
+        self.weights = [np.asarray(w, dtype=np.float32) for w in weights]
+        self.biases = [np.asarray(b, dtype=np.float32) for b in biases]
+        self.input_dim = self.weights[0].shape[0]
+
+    @classmethod
+    def random(cls, sizes, seed=None):
+        """
+        무작위 가중치로 만든 정책 (벤치마크/테스트용)
+        :param sizes: 층 크기 (입력, 은닉..., NUM_ACTIONS)
+        """
+        rng = np.random.default_rng(seed)
+        weights = [rng.normal(0, 1 / np.sqrt(n), (n, m)) for n, m in zip(sizes[:-1], sizes[1:])]
+        return cls(weights, [np.zeros(m) for m in sizes[1:]])
+
+    @classmethod
+    def load(cls, path):
+        """save 로 저장한 .npz 파일 읽기"""
+        with np.load(path) as data:
+            count = sum(1 for name in data.files if name.startswith("w"))
+            return cls([data[f"w{i}"] for i in range(count)], [data[f"b{i}"] for i in range(count)])
+
+    def save(self, path):
+        arrays = {}
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            arrays[f"w{i}"], arrays[f"b{i}"] = w, b
+        np.savez(path, **arrays)
+
+    def __call__(self, obs):
+        """
+        :param obs: (N, input_dim) float32 관측
+        :return: (N,) 행동
+        """
+        hidden = obs
+        for w, b in zip(self.weights[:-1], self.biases[:-1]):
+            hidden = np.tanh(hidden @ w + b)
+        return (hidden @ self.weights[-1] + self.biases[-1]).argmax(axis=1)
+
+
+class OnnxPolicy:
+    """onnxruntime CPU 세션 (출력이 (N, NUM_ACTIONS) 점수면 argmax, (N,) 이면 그대로 행동)"""
+
+    def __init__(self, path, threads=1):
+        """
+        :param path: .onnx 모델 파일 (입력 하나, 첫 번째 출력을 사용)
+        :param threads: 연산자 내부 스레드 수 (게임 루프와 같은 코어를 쓰므로 기본 1)
+        """
+        import onnxruntime  # 선택 의존성 (ONNX 모델을 쓸 때만 필요)
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_dim = model_input.shape[-1] if isinstance(model_input.shape[-1], int) else None
+
+    def __call__(self, obs):
+        output = self.session.run(None, {self.input_name: obs})[0]
+        return output.argmax(axis=1) if output.ndim == 2 else output.astype(np.int64)
+
+
+def _released():
+    """unregister 한 차량 자리의 참조 (사라진 차량처럼 None)"""
+    return None
+
+
+def load_policy(path, **kwargs):
+    """확장자가 .onnx 면 OnnxPolicy, 아니면 MLPPolicy (.npz)"""
+    if os.path.splitext(path)[1].lower() == ".onnx":
+        return OnnxPolicy(path, **kwargs)
+    return MLPPolicy.load(path)
+
+
+class PolicyBatcher:
+    def __init__(self, policy, rays=0, fov=180, max_range=200):
+        """
+        :param policy: policy(관측 (N, obs_dim) float32) -> 행동 (N,)
+        :param rays: 관측에 붙일 광선 센서 수 (0 이면 상태 벡터만)
+        :param fov: 광선이 퍼지는 각도 범위 (도)
+        :param max_range: 광선 최대 측정 거리 (관측에는 이 값으로 나눈 0~1 값)
+        """
+        self.policy = policy
+        self.rays = rays
+        self.fov = fov
+        self.max_range = max_range
+        self.obs_dim = STATE_DIM + rays
+        # 차량은 약한 참조로만 들고 있어서, 경기(RaceSim)를 버리면 그 차량도 다음 계산 전에 배열에서 빠진다
+        self._refs = []           # 등록 순서 = 관측/행동 배열의 행 순서 (차량 weakref)
+        self.tracks = []          # 차량별 트랙 (광선 센서용)
+        self._slots = weakref.WeakKeyDictionary()  # 차량 -> 행 번호
+        self._dead = False        # 사라지거나 등록 해제된 차량이 있어 행을 당겨야 하는지
+        self._sensors = {}        # 트랙 경로 -> RaySensor
+        self._obs = np.zeros((0, self.obs_dim), dtype=np.float32)
+        self._actions = np.zeros(0, dtype=np.int64)
+        self._pending = np.zeros(0, dtype=bool)  # 아직 소비하지 않은 행동이 있는 차량
+        self.forward_passes = 0
+
+    def __len__(self):
+        self._compact()
+        return len(self._refs)
+
+    @property
+    def cars(self):
+        """등록된 차량 목록 (행 순서)"""
+        self._compact()
+        return [ref() for ref in self._refs]
+
+    def register(self, car, track=None):
+        """
+        차량 등록 (관측/행동 배열은 두 배씩 늘려 등록마다 새로 할당하지 않음, 다른 차량의 남은 행동은 그대로)
+        :param track: 차량이 달리는 트랙 (광선 센서용, None 이면 기본 트랙)
+        """
+        self._compact()
+        index = len(self._refs)
+        if index == len(self._actions):
+            capacity = max(16, 2 * len(self._actions))
+            self._obs = np.resize(self._obs, (capacity, self.obs_dim))
+            self._actions = np.resize(self._actions, capacity)
+            self._pending = np.resize(self._pending, capacity)
+        self._pending[index] = False
+        self._refs.append(weakref.ref(car, self._collected))
+        self.tracks.append(track or DEFAULT_TRACK)
+        self._slots[car] = index
+
+    def unregister(self, car):
+        """차량 등록 해제 (차량을 버리면 자동으로 빠지므로 계속 쓸 차량을 뺄 때만 필요)"""
+        self._refs[self._slots.pop(car)] = _released
+        self._dead = True
+
+    def _collected(self, ref):
+        self._dead = True
+
+    def _compact(self):
+        """사라진 차량의 행을 지우고 남은 차량의 행동/대기 상태를 앞으로 당김"""
+        if not self._dead:
+            return
+        self._dead = False
+        keep = [i for i, ref in enumerate(self._refs) if ref() is not None]
+        count = len(keep)
+        self._actions[:count] = self._actions[keep]
+        self._pending[:count] = self._pending[keep]
+        self._pending[count:] = False
+        self._refs = [self._refs[i] for i in keep]
+        self.tracks = [self.tracks[i] for i in keep]
+        for index, ref in enumerate(self._refs):
+            self._slots[ref()] = index
+
+    def set_track(self, car, track):
+        self._compact()
+        self.tracks[self._slots[car]] = track
+
+    def discard(self, car):
+        """차량의 남은 행동 버리기 (reset 후 이전 상태로 계산한 행동을 쓰지 않도록)"""
+        self._compact()
+        index = self._slots.get(car)
+        if index is not None:
+            self._pending[index] = False
+
+    def observe(self, rows=None):
+        """
+        등록된 차량의 관측 (미리 할당한 배열에 씀)
+        :param rows: 관측할 행 번호 목록 (None 이면 모든 차량)
+        """
+        self._compact()
+        if rows is None:
+            rows = range(len(self._refs))
+        cars = [self._refs[i]() for i in rows]
+        tracks = [self.tracks[i] for i in rows]
+        obs = self._obs[:len(cars)]
+        state = np.array([(car.x, car.y, car.angle, car.vel, car.max_vel) for car in cars], dtype=np.float64)
+        state = state.reshape(len(cars), 5)
+        radians = np.radians(state[:, 2])
+        obs[:, 0] = state[:, 0]
+        obs[:, 1] = state[:, 1]
+        obs[:, 2] = np.sin(radians)
+        obs[:, 3] = np.cos(radians)
+        obs[:, 4] = state[:, 3]
+        obs[:, 5] = state[:, 4]
+
+        if self.rays:
+            half_w = np.array([car.img.get_width() / 2 for car in cars])
+            half_h = np.array([car.img.get_height() / 2 for car in cars])
+            by_track = {}
+            for i, track in enumerate(tracks):
+                by_track.setdefault(track, []).append(i)
+            for track, indices in by_track.items():
+                sensor = self._sensor(track)
+                indices = np.array(indices)
+                distances = sensor.cast(
+                    state[indices, 0] + half_w[indices], state[indices, 1] + half_h[indices], state[indices, 2]
+                )
+                obs[indices, STATE_DIM:] = distances / self.max_range
+        return obs
+
+    def _sensor(self, track):
+        sensor = self._sensors.get(track.path)
+        if sensor is None:
+            sensor = self._sensors[track.path] = RaySensor(
+                track.border_mask, num_rays=self.rays, fov=self.fov, max_range=self.max_range,
+            )
+        return sensor
+
+    def flush(self):
+        """모든 등록 차량의 행동을 정책 한 번으로 계산"""
+        self._compact()
+        self._run(np.arange(len(self._refs)))
+
+    def _run(self, rows):
+        """rows 행 차량의 행동만 정책 한 번으로 계산"""
+        if not len(rows):
+            return
+        self._actions[rows] = self.policy(self.observe(rows))
+        self._pending[rows] = True
+        self.forward_passes += 1
+
+    def action(self, car):
+        """
+        차량의 이번 틱 행동
+        남은 행동이 없으면 행동이 없는 차량만 모아 새로 계산한다 (틱 첫 호출이면 모든 차량,
+        reset 으로 행동을 버린 차량만 빠졌으면 그 차량만).
+        :return: ACTION_* 비트마스크
+        """
+        self._compact()
+        index = self._slots[car]
+        if not self._pending[index]:
+            self._run(np.flatnonzero(~self._pending[:len(self._refs)]))
+        self._pending[index] = False
+        return int(self._actions[index])
+
+    def make_car(self, max_vel, rotation_vel, clock, racing_line=None, track=None):
+        """RaceSim(ai_driver=...) 이 AI 차량을 만들 때 호출"""
+        car = NeuralAICar(max_vel, rotation_vel, self, clock=clock, racing_line=racing_line)
+        self.register(car, track)
+        return car
+
+
+class NeuralAICar(AICar):
+    """PolicyBatcher 가 정한 행동으로 운전하는 AI 차량 (물리 규칙은 플레이어 차량과 같음)"""
+    __slots__ = ("driver", "_applying", "__weakref__")  # PolicyBatcher 가 약한 참조로 들고 있음
+
+    def __init__(self, max_vel, rotation_vel, driver, clock=time.time, racing_line=None):
+        """
+        :param driver: PolicyBatcher (등록은 호출한 쪽에서, make_car 를 쓰면 자동)
+        :param racing_line: 트랙 교체 시 RaceSim.set_track 이 바꿔 끼우는 중앙선 (운전에는 쓰지 않음)
+        """
+        super().__init__(max_vel, rotation_vel, clock=clock, racing_line=racing_line)
+        self.driver = driver
+        self._applying = False
+
+    # 행동이 없으면 플레이어처럼 감속
+    reduce_speed = PlayerCar.reduce_speed
+
+    def reset(self):
+        super().reset()
+        self.driver.discard(self)
+
+    def move(self):
+        """
+        RaceSim 이 틱마다 부르는 운전 함수 (배처가 정한 행동을 apply_action 으로 적용)
+        apply_action 안의 move_forward/move_backward/reduce_speed 가 다시 부르면 물리 이동만 한다.
+        """
+        if self._applying:
+            AbstractCar.move(self)
+            return
+        self._applying = True
+        try:
+            apply_action(self, self.driver.action(self))
+        finally:
+            self._applying = False
@@ -0,0 +1,296 @@
+"""
+픽셀 입력 에이전트용 저해상도 관측 렌더러 (창/화면 없이 NumPy 로만 그림)
+
+DirtyRenderer 로 화면 전체를 그린 뒤 줄이는 대신, 트랙/경계/결승선 레이어를 관측 해상도로 한 번 줄여 두고
+차량 중심에서 진행 방향이 위쪽이 되도록 회전한 size x size 영역(ego-centric crop)을 레이어에서 바로 샘플링한다.
+아이템과 차량은 마스크에서 미리 뽑아 둔 점들을 회전/이동해 관측 버퍼에 찍는다.
+
+N개 경기를 배열 연산으로 한 번에 그리고, 결과는 미리 할당한 (N, 채널, size, size) uint8 버퍼(obs)에 덮어쓴다.
+작업용 배열도 처음 한 번만 만들어 재사용하므로 프레임마다 이미지 크기의 배열을 새로 할당하지 않는다.
+
+사용 예:
+    renderer = ObservationRenderer(num_envs=256)
+    obs = renderer.render_batch(batch_env)   # (256, 6, 84, 84)
+    obs = ObservationRenderer(grayscale=True).render_sims([sim])   # (1, 1, 84, 84)
+"""
+import math
+
+import numpy as np
+import pygame
+
+from mask_grid import mask_to_array
+from settings import RED_CAR_IMG, TRAP_MASK, BOOST_MASK
+from track_package import DEFAULT_TRACK_PATH, load_track
+
+OBS_SIZE = 84     # 관측 한 변 크기 (픽셀)
+VIEW_SIZE = 252   # 관측 한 변이 덮는 트랙 크기 (픽셀)
+
+# 채널 순서 (grayscale 이면 이 순서대로 겹쳐 그린 한 채널)
+CHANNELS = ("track", "border", "finish", "boost", "trap", "cars")
+STATIC_CHANNELS = ("track", "border", "finish")
+GRAY_LEVELS = {"track": 96, "border": 255, "finish": 160, "boost": 224, "trap": 32, "cars": 192}
+OUTSIDE = {"border": 255}  # 트랙 이미지 바깥을 샘플링했을 때 채널 값 (경계로 취급)
+
+ITEM_MASKS = {"boost": BOOST_MASK, "trap": TRAP_MASK}
+FAR_AWAY = -1e6  # 경기마다 개수가 다른 아이템/차량을 채울 때 쓰는 화면 밖 좌표
+
+
+def downsample(grid, scale):
+    """
+    bool 격자를 scale 배로 줄이며 면적 평균 (0 ~ 255)
+    :param grid: (높이, 너비) bool 배열
+    :return: (ceil(높이 * scale), ceil(너비 * scale)) uint8 배열
+    """
+    height, width = grid.shape
+    surface = pygame.surfarray.make_surface(np.repeat((grid.T * 255).astype(np.uint8)[:, :, None], 3, axis=2))
+    size = (math.ceil(width * scale), math.ceil(height * scale))
+    return pygame.surfarray.array_red(pygame.transform.smoothscale(surface, size)).T.copy()
+
+
+def sprite_points(mask, spacing):
+    """
+    마스크 안쪽을 spacing 간격으로 뽑은 점들의 이미지 중심 기준 좌표
+    :return: (점 수, 2) float 배열, 각 행은 (x, y)
+    """
+    grid = mask_to_array(mask)
+    height, width = grid.shape
+    ys, xs = np.mgrid[spacing / 2:height:spacing, spacing / 2:width:spacing]
+    inside = grid[ys.astype(np.int64), xs.astype(np.int64)]
+    return np.stack([xs[inside] - width / 2, ys[inside] - height / 2], axis=1)
+
+
+def _pad_rows(rows, width):
+    """
+    경기마다 길이가 다른 목록을 (N, 최대 길이, width) 배열로 (빈 자리는 FAR_AWAY)
+    :param rows: 경기별 [(값, ...), ...] 목록
+    """
+    array = np.full((len(rows), max(map(len, rows), default=0), width), FAR_AWAY)
+    for i, row in enumerate(rows):
+        if row:
+            array[i, :len(row)] = row
+    return array
+
+
+class ObservationRenderer:
+    def __init__(self, num_envs=1, size=OBS_SIZE, view=VIEW_SIZE, channels=CHANNELS, grayscale=False,
+                 car_image=RED_CAR_IMG, track=DEFAULT_TRACK_PATH):
+        """
+        :param num_envs: 한 번에 그릴 경기 수
+        :param size: 관측 한 변 크기 (픽셀)
+        :param view: 관측 한 변이 덮는 트랙 크기 (픽셀)
+        :param channels: 사용할 채널 (CHANNELS 중 일부, 순서 유지)
+        :param grayscale: True 면 채널을 GRAY_LEVELS 밝기로 겹친 한 채널
+        :param car_image: 차량 모양 (기준 차량 중심 계산과 차량 채널에 사용)
+        :param track: 트랙 (track_package.Track 또는 트랙 폴더 경로)
+        """
+        self.num_envs = num_envs
+        self.size = size
+        self.scale = size / view  # 트랙 1픽셀당 관측 픽셀
+        self.channels = [name for name in CHANNELS if name in channels]
+        self.grayscale = grayscale
+        self.car_half = (car_image.get_width() / 2, car_image.get_height() / 2)
+        self._track_layers = {}  # 트랙 경로 -> (정적 레이어, 레이어 높이, 레이어 너비)
+        self.set_track(track)
+
+        # 아이템/차량 모양 점 (관측 픽셀 반 칸 간격이면 회전해도 빈틈이 생기지 않음)
+        spacing = 0.5 / self.scale
+        self.points = {kind: sprite_points(mask, spacing) for kind, mask in ITEM_MASKS.items()}
+        self.points["cars"] = sprite_points(pygame.mask.from_surface(car_image), spacing)
+        self.item_half = {kind: (mask.get_size()[0] / 2, mask.get_size()[1] / 2) for kind, mask in ITEM_MASKS.items()}
+
+        # 관측 버퍼 (마지막 한 칸은 화면 밖 점을 버리는 자리)
+        num_channels = 1 if grayscale else len(self.channels)
+        self._storage = np.zeros(num_envs * num_channels * size * size + 1, dtype=np.uint8)
+        self.obs = self._storage[:-1].reshape(num_envs, num_channels, size, size)
+        self._discard = len(self._storage) - 1
+
+        # 관측 픽셀 중심의 관측 중심 기준 좌표
+        offsets = (np.arange(size) + 0.5 - size / 2).astype(np.float32)
+        self._grid_u = np.broadcast_to(offsets[None, None, :], (1, size, size))
+        self._grid_v = np.broadcast_to(offsets[None, :, None], (1, size, size))
+        self._work = {}
+
+    def set_track(self, track):
+        """
+        관측할 트랙 교체 (트랙별로 줄인 정적 레이어는 처음 한 번만 만들어 보관)
+        :param track: track_package.Track 또는 트랙 폴더 경로
+        """
+        self.track = load_track(track)
+        cached = self._track_layers.get(self.track.path)
+        if cached is None:
+            cached = self._track_layers[self.track.path] = self._build_layers(self.track)
+        self.static_layers, self.layer_height, self.layer_width = cached
+
+    def _build_layers(self, track):
+        """정적 레이어: 관측 해상도로 줄인 뒤 바깥을 1픽셀 덧대서, 좌표를 잘라내면 바깥 값이 샘플링되도록 함"""
+        grids = {"track": track.drivable_grid, "border": track.border_grid, "finish": track.finish_grid}
+        layers = {name: downsample(grids[name], self.scale) for name in STATIC_CHANNELS if name in self.channels}
+        if self.grayscale:
+            gray = np.zeros(next(iter(layers.values())).shape)
+            for name, layer in layers.items():
+                alpha = layer / 255
+                gray = gray * (1 - alpha) + GRAY_LEVELS[name] * alpha
+            layers = {"gray": np.pad(gray.astype(np.uint8), 1, constant_values=GRAY_LEVELS["border"])}
+        else:
+            layers = {name: np.pad(layer, 1, constant_values=OUTSIDE.get(name, 0)) for name, layer in layers.items()}
+        layer_height, layer_width = next(iter(layers.values())).shape
+        static_layers = [
+            (0 if self.grayscale else self.channels.index(name), layer.ravel()) for name, layer in layers.items()
+        ]
+        return static_layers, layer_height, layer_width
+
+    def _buffer(self, name, shape, dtype=np.float64):
+        """이름별 작업용 배열 (shape 가 바뀔 때만 새로 할당)"""
+        buffer = self._work.get(name)
+        if buffer is None or buffer.shape != shape:
+            buffer = self._work[name] = np.empty(shape, dtype=dtype)
+        return buffer
+
+    def render(self, x, y, angle, items=None, cars=None):
+        """
+        N개 경기의 관측을 obs 버퍼에 그림
+        :param x: 기준 차량 좌상단 x 좌표 (N,)
+        :param y: 기준 차량 좌상단 y 좌표 (N,)
+        :param angle: 기준 차량 각도 (N,) (AbstractCar.angle 과 같은 기준, 도)
+        :param items: {"boost": (N, K, 2), "trap": (N, K, 2)} 아이템 좌상단 좌표
+        :param cars: (N, M, 3) 차량 (좌상단 x, 좌상단 y, 각도), 기준 차량 포함 가능
+        :return: obs 버퍼 (N, 채널, size, size) uint8 (다음 render 호출 때 덮어씀)
+        """
+        radians = np.radians(np.asarray(angle, dtype=np.float64))
+        cos, sin = np.cos(radians), np.sin(radians)
+        center_x = np.asarray(x, dtype=np.float64) + self.car_half[0]
+        center_y = np.asarray(y, dtype=np.float64) + self.car_half[1]
+
+        self._sample_static(center_x, center_y, cos, sin)
+
+        if not self.grayscale:
+            for name in ("boost", "trap", "cars"):
+                if name in self.channels:
+                    self.obs[:, self.channels.index(name)] = 0
+        for kind in ("boost", "trap"):
+            if items is not None and kind in items and kind in self.channels:
+                positions = np.asarray(items[kind], dtype=np.float64)
+                half = self.item_half[kind]
+                self._stamp(kind, kind, positions[..., 0] + half[0], positions[..., 1] + half[1], None,
+                            center_x, center_y, cos, sin)
+        if cars is not None and "cars" in self.channels:
+            cars = np.asarray(cars, dtype=np.float64)
+            self._stamp("cars", "cars", cars[..., 0] + self.car_half[0], cars[..., 1] + self.car_half[1],
+                        np.radians(cars[..., 2]), center_x, center_y, cos, sin)
+        return self.obs
+
+    def _sample_static(self, center_x, center_y, cos, sin):
+        """
+        진행 방향이 위쪽이 되도록 회전한 관측 픽셀 좌표로 정적 레이어를 샘플링
+        관측 오른쪽 = (cos, -sin), 관측 아래쪽 = 진행 반대 방향 = (sin, cos)
+        """
+        shape = (len(center_x), self.size, self.size)
+        fx, fy = self._buffer("fx", shape, np.float32), self._buffer("fy", shape, np.float32)
+        tmp = self._buffer("tmp", shape, np.float32)
+        index, iy = self._buffer("index", shape, np.intp), self._buffer("iy", shape, np.intp)
+        cos = cos.astype(np.float32)[:, None, None]
+        sin = sin.astype(np.float32)[:, None, None]
+
+        # 레이어 좌표 (덧댄 1픽셀 포함)
+        np.multiply(self._grid_u, cos, out=fx)
+        np.multiply(self._grid_v, sin, out=tmp)
+        fx += tmp
+        fx += (center_x * self.scale + 1).astype(np.float32)[:, None, None]
+        np.multiply(self._grid_v, cos, out=fy)
+        np.multiply(self._grid_u, sin, out=tmp)
+        fy -= tmp
+        fy += (center_y * self.scale + 1).astype(np.float32)[:, None, None]
+
+        # 범위를 자른 뒤 정수로 내림 (0 미만은 모두 덧댄 픽셀 0 으로)
+        np.clip(fx, 0, self.layer_width - 1, out=fx)
+        np.clip(fy, 0, self.layer_height - 1, out=fy)
+        np.copyto(index, fx, casting="unsafe")
+        np.copyto(iy, fy, casting="unsafe")
+        iy *= self.layer_width
+        index += iy
+
+        for channel, layer in self.static_layers:
+            np.take(layer, index, out=self.obs[:, channel], mode="clip")  # 이미 범위 안 (clip 이 검사 없이 가장 빠름)
+
+    def _stamp(self, name, kind, sprite_x, sprite_y, sprite_angle, center_x, center_y, cos, sin):
+        """
+        모양 점들을 회전/이동해 관측 버퍼에 찍음
+        :param kind: 모양 점 종류 (self.points 의 키)
+        :param sprite_x: 그릴 물체 중심 x 좌표 (N, K)
+        :param sprite_y: 그릴 물체 중심 y 좌표 (N, K)
+        :param sprite_angle: 물체 회전 각도 (N, K) 라디안, None 이면 회전 없음
+        """
+        points = self.points[kind]
+        num_envs, count = sprite_x.shape
+        shape = (num_envs, count, len(points))
+        u, v, tmp = self._buffer(f"{name}_u", shape), self._buffer(f"{name}_v", shape), self._buffer(f"{name}_t", shape)
+        index, iv = self._buffer(f"{name}_i", shape, np.int64), self._buffer(f"{name}_iv", shape, np.int64)
+        outside, flag = self._buffer(f"{name}_o", shape, bool), self._buffer(f"{name}_f", shape, bool)
+
+        # 물체 중심의 관측 좌표
+        dx, dy = sprite_x - center_x[:, None], sprite_y - center_y[:, None]
+        half = self.size / 2
+        center_u = half + self.scale * (dx * cos[:, None] - dy * sin[:, None])
+        center_v = half + self.scale * (dx * sin[:, None] + dy * cos[:, None])
+
+        # 기준 차량에 대한 물체의 상대 회전
+        ego_angle = np.arctan2(sin, cos)[:, None]
+        if sprite_angle is None:
+            relative = np.broadcast_to(-ego_angle, (num_envs, count))
+        else:
+            relative = sprite_angle - ego_angle
+        rel_cos = (np.cos(relative) * self.scale)[:, :, None]
+        rel_sin = (np.sin(relative) * self.scale)[:, :, None]
+        px, py = points[:, 0], points[:, 1]
+
+        # u = 중심 + px cos + py sin, v = 중심 - px sin + py cos (관측 픽셀 단위)
+        np.multiply(rel_cos, px, out=u)
+        np.multiply(rel_sin, py, out=tmp)
+        u += tmp
+        u += center_u[:, :, None]
+        np.multiply(rel_cos, py, out=v)
+        np.multiply(rel_sin, px, out=tmp)
+        v -= tmp
+        v += center_v[:, :, None]
+
+        np.floor(u, out=u)
+        np.floor(v, out=v)
+        np.less(u, 0, out=outside)
+        outside |= np.greater_equal(u, self.size, out=flag)
+        outside |= np.less(v, 0, out=flag)
+        outside |= np.greater_equal(v, self.size, out=flag)
+        np.clip(u, 0, self.size - 1, out=u)
+        np.clip(v, 0, self.size - 1, out=v)
+        np.copyto(index, u, casting="unsafe")
+        np.copyto(iv, v, casting="unsafe")
+
+        # 버퍼 위치 = ((경기 * 채널 수 + 채널) * size + v) * size + u, 관측 밖의 점은 버리는 자리로
+        num_channels = self.obs.shape[1]
+        channel = 0 if self.grayscale else self.channels.index(name)
+        iv *= self.size
+        index += iv
+        index += ((np.arange(num_envs) * num_channels + channel) * self.size * self.size)[:, None, None]
+        np.copyto(index, self._discard, where=outside)
+
+        np.put(self._storage, index, GRAY_LEVELS[name] if self.grayscale else 255)
+
+    def render_sims(self, sims):
+        """
+        RaceSim 목록의 플레이어 차량 기준 관측
+        :param sims: simulation.RaceSim 목록 (num_envs 개)
+        """
+        players = [sim.player_car for sim in sims]
+        items = {kind: _pad_rows([sim.items.positions(kind) for sim in sims], 2) for kind in ("boost", "trap")}
+        # 경기마다 차량 수가 다를 수 있으므로 가장 많은 수에 맞추고 빈 자리는 화면 밖에 둠
+        cars = _pad_rows([[(car.x, car.y, car.angle) for car in sim.manager.cars] for sim in sims], 3)
+        return self.render(
+            [car.x for car in players], [car.y for car in players], [car.angle for car in players], items, cars,
+        )
+
+    def render_batch(self, env):
+        """
+        BatchRaceEnv 의 모든 경기 관측
+        :param env: batch_env.BatchRaceEnv 객체 (num_envs 개)
+        """
+        cars = np.stack([env.x, env.y, env.angle], axis=1)[:, None, :]
+        return self.render(env.x, env.y, env.angle, {"boost": env.boosts, "trap": env.traps}, cars)
@@ -0,0 +1,187 @@
+"""
+메인 루프 단계별 프레임 프로파일러
+
+프레임을 단계(이벤트, 입력, AI, 아이템, 충돌, 그리기 등)로 나눠 perf_counter 로 시간을 재고,
+최근 window 프레임의 단계별 p50/p95/p99 와 프레임 예산(1/FPS)을 넘긴 프레임 수를 보여준다.
+측정 기록은 CSV 나 Chrome trace(JSON, chrome://tracing 또는 Perfetto 에서 열기)로 내보낼 수 있다.
+enabled=False 면 모든 호출이 아무 일도 하지 않는다.
+
+사용 예:
+    profiler = FrameProfiler()
+    profiler.begin_frame()
+    with profiler.phase("draw"):
+        ...
+    profiler.end_frame()
+    profiler.export("trace.json")
+"""
+import contextlib
+import csv
+import json
+import time
+from collections import deque
+
+import pygame
+
+from settings import FPS
+
+FRAME = "frame"           # 프레임 전체 시간의 이름
+OVERLAY_REFRESH = 30      # 오버레이를 다시 그리는 간격 (프레임)
+OVERLAY_COLOR = (255, 255, 0)
+OVERLAY_BACKGROUND = (0, 0, 0, 160)
+
+_NULL_PHASE = contextlib.nullcontext()
+
+
+def percentile(sorted_values, p):
+    """정렬된 값 목록의 p 백분위수 (nearest-rank)"""
+    if not sorted_values:
+        return 0.0
+    index = min(max(int(round(p / 100 * len(sorted_values))) - 1, 0), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class _Phase:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._record(self.name, self.start, time.perf_counter())
+
+
+class FrameProfiler:
+    def __init__(self, enabled=True, budget=1 / FPS, window=600, max_events=200000):
+        """
+        :param enabled: False 면 측정하지 않음
+        :param budget: 프레임 예산 (초), 프레임 시간이 이보다 길면 놓친 프레임으로 셈
+        :param window: 백분위수를 계산할 최근 프레임 수
+        :param max_events: 내보내기용으로 보관할 최대 측정 기록 수 (오래된 것부터 버림)
+        """
+        self.enabled = enabled
+        self.budget = budget
+        self.window = window
+        self.frames = 0
+        self.missed_frames = 0
+        self.show_overlay = True
+
+        self._origin = time.perf_counter()
+        self._frame_start = None
+        self._phases = {}                          # 이름 -> _Phase (재사용)
+        self._durations = {}                       # 이름 -> 최근 window 개 소요 시간 (ms)
+        self._missed = deque(maxlen=window)        # 최근 프레임별 예산 초과 여부
+        self._events = deque(maxlen=max_events)    # (프레임 번호, 이름, 시작 시각, 소요 시간) (초)
+        self._overlay = None
+        self._font = None
+
+    def phase(self, name):
+        """with 문으로 감싼 구간의 시간을 name 단계로 기록"""
+        if not self.enabled:
+            return _NULL_PHASE
+        phase = self._phases.get(name)
+        if phase is None:
+            phase = self._phases[name] = _Phase(self, name)
+        return phase
+
+    def begin_frame(self):
+        if self.enabled:
+            self._frame_start = time.perf_counter()
+
+    def end_frame(self):
+        if not self.enabled or self._frame_start is None:
+            return
+        end = time.perf_counter()
+        self._record(FRAME, self._frame_start, end)
+        missed = end - self._frame_start > self.budget
+        self.missed_frames += missed
+        self._missed.append(missed)
+        self.frames += 1
+        self._frame_start = None
+
+    def _record(self, name, start, end):
+        durations = self._durations.get(name)
+        if durations is None:
+            durations = self._durations[name] = deque(maxlen=self.window)
+        durations.append((end - start) * 1000)
+        self._events.append((self.frames, name, start - self._origin, end - start))
+
+    def phase_names(self):
+        """기록된 단계 이름 (처음 기록된 순서, frame 은 제외)"""
+        return [name for name in self._durations if name != FRAME]
+
+    def stats(self, name=FRAME):
+        """
+        최근 window 프레임의 단계별 통계
+        :return: {"p50", "p95", "p99", "max"} (ms)
+        """
+        values = sorted(self._durations.get(name, ()))
+        return {
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+            "max": values[-1] if values else 0.0,
+        }
+
+    def overlay_lines(self):
+        frame = self.stats()
+        lines = [
+            f"{'frame':10s} {frame['p50']:6.2f} {frame['p95']:6.2f} {frame['p99']:6.2f} ms",
+            f"missed {sum(self._missed)}/{len(self._missed)} (total {self.missed_frames})",
+        ]
+        for name in self.phase_names():
+            stats = self.stats(name)
+            lines.append(f"{name:10s} {stats['p50']:6.2f} {stats['p95']:6.2f} {stats['p99']:6.2f}")
+        return lines
+
+    def overlay_sprite(self, position=(10, 10)):
+        """
+        단계별 p50/p95/p99 오버레이 (렌더러 sprites 목록에 넣을 (Surface, 좌표))
+        OVERLAY_REFRESH 프레임마다 한 번만 다시 렌더링한다.
+        :return: (Surface, 좌표), 비활성 상태면 None
+        """
+        if not (self.enabled and self.show_overlay):
+            return None
+        if self._overlay is None or self.frames % OVERLAY_REFRESH == 0:
+            if self._font is None:
+                self._font = pygame.font.SysFont("monospace", 14)
+            lines = [self._font.render(line, True, OVERLAY_COLOR) for line in self.overlay_lines()]
+            line_height = self._font.get_linesize()
+            width = max(line.get_width() for line in lines) + 8
+            surface = pygame.Surface((width, line_height * len(lines) + 8), pygame.SRCALPHA)
+            surface.fill(OVERLAY_BACKGROUND)
+            for i, line in enumerate(lines):
+                surface.blit(line, (4, 4 + i * line_height))
+            self._overlay = surface
+        return self._overlay, position
+
+    def export_csv(self, path):
+        """측정 기록을 CSV 로 저장 (frame, phase, start_ms, duration_ms)"""
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "phase", "start_ms", "duration_ms"])
+            for frame, name, start, duration in self._events:
+                writer.writerow([frame, name, f"{start * 1000:.4f}", f"{duration * 1000:.4f}"])
+
+    def export_chrome_trace(self, path):
+        """측정 기록을 Chrome trace 이벤트 형식(JSON)으로 저장"""
+        events = [
+            {"name": name, "cat": "frame" if name == FRAME else "phase", "ph": "X", "pid": 1,
+             "tid": 0 if name == FRAME else 1, "ts": start * 1e6, "dur": duration * 1e6,
+             "args": {"frame": frame}}
+            for frame, name, start, duration in self._events
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def export(self, path):
+        """확장자가 .json 이면 Chrome trace, 아니면 CSV 로 저장"""
+        if path.endswith(".json"):
+            self.export_chrome_trace(path)
+        else:
+            self.export_csv(path)
@@ -0,0 +1,116 @@
+"""
+여러 대의 차량이 함께 달리는 경기 관리자
+
+차량 목록과 출발 격자를 관리하고, 진행 거리 갱신과 차량 간 충돌을 한 번에 처리한다.
+트랙 경계/결승선 충돌은 simulation.resolve_race 가 이 관리자를 받아 처리한다.
+차량 간 충돌은 회전 마스크 경계 상자를 x 좌표로 정렬해 훑는 sweep-and-prune 으로 후보 쌍을 고른 뒤
+(broad phase), 후보 쌍만 Mask.overlap 으로 정밀 검사한다 (narrow phase).
+각 쌍은 한 번만 검사하고, 충돌한 차량은 한 틱에 한 번만 튕긴다.
+"""
+
+
+class RaceManager:
+    def __init__(self, cars, lap_tracker, track):
+        """
+        :param cars: 경기에 참가하는 차량 목록 (출발 격자 순서)
+        :param lap_tracker: lap_tracker.LapTracker (None 이 아니면 차량별 진행 거리도 관리)
+        :param track: track_package.Track (출발 격자와 출발 각도를 트랙 목록에서 읽음)
+        """
+        self.cars = list(cars)
+        self.lap_tracker = lap_tracker
+        self.track = track
+        self.assign_grid()
+        self.reset()
+
+    def set_track(self, track):
+        """트랙 교체 후 모든 차량을 새 출발 격자로 되돌림"""
+        self.track = track
+        self.assign_grid()
+        self.reset()
+
+    def assign_grid(self):
+        """차량마다 출발 격자 칸을 출발 위치(start_pos), 출발 각도(start_angle)로 지정"""
+        for car, pos in zip(self.cars, self.track.start_grid(len(self.cars))):
+            car.start_pos = pos
+            car.start_angle = self.track.start_angle
+
+    def add_car(self, car):
+        self.cars.append(car)
+        self.assign_grid()
+        car.reset()
+        self._reset_progress(car)
+
+    def remove_car(self, car):
+        """경기에서 차량을 빼고 남은 차량의 출발 격자 칸을 다시 지정 (달리던 차량 위치는 그대로)"""
+        self.cars.remove(car)
+        self.assign_grid()
+        if self.lap_tracker is not None:
+            self.lap_tracker.remove(car)
+
+    def reset(self):
+        """모든 차량을 출발 격자로 되돌림"""
+        for car in self.cars:
+            car.reset()
+            self._reset_progress(car)
+
+    def _reset_progress(self, car):
+        if self.lap_tracker is not None:
+            self.lap_tracker.reset(car)
+
+    def clear_effects(self):
+        for car in self.cars:
+            car.clear_effect()
+
+    def update_progress(self):
+        """
+        모든 차량의 중앙선 진행 거리 갱신
+        :return: 차량별 이번 틱 진행 거리 목록 (lap_tracker 가 없으면 0)
+        """
+        if self.lap_tracker is None:
+            return [0.0] * len(self.cars)
+        return [self.lap_tracker.update(car) for car in self.cars]
+
+    def candidate_pairs(self):
+        """
+        경계 상자가 겹치는 차량 쌍 (sweep-and-prune)
+        :return: [((차량, 마스크, x, y), (차량, 마스크, x, y)), ...]
+        """
+        boxes = []
+        for index, car in enumerate(self.cars):
+            mask, x, y = car.rotated_mask()
+            width, height = mask.get_size()
+            boxes.append((x, x + width, y, y + height, index, mask))
+        boxes.sort()
+
+        pairs = []
+        active = []
+        for box in boxes:
+            left, _, top, bottom = box[:4]
+            active = [other for other in active if other[1] > left]
+            for other in active:
+                if other[2] < bottom and top < other[3]:
+                    pairs.append((other, box))
+            active.append(box)
+
+        return [
+            tuple((self.cars[b[4]], b[5], b[0], b[2]) for b in sorted(pair, key=lambda b: b[4]))
+            for pair in pairs
+        ]
+
+    def resolve_car_collisions(self):
+        """
+        후보 쌍을 마스크로 정밀 검사하고, 충돌한 차량을 한 번씩 튕김
+        :return: 충돌한 차량 쌍 목록
+        """
+        hits = []
+        for (car_a, mask_a, x_a, y_a), (car_b, mask_b, x_b, y_b) in self.candidate_pairs():
+            if mask_a.overlap(mask_b, (x_b - x_a, y_b - y_a)):
+                hits.append((car_a, car_b))
+
+        bounced = set()
+        for pair in hits:
+            for car in pair:
+                if car not in bounced:
+                    bounced.add(car)
+                    self.track.collider.bounce(car)  # 튕겨 나가는 이동도 경계 연속 충돌 검사
+        return hits
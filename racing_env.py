@@ -0,0 +1,198 @@
+"""
+Gymnasium 호환 레이싱 환경
+
+RacingEnv: RaceSim 한 경기(플레이어 차량 + AI 차량 + 트랩/부스트)를 gymnasium.Env 로 감싼다.
+RacingVectorEnv: BatchRaceEnv 의 N개 경기를 배열 연산으로 한 번에 진행하는 gymnasium.vector.VectorEnv.
+    경기마다 별도 프로세스/Env 객체를 두는 SyncVectorEnv, AsyncVectorEnv 와 달리 틱마다 Python 호출이 한 번뿐이다.
+    BatchRaceEnv 와 같이 경기마다 학습 대상 차량 1대만 달린다 (AI 차량 없음).
+
+행동은 두 환경 모두 W/A/S/D 비트마스크(ACTION_*, 0~15)이고,
+보상은 중앙선을 따라 나아간 거리, 트랙 경계 충돌, 트랩/부스트 획득, 경기 결과로 계산한다 (compute_reward).
+
+사용 예:
+    env = gymnasium.make("Racing-v0", render_mode="rgb_array")
+    envs = gymnasium.make_vec("Racing-v0", num_envs=256, vectorization_mode="vector_entry_point")
+"""
+import gymnasium as gym
+import numpy as np
+import pygame
+from gymnasium import spaces
+from gymnasium.vector import AutoresetMode, VectorEnv
+from gymnasium.vector.utils import batch_space
+
+from batch_env import BatchRaceEnv
+from obs_renderer import ObservationRenderer
+from renderer import DirtyRenderer
+from rollout import OBS_KEYS, OBS_DIM, PROGRESS_REWARD, WIN_REWARD, LOSE_REWARD
+from settings import MAIN_FONT, FPS, WIDTH, HEIGHT
+from simulation import RaceSim, PLAYER_WON, AI_WON
+from track_package import load_track
+
+NUM_ACTIONS = 16                          # W/A/S/D 조합 수
+BATCH_OBS_DIM = 6                         # BatchRaceEnv.observe() 의 열 수
+RENDER_SIZE = (WIDTH // 4, HEIGHT // 4)   # rgb_array 렌더링 크기 (가로, 세로)
+
+BORDER_PENALTY = 0.01   # 트랙 경계에 부딪힌 틱마다 받는 벌점
+BOOST_REWARD = 0.05     # 부스트를 먹었을 때 보상
+TRAP_PENALTY = 0.05     # 트랩을 밟았을 때 벌점
+
+
+def compute_reward(progress, border_hit, boosts, traps, won=0, lost=0):
+    """
+    한 틱의 보상 (스칼라와 numpy 배열 모두 사용 가능)
+    :param progress: 이번 틱에 중앙선을 따라 나아간 거리 (한 바퀴 = 1)
+    :param border_hit: 트랙 경계에 부딪혔는지
+    :param boosts: 먹은 부스트 수
+    :param traps: 밟은 트랩 수
+    :param won: 이겼는지
+    :param lost: 졌는지
+    """
+    return (
+        PROGRESS_REWARD * progress
+        - BORDER_PENALTY * border_hit
+        + BOOST_REWARD * boosts
+        - TRAP_PENALTY * traps
+        + WIN_REWARD * won
+        + LOSE_REWARD * lost
+    )
+
+
+class RacingEnv(gym.Env):
+    """
+    관측: rollout.OBS_KEYS 순서의 float32 벡터 (플레이어 x, y, 각도, 속도, 최대 속도, 첫 번째 AI x, y, 각도, 레벨)
+        obs_type="pixels" 면 ObservationRenderer 의 (채널, 84, 84) uint8 이미지
+    행동: ACTION_* 비트마스크 (Discrete(16))
+    종료: 플레이어 또는 AI 가 경기를 끝냄 (terminated), max_steps 틱 초과 (truncated)
+    트랙: tracks 를 주면 reset 마다 그중 하나를 무작위로 고르고, reset(options={"track": ...}) 로 지정할 수도 있다.
+    """
+    metadata = {"render_modes": ["rgb_array"], "render_fps": FPS}
+
+    def __init__(self, render_mode=None, render_size=RENDER_SIZE, max_steps=None,
+                 trap_count=5, boost_count=5, ai_count=1, max_vel=4, rotation_vel=6, obs_type="state", grayscale=False,
+                 tracks=None):
+        """
+        :param render_mode: None 또는 "rgb_array" (창을 열지 않고 화면을 render_size 로 줄인 배열 반환)
+        :param render_size: rgb_array 크기 (가로, 세로)
+        :param max_steps: 경기당 최대 틱 수 (None 이면 제한 없음)
+        :param obs_type: "state" (상태 벡터) 또는 "pixels" (플레이어 기준 저해상도 이미지)
+        :param grayscale: obs_type="pixels" 일 때 채널을 하나로 겹칠지
+        :param tracks: reset 마다 고를 트랙 목록 (track_package.Track 또는 트랙 폴더 경로, None 이면 기본 트랙만)
+        """
+        if obs_type not in ("state", "pixels"):
+            raise ValueError(f"unsupported obs_type: {obs_type}")
+        if render_mode is not None and render_mode not in self.metadata["render_modes"]:
+            raise ValueError(f"unsupported render_mode: {render_mode}")
+        self.render_mode = render_mode
+        self.render_size = render_size
+        self.max_steps = max_steps
+        self.tracks = [load_track(track) for track in tracks] if tracks else None
+        self.sim = RaceSim(
+            trap_count, boost_count, max_vel=max_vel, rotation_vel=rotation_vel, ai_count=ai_count,
+            track=self.tracks[0] if self.tracks else None,
+        )
+
+        self.obs_renderer = (
+            ObservationRenderer(grayscale=grayscale, track=self.sim.track) if obs_type == "pixels" else None
+        )
+        if self.obs_renderer is None:
+            self.observation_space = spaces.Box(-np.inf, np.inf, (OBS_DIM,), np.float32)
+        else:
+            self.observation_space = spaces.Box(0, 255, self.obs_renderer.obs.shape[1:], np.uint8)
+        self.action_space = spaces.Discrete(NUM_ACTIONS)
+        self._surface = None
+        self._renderer = None
+
+    def _obs(self, state):
+        if self.obs_renderer is not None:
+            return self.obs_renderer.render_sims([self.sim])[0].copy()
+        return np.array([state[key] for key in OBS_KEYS], dtype=np.float32)
+
+    def reset(self, *, seed=None, options=None):
+        super().reset(seed=seed)
+        track = (options or {}).get("track")
+        if track is None and self.tracks:
+            track = self.tracks[self.np_random.integers(len(self.tracks))]
+        if track is not None:
+            self._set_track(track)
+        return self._obs(self.sim.reset(seed)), {}
+
+    def _set_track(self, track):
+        self.sim.set_track(track)
+        if self.obs_renderer is not None:
+            self.obs_renderer.set_track(self.sim.track)
+        if self._renderer is not None:
+            self._renderer = None  # 배경이 바뀌므로 다음 render 에서 다시 만듦
+
+    def step(self, action):
+        state, done, info = self.sim.step(int(action))
+        player_items = [kind for is_player, kind in info["items"] if is_player]
+        reward = compute_reward(
+            info["progress"], info["border_hit"], player_items.count("boost"), player_items.count("trap"),
+            info["result"] == PLAYER_WON, info["result"] == AI_WON,
+        )
+        truncated = not done and self.max_steps is not None and self.sim.steps >= self.max_steps
+        return self._obs(state), float(reward), done, truncated, info
+
+    def render(self):
+        if self.render_mode != "rgb_array":
+            return None
+        if self._renderer is None:
+            self._surface = pygame.Surface(self.sim.track.size)
+            self._renderer = DirtyRenderer(
+                self._surface, self.sim.track.background_layers(), MAIN_FONT, update_display=False,
+            )
+        self._renderer.draw(self.sim.manager.cars, self.sim.items.sprites(), [])
+        frame = pygame.transform.smoothscale(self._surface, self.render_size)
+        return pygame.surfarray.array3d(frame).transpose(1, 0, 2)
+
+    def close(self):
+        self._surface = self._renderer = None
+
+
+class RacingVectorEnv(VectorEnv):
+    """
+    관측: BatchRaceEnv.observe() 의 (num_envs, 6) float32 배열 (x, y, sin(각도), cos(각도), 속도, 최대 속도)
+    행동: (num_envs,) ACTION_* 비트마스크 배열
+    끝난 경기는 같은 틱에 바로 초기화하고 마지막 관측을 info["final_obs"] (info["_final_obs"] 가 해당 경기) 에 넣는다.
+    """
+    metadata = {"autoreset_mode": AutoresetMode.SAME_STEP}
+
+    def __init__(self, num_envs, max_steps=None, trap_count=5, boost_count=5, max_vel=4, rotation_vel=6,
+                 seed=None, track=None):
+        """
+        :param track: 모든 경기의 트랙 (track_package.Track 또는 트랙 폴더 경로, None 이면 기본 트랙)
+        """
+        self.num_envs = num_envs
+        self.env = BatchRaceEnv(
+            num_envs, trap_count, boost_count, max_vel=max_vel, rotation_vel=rotation_vel,
+            max_steps=max_steps, auto_reset=True, seed=seed, track=track,
+        )
+
+        self.single_observation_space = spaces.Box(-np.inf, np.inf, (BATCH_OBS_DIM,), np.float32)
+        self.single_action_space = spaces.Discrete(NUM_ACTIONS)
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+        self.action_space = batch_space(self.single_action_space, num_envs)
+
+    def reset(self, *, seed=None, options=None):
+        if seed is not None:
+            self.env.rng = np.random.default_rng(seed)
+        return self.env.reset(), {}
+
+    def step(self, actions):
+        obs, _, info = self.env.step(actions)
+        terminated, truncated = info["finished"], info["truncated"]
+        rewards = compute_reward(
+            info["progress"], info["border_hit"], info["boost_hit"], info["trap_hit"], terminated,
+        )
+        ended = terminated | truncated
+        if ended.any():
+            info["final_obs"] = info.pop("terminal_obs")
+            info["_final_obs"] = ended
+        return obs, rewards, terminated, truncated, info
+
+
+gym.register(
+    id="Racing-v0",
+    entry_point="racing_env:RacingEnv",
+    vector_entry_point="racing_env:RacingVectorEnv",
+)
@@ -0,0 +1,276 @@
+"""
+트랙 중앙선(racing line) 추출과 진행 거리 지도
+
+1. 트랙 경계를 닫힘 연산(closing)으로 이어 붙여 경계선의 끊긴 틈(이웃 직선 구간 사이의 지름길)을 막은 뒤,
+   주행 가능 영역(트랙 이미지의 불투명 영역 - 트랙 경계)에서 결승선 바로 앞(진행 방향 쪽)을 출발점으로
+   결승선은 막아 둔 채 너비 우선 탐색(BFS)으로 트랙을 따라가는 측지 거리(geodesic distance)를 구한다.
+2. 같은 거리 구간에 속한 픽셀들은 트랙 단면이므로, 구간별 무게중심을 이으면 순서가 정해진 중앙선이 된다.
+3. 중앙선을 다듬고 일정 간격으로 다시 샘플링한 뒤, 각 픽셀에 중앙선 기준 진행 거리(arc length)를 기록한다.
+
+결과(중앙선 좌표 배열, 픽셀별 진행 거리 지도)는 디스크에 캐시되며,
+차량 위치의 진행 거리는 배열 한 번 조회, 중앙선 위치는 이진 탐색(O(log n))으로 구한다.
+직접 실행하면 캐시를 미리 만든다: python racing_line.py
+"""
+import bisect
+import math
+
+import numpy as np
+import pygame
+
+from mask_cache import load_or_build_array, mask_key
+from mask_grid import mask_to_array
+from sensors import distance_field_from_array
+
+BIN_SIZE = 4        # 측지 거리 구간 크기 (축소 격자 칸)
+DOWNSCALE = 2       # BFS 격자 축소 배율
+SPACING = 4.0       # 중앙선 점 간격 (픽셀)
+SMOOTHING = 7       # 중앙선 이동 평균 창 크기
+GAP_RADIUS = 34     # 경계에서 이만큼 떨어진 영역만 탐색 (이 값의 두 배보다 좁은 경계 틈은 막힘)
+FILL_STEPS = GAP_RADIUS + 16  # 탐색 영역 밖 픽셀로 진행 거리를 번지게 할 횟수
+INVALID = -1.0
+
+
+def drivable_mask(track_surface, border_mask):
+    """트랙 이미지의 불투명 영역에서 트랙 경계를 뺀 주행 가능 영역 (차선/출발선 포함)"""
+    mask = pygame.mask.from_surface(track_surface)
+    mask.erase(border_mask, (0, 0))
+    return mask
+
+
+def close_gaps(occupied, radius):
+    """닫힘 연산(radius 만큼 팽창 후 침식)으로 2 * radius 보다 좁은 틈을 메움"""
+    # 이미지 바깥도 경계로 취급해야 가장자리 경계가 침식 후 원래 두께로 돌아옴
+    padded = np.pad(occupied, radius, constant_values=True)
+    dilated = distance_field_from_array(padded, radius) < radius
+    closed = distance_field_from_array(~dilated, radius) >= radius
+    return closed[radius:-radius, radius:-radius]
+
+
+def geodesic_distance(free, seeds):
+    """
+    seeds 에서 free 영역 안으로만 퍼지는 8방향 BFS 거리
+    :param free: (높이, 너비) bool 배열, 지나갈 수 있는 칸
+    :param seeds: (높이, 너비) bool 배열, 거리 0 인 출발 칸
+    :return: (높이, 너비) int32 배열, 닿지 않은 칸은 -1
+    """
+    height, width = free.shape
+    # 가장자리 검사를 없애기 위해 한 칸씩 여백 추가
+    padded = np.zeros((height + 2, width + 2), dtype=bool)
+    padded[1:-1, 1:-1] = free
+    flat_free = padded.ravel()
+    stride = width + 2
+    offsets = np.array([-stride - 1, -stride, -stride + 1, -1, 1, stride - 1, stride, stride + 1])
+
+    distance = np.full(padded.size, -1, dtype=np.int32)
+    seed_grid = np.zeros_like(padded)
+    seed_grid[1:-1, 1:-1] = seeds & free
+    frontier = np.flatnonzero(seed_grid)
+    distance[frontier] = 0
+
+    step = 0
+    while frontier.size:
+        step += 1
+        neighbours = (frontier[:, None] + offsets[None, :]).ravel()
+        neighbours = neighbours[flat_free[neighbours] & (distance[neighbours] < 0)]
+        frontier = np.unique(neighbours)
+        distance[frontier] = step
+
+    return distance.reshape(padded.shape)[1:-1, 1:-1]
+
+
+def _smooth_loop(points, window):
+    """닫힌 곡선 점들을 원형 이동 평균으로 다듬기"""
+    if window <= 1 or len(points) <= window:
+        return points
+    half = window // 2
+    padded = np.concatenate([points[-half:], points, points[:half]])
+    kernel = np.ones(window) / window
+    return np.stack([np.convolve(padded[:, i], kernel, mode="valid") for i in range(2)], axis=1)
+
+
+def _arc_lengths(points, closed=True):
+    """점별 누적 거리와 (닫힌 곡선이면 마지막 점 -> 첫 점을 포함한) 전체 길이"""
+    segments = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    s = np.concatenate([[0.0], np.cumsum(segments)])
+    total = s[-1] + (np.linalg.norm(points[0] - points[-1]) if closed else 0.0)
+    return s, total
+
+
+def build_racing_line(track_surface, border_mask, finish_rect, direction):
+    """
+    중앙선과 진행 거리 지도 계산
+    :param track_surface: 트랙 이미지 (배율 적용된 Surface)
+    :param border_mask: 트랙 경계 마스크
+    :param finish_rect: 결승선 영역 (x, y, 너비, 높이)
+    :param direction: 출발 직후 진행 방향 (dx, dy), 각 성분은 -1, 0, 1
+    :return: (중앙선 좌표 (n, 2) float32, 진행 거리 지도 (높이, 너비) float32, 트랙 밖은 -1)
+    """
+    free_full = mask_to_array(drivable_mask(track_surface, border_mask))
+    height, width = free_full.shape
+
+    # 결승선을 막고, 결승선 바로 앞(진행 방향 쪽) 한 줄을 출발점으로 지정
+    x, y, rect_width, rect_height = finish_rect
+    blocked = np.zeros_like(free_full)
+    blocked[max(y, 0):y + rect_height, max(x, 0):x + rect_width] = True
+    seeds = np.zeros_like(free_full)
+    dx, dy = direction
+    # 출발선은 축소 격자 위에 오도록 DOWNSCALE 배수 좌표로 맞춤
+    if dx:
+        column = -(-(x + rect_width) // DOWNSCALE) * DOWNSCALE if dx > 0 else (x - 1) // DOWNSCALE * DOWNSCALE
+        seeds[max(y, 0):y + rect_height, column] = True
+    else:
+        row = -(-(y + rect_height) // DOWNSCALE) * DOWNSCALE if dy > 0 else (y - 1) // DOWNSCALE * DOWNSCALE
+        seeds[row, max(x, 0):x + rect_width] = True
+
+    # 틈을 막은 경계 밖 영역에서, 축소 격자로 BFS
+    free = (free_full & ~close_gaps(mask_to_array(border_mask), GAP_RADIUS) & ~blocked)[::DOWNSCALE, ::DOWNSCALE]
+    distance = geodesic_distance(free, seeds[::DOWNSCALE, ::DOWNSCALE])
+
+    # 거리 구간별 무게중심 -> 순서가 정해진 중앙선
+    ys, xs = np.nonzero(distance >= 0)
+    bins = distance[ys, xs] // BIN_SIZE
+    counts = np.bincount(bins)
+    valid = counts > 0
+    centers = np.stack([
+        np.bincount(bins, weights=xs)[valid] / counts[valid],
+        np.bincount(bins, weights=ys)[valid] / counts[valid],
+    ], axis=1) * DOWNSCALE + DOWNSCALE / 2
+    centers = _smooth_loop(centers, SMOOTHING)
+
+    # 일정 간격으로 다시 샘플링
+    s, total = _arc_lengths(centers)
+    samples = np.arange(0, s[-1], SPACING)
+    points = np.stack([np.interp(samples, s, centers[:, i]) for i in range(2)], axis=1)
+
+    # 픽셀별 진행 거리: 픽셀이 속한 구간 무게중심의 누적 거리를 구간 안에서 보간
+    bin_s = np.full(len(counts) + 1, s[-1])
+    bin_s[:len(counts)][valid] = s
+    bin_s[:len(counts)][~valid] = np.interp(np.flatnonzero(~valid), np.flatnonzero(valid), s)
+    small_progress = np.full(distance.shape, INVALID, dtype=np.float32)
+    fraction = (distance[ys, xs] % BIN_SIZE) / BIN_SIZE
+    small_progress[ys, xs] = bin_s[bins] + fraction * (bin_s[bins + 1] - bin_s[bins])
+
+    progress = np.repeat(np.repeat(small_progress, DOWNSCALE, axis=0), DOWNSCALE, axis=1)
+    progress = _fill_invalid(progress[:height, :width], FILL_STEPS)
+    return points.astype(np.float32), progress
+
+
+def _fill_invalid(progress, steps):
+    """
+    메운 틈, 경계 위, 트랙 바로 바깥 픽셀도 조회되도록 가까운 픽셀의 진행 거리를 한 칸씩 번지게 함
+    가장자리 바깥은 INVALID 로 채운 한 칸 여백에서 이웃을 읽으므로 반대편 가장자리 값이 넘어오지 않는다.
+    """
+    padded = np.pad(progress, 1, constant_values=INVALID)
+    progress = padded[1:-1, 1:-1]  # 여백 안쪽 뷰 (채운 값이 같은 단계의 다음 방향 이웃에 바로 보임)
+    for _ in range(steps):
+        invalid = progress < 0
+        if not invalid.any():
+            break
+        for neighbour in (padded[:-2, 1:-1], padded[2:, 1:-1], padded[1:-1, :-2], padded[1:-1, 2:]):
+            take = invalid & (neighbour >= 0)
+            progress[take] = neighbour[take]
+            invalid &= ~take
+    return progress
+
+
+class RacingLine:
+    """
+    중앙선 좌표와 누적 거리(arc length) 색인
+    진행 거리 지도로 차량 위치의 진행 거리를 O(1) 로 구하고, 중앙선 위 위치는 이진 탐색으로 찾는다.
+    """
+
+    def __init__(self, points, progress_map):
+        self.points = np.asarray(points, dtype=np.float64)
+        self.progress_map = progress_map
+        self.s, self.length = _arc_lengths(self.points)
+
+        # 차량마다 매 틱 호출되므로 스칼라 조회용 파이썬 리스트도 보관
+        self._s = self.s.tolist()
+        self._xs = self.points[:, 0].tolist()
+        self._ys = self.points[:, 1].tolist()
+
+    def progress_at(self, x, y):
+        """위치 (x, y) 의 진행 거리 (트랙에서 너무 멀면 None)"""
+        height, width = self.progress_map.shape
+        xi, yi = int(x), int(y)
+        if not (0 <= xi < width and 0 <= yi < height):
+            return None
+        value = float(self.progress_map[yi, xi])
+        return value if value >= 0 else None
+
+    def progress_at_many(self, xs, ys):
+        """여러 위치의 진행 거리 배열 (트랙에서 너무 멀면 -1)"""
+        height, width = self.progress_map.shape
+        xi = np.asarray(xs).astype(np.int64)
+        yi = np.asarray(ys).astype(np.int64)
+        inside = (xi >= 0) & (xi < width) & (yi >= 0) & (yi < height)
+        values = self.progress_map[np.clip(yi, 0, height - 1), np.clip(xi, 0, width - 1)]
+        return np.where(inside, values, INVALID)
+
+    def point_at(self, s):
+        """진행 거리 s 의 중앙선 위 좌표 (한 바퀴 단위로 반복)"""
+        s %= self.length
+        i = bisect.bisect_right(self._s, s) - 1
+        j = (i + 1) % len(self._s)
+        segment = (self._s[j] if j else self.length) - self._s[i]
+        t = (s - self._s[i]) / segment if segment > 0 else 0.0
+        return (
+            self._xs[i] + (self._xs[j] - self._xs[i]) * t,
+            self._ys[i] + (self._ys[j] - self._ys[i]) * t,
+        )
+
+
+def load_racing_line(track_surface, border_mask, finish_rect, direction):
+    """build_racing_line 결과를 디스크 캐시에서 읽거나 계산해서 RacingLine 생성"""
+    key = mask_key(f"racing-line-{finish_rect}-{direction}", drivable_mask(track_surface, border_mask))
+    built = {}
+
+    def build(index):
+        if not built:
+            built["result"] = build_racing_line(track_surface, border_mask, finish_rect, direction)
+        return built["result"][index]
+
+    points = load_or_build_array(key + "-points", lambda: build(0))
+    progress_map = load_or_build_array(key + "-progress", lambda: build(1))
+    return RacingLine(points, progress_map)
+
+
+def steer_towards(car, target_x, target_y, dead_zone=None):
+    """
+    차량이 목표 지점을 향하도록 한 번 회전 (atan2 대신 외적 부호로 방향 판단)
+    :param car: AbstractCar 객체
+    :param dead_zone: 이 값보다 방향 오차(sin)가 작으면 회전하지 않음 (None 이면 회전 속도의 절반)
+    """
+    radians = math.radians(car.angle)
+    forward_x, forward_y = -math.sin(radians), -math.cos(radians)
+    center_x = car.x + car.img.get_width() / 2
+    center_y = car.y + car.img.get_height() / 2
+    to_x, to_y = target_x - center_x, target_y - center_y
+
+    length = math.hypot(to_x, to_y)
+    if length == 0:
+        return
+    cross = (forward_x * to_y - forward_y * to_x) / length
+    dot = forward_x * to_x + forward_y * to_y
+
+    if dead_zone is None:
+        dead_zone = math.sin(math.radians(car.rotation_vel / 2))
+    if dot < 0:
+        # 목표가 뒤쪽이면 가까운 쪽으로 계속 회전
+        car.rotate(left=cross <= 0, right=cross > 0)
+    elif cross < -dead_zone:
+        car.rotate(left=True)
+    elif cross > dead_zone:
+        car.rotate(right=True)
+
+
+if __name__ == "__main__":
+    import time
+
+    from track_package import load_track
+
+    track = load_track()
+    finish_rect = (*track.finish_position, *track.image("finish").get_size())
+    start = time.time()
+    line = load_racing_line(track.image("track"), track.border_mask, finish_rect, track.direction)
+    print(f"{len(line.points)} points, lap length {line.length:.0f}px, {time.time() - start:.2f}s")
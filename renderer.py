@@ -0,0 +1,93 @@
+"""
+변경된 영역(dirty rect)만 다시 그리는 렌더러
+
+고정 배경(잔디, 트랙, 결승선, 트랙 경계)은 처음 한 번만 합성해 두고,
+매 프레임 지난 프레임에 차량/아이템/HUD 가 있던 영역만 배경으로 복원한 뒤 다시 그린다.
+HUD 문자열은 값이 바뀔 때만 다시 렌더링하고, display.update 에는 바뀐 영역 목록만 넘긴다.
+"""
+import pygame
+
+HUD_COLOR = (255, 255, 255)
+BANNER_COLOR = (200, 200, 200)
+
+
+class DirtyRenderer:
+    def __init__(self, win, layers, font, hud_margin=10, hud_spacing=40, update_display=True):
+        """
+        :param win: 화면 Surface (창 없이 그릴 때는 일반 Surface)
+        :param layers: 배경으로 합성할 [(이미지, 좌표), ...] (그리는 순서대로)
+        :param font: HUD 폰트
+        :param update_display: False 면 display.update 를 호출하지 않음 (창 없이 Surface 에만 그릴 때)
+        """
+        self.win = win
+        self.update_display = update_display
+        self.font = font
+        self.hud_margin = hud_margin
+        self.hud_spacing = hud_spacing
+
+        self.background = pygame.Surface(win.get_size())
+        for img, pos in layers:
+            self.background.blit(img, pos)
+        if pygame.display.get_surface() is not None:
+            self.background = self.background.convert()
+
+        self._hud_cache = {}  # 줄 번호 -> (문자열, 렌더링된 Surface)
+        self._last_rects = []
+        self._full_redraw = True
+
+    def invalidate(self):
+        """다음 프레임에 화면 전체를 다시 그림 (배너 등 외부에서 화면을 덮어쓴 뒤 호출)"""
+        self._full_redraw = True
+
+    def _hud_surface(self, line, text, color=HUD_COLOR):
+        cached = self._hud_cache.get(line)
+        if cached is None or cached[0] != text:
+            cached = (text, self.font.render(text, 1, color))
+            self._hud_cache[line] = cached
+        return cached[1]
+
+    def draw(self, cars, sprites, hud_lines, banner=None):
+        """
+        한 프레임 그리기
+        :param cars: draw(win) 가 그린 영역(Rect)을 반환하는 차량 목록
+        :param sprites: [(이미지, 좌표), ...] 트랩/부스트 등
+        :param hud_lines: 오른쪽 위에 표시할 문자열 목록
+        :param banner: 화면 가운데에 표시할 문자열 (없으면 None)
+        :return: 이번 프레임에 갱신한 영역 목록
+        """
+        win = self.win
+
+        # 지난 프레임에 그린 영역을 배경으로 복원
+        if self._full_redraw:
+            win.blit(self.background, (0, 0))
+        else:
+            for rect in self._last_rects:
+                win.blit(self.background, rect, rect)
+
+        rects = []
+        for img, pos in sprites:
+            rects.append(win.blit(img, pos))
+
+        for line, text in enumerate(hud_lines):
+            surface = self._hud_surface(line, text)
+            x = win.get_width() - surface.get_width() - self.hud_margin
+            y = self.hud_margin + line * self.hud_spacing
+            rects.append(win.blit(surface, (x, y)))
+
+        for car in cars:
+            rects.append(car.draw(win))
+
+        if banner:
+            surface = self._hud_surface("banner", banner, BANNER_COLOR)
+            rects.append(win.blit(surface, surface.get_rect(center=win.get_rect().center)))
+
+        if self._full_redraw:
+            dirty = [win.get_rect()]
+            self._full_redraw = False
+        else:
+            dirty = self._last_rects + rects
+        if self.update_display:
+            pygame.display.update(dirty)
+
+        self._last_rects = rects
+        return dirty
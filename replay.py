@@ -0,0 +1,270 @@
+"""
+경기 리플레이 기록/재생
+
+경기를 시드, 설정, 틱별 입력(W/A/S/D 비트마스크 1바이트), 아이템 생성 이벤트로 기록한다.
+시뮬레이션이 결정적이므로 같은 시드와 입력을 RaceSim 에 다시 넣으면 차량 궤적이 그대로 재현되고,
+기록된 아이템 생성 이벤트와 비교해 어긋나는 지점(desync)을 찾을 수 있다.
+
+파일 형식 (little-endian):
+    헤더 HEADER: 매직, 버전, 시드, dt, 트랩 수, 부스트 수, AI 수, 최고 속도, 회전 속도, 틱 수, 이벤트 수,
+                트랙 경로 길이
+    트랙 폴더 경로 (UTF-8, '/' 구분)
+    zlib 압축 본문: 틱별 행동 (uint8 x 틱 수) + 아이템 생성 이벤트 EVENT (틱, 종류, x, y) x 이벤트 수
+
+재생 중 일정 간격으로 경기 상태 스냅샷을 메모리에 저장해 두어 임의 시점으로 빠르게 이동(seek)할 수 있다.
+
+사용 예:
+    python replay.py race.rpl              # 창을 띄워 관전 (space: 일시정지, 좌/우: 5초 이동, 위/아래: 배속)
+    python replay.py race.rpl --headless   # 화면 없이 최대 속도로 재생하고 재현 여부 확인
+"""
+import os
+import struct
+import zlib
+
+from settings import FPS
+from track_package import DEFAULT_TRACK_PATH
+
+MAGIC = b"RPLY"
+VERSION = 4  # 시뮬레이션 규칙이나 파일 형식이 바뀌면 올림 (2: 트랙 경계 연속 충돌 검사, 3: 트랙 경로 기록, 4: bounce 이동도 검사)
+HEADER = struct.Struct("<4sHqdHHHffIIH")
+EVENT = struct.Struct("<IBhh")
+ITEM_KINDS = ("trap", "boost")
+
+SNAPSHOT_INTERVAL = 5 * FPS  # 스냅샷 간격 (틱)
+
+
+class Replay:
+    def __init__(self, seed, dt=1 / FPS, trap_count=5, boost_count=5, ai_count=1, max_vel=4, rotation_vel=6,
+                 actions=None, events=None, track=DEFAULT_TRACK_PATH):
+        """
+        :param seed: 경기 난수 시드 (int)
+        :param track: 경기 트랙 폴더 경로
+        :param actions: 틱별 플레이어 행동 비트마스크 (bytearray)
+        :param events: 아이템 생성 이벤트 [(틱, 종류, (x, y)), ...], 처음 배치는 틱 0
+        """
+        self.seed = seed
+        self.dt = dt
+        self.trap_count = trap_count
+        self.boost_count = boost_count
+        self.ai_count = ai_count
+        self.max_vel = max_vel
+        self.rotation_vel = rotation_vel
+        self.actions = bytearray(actions or b"")
+        self.events = list(events or [])
+        self.track = os.path.normpath(track).replace(os.sep, "/")
+
+    def __len__(self):
+        return len(self.actions)
+
+    def to_bytes(self):
+        track = self.track.encode()
+        header = HEADER.pack(
+            MAGIC, VERSION, self.seed, self.dt, self.trap_count, self.boost_count, self.ai_count,
+            self.max_vel, self.rotation_vel, len(self.actions), len(self.events), len(track),
+        )
+        events = b"".join(EVENT.pack(tick, ITEM_KINDS.index(kind), x, y) for tick, kind, (x, y) in self.events)
+        return header + track + zlib.compress(bytes(self.actions) + events)
+
+    @classmethod
+    def from_bytes(cls, data):
+        (magic, version, seed, dt, trap_count, boost_count, ai_count,
+         max_vel, rotation_vel, tick_count, event_count, track_length) = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a version {VERSION} replay file")
+
+        track = data[HEADER.size:HEADER.size + track_length].decode()
+        body = zlib.decompress(data[HEADER.size + track_length:])
+        actions = body[:tick_count]
+        events = [
+            (tick, ITEM_KINDS[kind], (x, y))
+            for tick, kind, x, y in EVENT.iter_unpack(body[tick_count:tick_count + event_count * EVENT.size])
+        ]
+        return cls(seed, dt, trap_count, boost_count, ai_count, max_vel, rotation_vel, actions, events, track)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    def make_sim(self):
+        """기록 당시와 같은 설정의 RaceSim (reset 전)"""
+        from simulation import RaceSim
+        return RaceSim(
+            trap_count=self.trap_count, boost_count=self.boost_count, dt=self.dt,
+            max_vel=self.max_vel, rotation_vel=self.rotation_vel, seed=self.seed, ai_count=self.ai_count,
+            track=self.track,
+        )
+
+
+class ReplayRecorder:
+    """
+    경기 진행 중 입력과 아이템 생성 이벤트를 기록
+    아이템을 처음 배치하기 전에 watch() 로 아이템 관리자를 연결하고, 매 틱 아이템 획득 처리 전에 record() 를 호출한다.
+    """
+
+    def __init__(self, seed, **config):
+        """
+        :param seed: 경기 난수 시드 (GameContext 에 넣은 값)
+        :param config: Replay 설정 (dt, trap_count, boost_count, ai_count, max_vel, rotation_vel, track)
+        """
+        self.replay = Replay(seed, **config)
+
+    def watch(self, item_manager):
+        item_manager.on_spawn = self._on_spawn
+
+    def _on_spawn(self, kind, pos):
+        self.replay.events.append((len(self.replay.actions), kind, (int(pos[0]), int(pos[1]))))
+
+    def record(self, action):
+        self.replay.actions.append(int(action) & 0xFF)
+
+    def save(self, path):
+        self.replay.save(path)
+
+
+class ReplayPlayer:
+    """리플레이를 RaceSim 으로 다시 진행 (스냅샷으로 임의 틱 이동 가능)"""
+
+    def __init__(self, replay, snapshot_interval=SNAPSHOT_INTERVAL):
+        self.replay = replay
+        self.snapshot_interval = snapshot_interval
+        self.sim = replay.make_sim()
+        self.sim.items.on_spawn = self._on_spawn
+        self.tick = 0
+        self.events = []
+        self.desync_tick = None  # 기록과 다른 아이템 생성이 처음 나온 틱
+        self.sim.reset()
+        self.snapshots = {0: (self.sim.get_state(), list(self.events))}
+
+    def _on_spawn(self, kind, pos):
+        event = (self.tick, kind, (int(pos[0]), int(pos[1])))
+        index = len(self.events)
+        self.events.append(event)
+        expected = self.replay.events[index] if index < len(self.replay.events) else None
+        if event != expected and self.desync_tick is None:
+            self.desync_tick = self.tick
+
+    @property
+    def finished(self):
+        return self.tick >= len(self.replay)
+
+    @property
+    def in_sync(self):
+        """지금까지 재생한 구간의 아이템 생성이 기록과 같은지"""
+        return self.desync_tick is None
+
+    def step(self):
+        """
+        기록된 행동으로 한 틱 진행
+        :return: RaceSim.step 결과 (관측값, 경기 종료 여부, 정보), 끝까지 재생했으면 None
+        """
+        if self.finished:
+            return None
+        action = self.replay.actions[self.tick]
+        self.tick += 1
+        result = self.sim.step(action)
+        if self.tick % self.snapshot_interval == 0 and self.tick not in self.snapshots:
+            self.snapshots[self.tick] = (self.sim.get_state(), list(self.events))
+        return result
+
+    def run(self):
+        """
+        남은 틱을 최대 속도로 재생
+        :return: [(틱, 결승선 통과 결과), ...]
+        """
+        results = []
+        while not self.finished:
+            _, _, info = self.step()
+            if info["result"]:
+                results.append((self.tick, info["result"]))
+        return results
+
+    def seek(self, tick):
+        """tick 시점으로 이동 (가장 가까운 이전 스냅샷에서 다시 진행)"""
+        tick = max(0, min(tick, len(self.replay)))
+        base = max(t for t in self.snapshots if t <= tick)
+        if not base <= self.tick <= tick:
+            state, events = self.snapshots[base]
+            self.sim.set_state(state)
+            self.events = list(events)
+            self.tick = base
+        while self.tick < tick:
+            self.step()
+
+
+def spectate(replay, fps=FPS):
+    """창을 띄워 리플레이 관전"""
+    import pygame
+
+    from renderer import DirtyRenderer
+    from settings import WIDTH, HEIGHT
+
+    win = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Racing Game! (replay)")
+    from settings import MAIN_FONT  # 화면을 만든 뒤 읽어야 화면 픽셀 형식으로 변환됨
+    player = ReplayPlayer(replay)
+    if player.sim.track.size != (WIDTH, HEIGHT):
+        win = pygame.display.set_mode(player.sim.track.size)
+    renderer = DirtyRenderer(win, player.sim.track.background_layers(), MAIN_FONT)
+    clock = pygame.time.Clock()
+    paused, speed = False, 1
+
+    run = True
+    while run:
+        clock.tick(fps)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                run = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_LEFT:
+                    player.seek(player.tick - 5 * fps)
+                elif event.key == pygame.K_RIGHT:
+                    player.seek(player.tick + 5 * fps)
+                elif event.key == pygame.K_UP:
+                    speed = min(speed * 2, 64)
+                elif event.key == pygame.K_DOWN:
+                    speed = max(speed // 2, 1)
+
+        if not paused:
+            for _ in range(speed):
+                player.step()
+
+        sim = player.sim
+        hud_lines = [
+            f"Level {sim.game_info.level}",
+            f"Tick {player.tick}/{len(replay)} x{speed}",
+            f"Time: {round(sim.clock.now)}s",
+        ]
+        banner = "Paused" if paused else ("End of replay" if player.finished else None)
+        renderer.draw(sim.manager.cars, sim.items.sprites(), hud_lines, banner)
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="레이싱 리플레이 재생")
+    parser.add_argument("path")
+    parser.add_argument("--headless", action="store_true", help="화면 없이 최대 속도로 재생")
+    args = parser.parse_args()
+
+    replay = Replay.load(args.path)
+    if args.headless:
+        start = time.time()
+        player = ReplayPlayer(replay)
+        results = player.run()
+        elapsed = time.time() - start
+        print(f"{len(replay)} ticks in {elapsed:.2f}s ({len(replay) / max(elapsed, 1e-9):.0f} ticks/s)")
+        print(f"results: {results}")
+        print("in sync" if player.in_sync and len(player.events) == len(replay.events)
+              else f"desync at tick {player.desync_tick}")
+    else:
+        spectate(replay)
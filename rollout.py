@@ -0,0 +1,238 @@
+"""
+강화학습 데이터 수집용 멀티프로세스 롤아웃 풀
+
+작업 프로세스 K개가 각각 RaceSim M개를 화면 없이(SDL dummy 드라이버) 진행하고,
+전이(관측, 행동, 보상, 종료 여부)를 공유 메모리 링 버퍼에 직접 써서 메인 프로세스로 보낸다.
+이미지와 마스크는 작업 프로세스마다 시작할 때 한 번만 로드된다 (spawn 방식으로 새로 import).
+
+사용 예:
+    with RolloutPool(num_workers=4, envs_per_worker=8, seed=0) as pool:
+        batch = pool.collect(10000)
+"""
+import multiprocessing as mp
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# RaceSim.observe() 의 키 순서 (관측 벡터의 열 순서)
+OBS_KEYS = ("x", "y", "angle", "vel", "max_vel", "ai_x", "ai_y", "ai_angle", "level")
+OBS_DIM = len(OBS_KEYS)
+
+WIN_REWARD = 1.0
+LOSE_REWARD = -1.0
+PROGRESS_REWARD = 1.0  # 중앙선을 따라 한 바퀴 나아갈 때의 누적 보상 (뒤로 가면 음수)
+
+
+class SharedRingBuffer:
+    """
+    생산자 1개, 소비자 1개용 공유 메모리 링 버퍼
+    헤더에 누적 쓰기/읽기 개수를 두고, 가득 차면 생산자가 빈 자리가 생길 때까지 기다린다.
+    """
+    HEADER = 2  # [쓴 개수, 읽은 개수] (int64)
+
+    def __init__(self, capacity, obs_dim=OBS_DIM, name=None):
+        self.capacity = capacity
+        self.obs_dim = obs_dim
+
+        fields = [
+            ("header", np.int64, (self.HEADER,)),
+            ("obs", np.float32, (capacity, obs_dim)),
+            ("action", np.int8, (capacity,)),
+            ("reward", np.float32, (capacity,)),
+            ("done", np.bool_, (capacity,)),
+            ("env_id", np.int32, (capacity,)),
+        ]
+        offsets, size = [], 0
+        for _, dtype, shape in fields:
+            size = -(-size // 8) * 8  # 8바이트 정렬
+            offsets.append(size)
+            size += int(np.prod(shape)) * np.dtype(dtype).itemsize
+
+        self._owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self._owner, size=size)
+        self.name = self.shm.name
+        for (field, dtype, shape), offset in zip(fields, offsets):
+            setattr(self, field, np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset))
+        if self._owner:
+            self.header[:] = 0
+
+    def __len__(self):
+        return int(self.header[0] - self.header[1])
+
+    def write(self, obs, action, reward, done, env_id, stop_event=None):
+        """
+        전이 여러 개를 한 번에 기록 (자리가 부족하면 기다림)
+        :return: 기록했으면 True, 기다리는 중 stop_event 가 설정되면 False
+        """
+        count = len(action)
+        if count > self.capacity:
+            # 버퍼가 다 비어도 들어가지 않으므로 기다리면 영원히 멈춤
+            raise ValueError(f"cannot write {count} transitions into a ring buffer of capacity {self.capacity}")
+        while self.capacity - len(self) < count:
+            if stop_event is not None and stop_event.is_set():
+                return False
+            time.sleep(0.0005)
+
+        start = int(self.header[0])
+        index = (start + np.arange(count)) % self.capacity
+        self.obs[index] = obs
+        self.action[index] = action
+        self.reward[index] = reward
+        self.done[index] = done
+        self.env_id[index] = env_id
+        self.header[0] = start + count  # 데이터를 다 쓴 뒤에 개수 갱신
+        return True
+
+    def read(self, max_count):
+        """쌓인 전이를 최대 max_count 개 복사해 꺼냄"""
+        start = int(self.header[1])
+        count = min(int(self.header[0]) - start, max_count)
+        index = (start + np.arange(count)) % self.capacity
+        batch = {
+            "obs": self.obs[index].copy(),
+            "action": self.action[index].copy(),
+            "reward": self.reward[index].copy(),
+            "done": self.done[index].copy(),
+            "env_id": self.env_id[index].copy(),
+        }
+        self.header[1] = start + count
+        return batch
+
+    def close(self):
+        # numpy 뷰를 먼저 놓아야 공유 메모리를 닫을 수 있음
+        for field in ("header", "obs", "action", "reward", "done", "env_id"):
+            setattr(self, field, None)
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+
+def random_policy(obs, rng):
+    """관측과 무관하게 W/A/S/D 조합 중 하나를 무작위로 고르는 기본 정책"""
+    return rng.integers(0, 16, size=len(obs))
+
+
+def _worker(worker_id, buffer_name, capacity, envs_per_worker, seed, policy, stop_event):
+    # pygame 을 import 하기 전에 화면/소리 없는 드라이버 지정
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    from simulation import RaceSim, PLAYER_WON, AI_WON
+
+    buffer = SharedRingBuffer(capacity, name=buffer_name)
+    rng = np.random.default_rng(None if seed is None else seed + worker_id)
+    env_ids = worker_id * envs_per_worker + np.arange(envs_per_worker, dtype=np.int32)
+
+    sims = []
+    for env_id in env_ids:
+        sim = RaceSim(seed=None if seed is None else seed * 100003 + int(env_id))
+        sim.reset()
+        sims.append(sim)
+    obs = np.array([[sim.observe()[key] for key in OBS_KEYS] for sim in sims], dtype=np.float32)
+
+    try:
+        while not stop_event.is_set():
+            actions = policy(obs, rng)
+            next_obs = np.empty_like(obs)
+            rewards = np.zeros(envs_per_worker, dtype=np.float32)
+            dones = np.zeros(envs_per_worker, dtype=bool)
+
+            for i, sim in enumerate(sims):
+                state, done, info = sim.step(int(actions[i]))
+                rewards[i] = PROGRESS_REWARD * info["progress"]
+                if info["result"] == PLAYER_WON:
+                    rewards[i] += WIN_REWARD
+                elif info["result"] == AI_WON:
+                    rewards[i] += LOSE_REWARD
+                if done:
+                    dones[i] = True
+                    state = sim.reset()
+                next_obs[i] = [state[key] for key in OBS_KEYS]
+
+            if not buffer.write(obs, actions, rewards, dones, env_ids, stop_event):
+                break
+            obs = next_obs
+    finally:
+        buffer.close()
+
+
+class RolloutPool:
+    def __init__(self, num_workers=None, envs_per_worker=8, capacity=65536, seed=None, policy=random_policy):
+        """
+        :param num_workers: 작업 프로세스 수 (None 이면 CPU 코어 수)
+        :param envs_per_worker: 작업 프로세스당 동시에 진행할 경기 수
+        :param capacity: 작업 프로세스별 링 버퍼 크기 (전이 개수)
+        :param seed: 시드 (작업 프로세스/경기별로 다른 시드를 파생)
+        :param policy: policy(관측 (M, OBS_DIM), numpy Generator) -> 행동 (M,), 모듈 최상위 함수여야 함
+        """
+        if envs_per_worker > capacity:
+            # 작업 프로세스는 틱마다 경기 수만큼 전이를 한 번에 기록하므로 버퍼에 다 들어가야 함
+            raise ValueError(f"envs_per_worker ({envs_per_worker}) must not exceed capacity ({capacity})")
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.envs_per_worker = envs_per_worker
+        self.capacity = capacity
+        self.seed = seed
+        self.policy = policy
+        self.buffers = []
+        self.processes = []
+        self._ctx = mp.get_context("spawn")
+        self._stop_event = None
+
+    def start(self):
+        self._stop_event = self._ctx.Event()
+        for worker_id in range(self.num_workers):
+            buffer = SharedRingBuffer(self.capacity)
+            process = self._ctx.Process(
+                target=_worker,
+                args=(worker_id, buffer.name, self.capacity, self.envs_per_worker,
+                      self.seed, self.policy, self._stop_event),
+                daemon=True,
+            )
+            process.start()
+            self.buffers.append(buffer)
+            self.processes.append(process)
+        return self
+
+    def collect(self, count, timeout=None):
+        """
+        전이를 count 개 모을 때까지 모든 작업 프로세스의 버퍼에서 읽음
+        :return: {"obs", "action", "reward", "done", "env_id"} 배열 dict (count 가 0 이면 같은 자료형의 빈 배열)
+        """
+        if count <= 0:
+            return self.buffers[0].read(0)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        parts, collected = [], 0
+        while collected < count:
+            for buffer in self.buffers:
+                batch = buffer.read(count - collected)
+                if len(batch["action"]):
+                    parts.append(batch)
+                    collected += len(batch["action"])
+                if collected >= count:
+                    break
+            else:
+                if not any(process.is_alive() for process in self.processes):
+                    raise RuntimeError("all rollout workers exited")
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError(f"collected {collected} of {count} transitions")
+                time.sleep(0.001)
+
+        return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+    def close(self):
+        if self._stop_event is not None:
+            self._stop_event.set()
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for buffer in self.buffers:
+            buffer.close()
+        self.processes, self.buffers = [], []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
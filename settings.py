@@ -1,5 +1,5 @@
 import pygame
-from utils import scale_image
+from assets import ASSETS
 
 # pygame 초기화
 if not pygame.get_init():
@@ -7,26 +7,37 @@ if not pygame.get_init():
 if not pygame.font.get_init():
     pygame.font.init()
 
-# 화면 크기 및 프레임 속도
-WIDTH, HEIGHT = 800, 600
 FPS = 60
 
-# 이미지 로드
-GRASS = scale_image(pygame.image.load("imgs/grass.jpg"), 2.5)
-TRACK = scale_image(pygame.image.load("imgs/track.png"), 0.9)
-TRACK_BORDER = scale_image(pygame.image.load("imgs/track-border.png"), 0.9)
-FINISH = pygame.transform.rotate(pygame.image.load("imgs/finish.png"), 90)
+# 이미지/마스크는 처음 사용할 때 에셋 등록소(assets.ASSETS)에서 읽는다 (모듈 __getattr__)
+# FPS 만 필요한 모듈은 이미지를 읽지 않고, 화면을 먼저 만든 뒤 읽으면 화면 픽셀 형식으로 변환된 이미지를 받는다.
+IMAGES = {
+    "RED_CAR_IMG": "red-car",
+    "BLUE_CAR_IMG": "blue-car",
+    "TRAP": "trap",
+    "BOOST": "boost",
+}
+MASKS = {
+    "TRAP_MASK": "trap",
+    "BOOST_MASK": "boost",
+}
 
-RED_CAR_IMG = scale_image(pygame.image.load("imgs/red-car.png"), 0.55)
-BLUE_CAR_IMG = scale_image(pygame.image.load("imgs/blue-car.png"), 0.55)
 
-TRAP = pygame.transform.scale(pygame.image.load("imgs/trap.png"), (25, 15))
-BOOST = pygame.transform.scale(pygame.image.load("imgs/boost.png"), (25, 15))
+def _load(name):
+    if name in IMAGES:
+        return ASSETS.image(IMAGES[name])
+    if name in MASKS:
+        return ASSETS.mask(MASKS[name])
+    # 화면 크기 (기본 트랙 이미지 크기와 동일, 이미지를 읽지 않고 트랙 팩 파일 목차에서)
+    if name in ("WIDTH", "HEIGHT"):
+        from track_package import DEFAULT_TRACK_PATH, load_manifest, track_assets
+        size = track_assets(DEFAULT_TRACK_PATH, load_manifest(DEFAULT_TRACK_PATH)).size("track")
+        return size[0] if name == "WIDTH" else size[1]
+    if name == "MAIN_FONT":
+        return pygame.font.SysFont("comicsans", 35)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# 마스크 생성
-TRACK_BORDER_MASK = pygame.mask.from_surface(TRACK_BORDER)
-FINISH_MASK = pygame.mask.from_surface(FINISH)
 
-# 위치
-FINISH_POSITION = (445, 3)
-MAIN_FONT = pygame.font.SysFont("comicsans", 35)
+def __getattr__(name):
+    value = globals()[name] = _load(name)  # 한 번 읽은 값은 모듈 변수로 저장
+    return value
@@ -0,0 +1,308 @@
+"""
+화면(display) 없이 동작하는 레이싱 시뮬레이션 코어
+
+강화학습용으로 창, 프레임 제한(clock.tick), 대기(pygame.time.wait) 없이
+PlayerCar, AICar, GameInfo, 트랩/부스트 로직을 고정 시간 간격으로 진행한다.
+main.py 의 게임 루프도 같은 충돌/아이템 처리 함수를 사용한다.
+"""
+from cars import PlayerCar, AICar
+from game_clock import GameContext
+from game_info import GameInfo
+import items
+from item_manager import ItemManager
+from lap_tracker import LapTracker
+from race_manager import RaceManager
+from settings import RED_CAR_IMG, BLUE_CAR_IMG, TRAP, BOOST, FPS, TRAP_MASK, BOOST_MASK
+from track_package import load_track
+
+# cars.py 클래스들에 이미지 할당
+PlayerCar.IMG = RED_CAR_IMG
+AICar.IMG = BLUE_CAR_IMG
+
+# 기본 트랙 (tracks/default, 미리 계산한 마스크/중앙선/거리장/아이템 좌표 표)
+DEFAULT_TRACK = load_track()
+
+# items.py 전역변수 설정
+items.TRACK_MASK = DEFAULT_TRACK.track_mask
+items.WIDTH, items.HEIGHT = DEFAULT_TRACK.size
+
+# 행동(action) 비트마스크 (W/A/S/D 키 조합)
+ACTION_LEFT = 1      # A
+ACTION_RIGHT = 2     # D
+ACTION_FORWARD = 4   # W
+ACTION_BACKWARD = 8  # S
+
+# 결승선 통과 결과
+NEXT_LEVEL = "next_level"
+PLAYER_WON = "player_won"
+AI_WON = "ai_won"
+
+# AI 차량이 따라갈 기본 트랙 중앙선 (출발 직후 +x 방향으로 진행)
+RACING_LINE = DEFAULT_TRACK.racing_line
+
+# 기본 트랙 경계 연속 충돌 검사기 (이동 구간 전체를 검사해 빠른 속도에서도 경계를 뚫지 않음)
+BORDER_COLLIDER = DEFAULT_TRACK.collider
+
+
+def apply_action(car, action):
+    """
+    행동 비트마스크에 따라 차량을 조작 (main.move_player 와 동일한 규칙)
+    :param car: PlayerCar 객체
+    :param action: ACTION_* 비트마스크 조합 (int)
+    """
+    moved = False
+
+    if action & ACTION_LEFT:
+        car.rotate(left=True)
+    if action & ACTION_RIGHT:
+        car.rotate(right=True)
+    if action & ACTION_FORWARD:
+        moved = True
+        car.move_forward()
+    if action & ACTION_BACKWARD:
+        moved = True
+        car.move_backward()
+
+    if not moved:
+        car.reduce_speed()
+
+
+def create_item_manager(trap_count=0, boost_count=0, rng=None, track=None):
+    """
+    트랩/부스트 아이템 관리자 생성 후 아이템 배치
+    :param trap_count: 처음 배치할 트랩 수
+    :param boost_count: 처음 배치할 부스트 수
+    :param rng: 아이템 배치용 random.Random (None 이면 random 모듈)
+    :param track: 아이템을 배치할 트랙 (None 이면 DEFAULT_TRACK)
+    """
+    manager = ItemManager(
+        {"trap": (TRAP, TRAP_MASK), "boost": (BOOST, BOOST_MASK)}, rng=rng, track=track or DEFAULT_TRACK,
+    )
+    manager.spawn("trap", trap_count)
+    manager.spawn("boost", boost_count)
+    return manager
+
+
+def resolve_collision(car, game_info, opponent_car=None, is_player=True, track=None):
+    """
+    트랙 경계, 결승선, 상대 차량과의 충돌 처리 (화면 출력 및 대기 없음)
+    :param car: 충돌을 검사할 차량
+    :param game_info: GameInfo 객체
+    :param opponent_car: 상대 차량 (없으면 None)
+    :param is_player: car 가 플레이어 차량인지 여부
+    :param track: 경기 트랙 (None 이면 DEFAULT_TRACK)
+    :return: 결승선 통과 결과 (NEXT_LEVEL, PLAYER_WON, AI_WON) 또는 None
+    """
+    result = None
+    track = track or DEFAULT_TRACK
+
+    # 트랙 경계 충돌 처리 (이번 틱 이동 구간에서 처음 부딪힌 지점으로 되돌린 뒤 반사)
+    # 튕겨 나가는 이동(bounce)도 collider.bounce 로 같은 검사를 거친다.
+    contact = car.border_contact = track.collider.resolve(car)
+    if not contact:
+        # 결승선 충돌 확인
+        finish_poi = car.collide(track.finish_mask, *track.finish_position)
+        if finish_poi:
+            if not game_info.is_ready_for_finish(car):
+                car.border_contact = track.collider.bounce(car)
+                return None
+
+            if is_player and game_info.level < game_info.LEVELS:
+                game_info.next_level()
+                result = NEXT_LEVEL
+            else:
+                game_info.reset()
+                result = PLAYER_WON if is_player else AI_WON
+
+            car.reset()
+            if opponent_car:
+                opponent_car.reset()
+            for reset_car in (car, opponent_car):
+                if reset_car:
+                    game_info.lap_tracker.reset(reset_car)
+
+    # 플레이어와 AI 간 충돌
+    if opponent_car:
+        if car.collide(*opponent_car.rotated_mask()):
+            track.collider.bounce(car)
+            track.collider.bounce(opponent_car)
+    return result
+
+
+def resolve_race(manager, game_info, player_car=None):
+    """
+    경기 관리자의 모든 차량에 대해 트랙 경계/결승선 충돌 후 차량 간 충돌 처리
+    결승선을 통과한 차량이 있으면 모든 차량을 출발 격자로 되돌린다.
+    :param manager: RaceManager 객체 (manager.track 이 경기 트랙, None 이면 DEFAULT_TRACK)
+    :param game_info: GameInfo 객체
+    :param player_car: 결승선 통과 시 다음 레벨로 넘어가는 플레이어 차량 (없으면 None)
+    :return: (결승선 통과 결과 또는 None, 결승선을 통과한 차량 또는 None)
+    """
+    for car in manager.cars:
+        result = resolve_collision(car, game_info, is_player=car is player_car, track=manager.track)
+        if result:
+            manager.reset()
+            return result, car
+
+    manager.resolve_car_collisions()
+    return None, None
+
+
+class RaceSim:
+    """
+    화면 없이 한 경기를 진행하는 시뮬레이터
+    reset() 으로 초기화하고 step(action) 을 호출할 때마다 dt 초씩 진행한다.
+    """
+
+    def __init__(self, trap_count=5, boost_count=5, dt=1 / FPS, max_vel=4, rotation_vel=6, seed=None,
+                 ai_count=1, track=None, ai_driver=None):
+        """
+        :param ai_count: 함께 달리는 AI 차량 수 (관측값의 ai_* 는 첫 번째 AI 차량)
+        :param track: 경기 트랙 (track_package.Track 또는 트랙 폴더 경로, None 이면 DEFAULT_TRACK)
+        :param ai_driver: AI 차량을 만들고 운전할 neural_driver.PolicyBatcher (None 이면 중앙선을 따르는 AICar)
+        """
+        self.trap_count = trap_count
+        self.boost_count = boost_count
+        self.context = GameContext.simulated(seed, dt)
+        self.clock = self.context.clock
+        self.track = DEFAULT_TRACK if track is None else load_track(track)
+
+        self.lap_tracker = LapTracker(self.track.racing_line, clock=self.clock)
+        self.game_info = GameInfo(clock=self.clock, lap_tracker=self.lap_tracker)
+        self.player_car = PlayerCar(max_vel, rotation_vel, clock=self.clock)
+        self.ai_driver = ai_driver
+        if ai_driver is None:
+            self.ai_cars = [
+                AICar(max_vel, rotation_vel, clock=self.clock, racing_line=self.track.racing_line)
+                for _ in range(ai_count)
+            ]
+        else:
+            self.ai_cars = [
+                ai_driver.make_car(
+                    max_vel, rotation_vel, clock=self.clock, racing_line=self.track.racing_line, track=self.track,
+                )
+                for _ in range(ai_count)
+            ]
+        self.ai_car = self.ai_cars[0]
+        self.manager = RaceManager([self.player_car, *self.ai_cars], self.lap_tracker, self.track)
+        self.items = create_item_manager(rng=self.context.rng, track=self.track)
+        self.steps = 0
+
+    def set_track(self, track):
+        """
+        경기 트랙 교체 (미리 계산된 트랙 데이터를 바꿔 끼우기만 함, 다음 reset 부터 새 트랙에서 진행)
+        :param track: track_package.Track 또는 트랙 폴더 경로
+        """
+        self.track = load_track(track)
+        self.lap_tracker.set_line(self.track.racing_line)
+        for ai_car in self.ai_cars:
+            ai_car.racing_line = self.track.racing_line
+            if self.ai_driver is not None:
+                self.ai_driver.set_track(ai_car, self.track)
+        self.manager.set_track(self.track)
+        self.items.track = self.track
+
+    def reset(self, seed=None):
+        """
+        경기를 처음 상태로 되돌림
+        :param seed: 난수 시드 (None 이면 이전 난수 상태를 이어서 사용)
+        :return: 관측값 (dict)
+        """
+        if seed is not None:
+            self.context.reseed(seed)
+
+        self.clock.reset()
+        self.steps = 0
+        self.game_info.reset()
+        self.manager.reset()
+        for car in self.manager.cars:
+            car.reset_effects()
+
+        self.items.clear()
+        self.items.spawn("trap", self.trap_count)
+        self.items.spawn("boost", self.boost_count)
+        self.game_info.start_level()
+        return self.observe()
+
+    def step(self, action):
+        """
+        한 틱 진행
+        :param action: 플레이어 차량의 ACTION_* 비트마스크
+        :return: (관측값, 경기 종료 여부, 정보 dict)
+        """
+        # 다음 레벨은 키 입력 대기 없이 바로 시작 (main.py 에서 키 입력 후 시작하는 시점과 같은 시각)
+        if not self.game_info.started:
+            self.game_info.start_level()
+
+        self.clock.advance()
+        self.steps += 1
+
+        # 아이템 효과 해제 체크
+        self.manager.clear_effects()
+
+        # 플레이어 이동, AI 이동
+        apply_action(self.player_car, action)
+        for ai_car in self.ai_cars:
+            ai_car.move()
+
+        # 중앙선 기준 진행 거리 갱신 (플레이어 진행량은 보상 신호로 사용)
+        progress = self.manager.update_progress()[0]
+
+        # 트랩/부스트 충돌 (모든 차량)
+        picked = self.items.pick_up(self.manager.cars)
+
+        # 충돌 처리
+        result, _ = resolve_race(self.manager, self.game_info, self.player_car)
+        done = result in (PLAYER_WON, AI_WON)
+
+        info = {
+            "result": result,
+            "level": self.game_info.level,
+            "time": self.clock.now,
+            "items": [(car is self.player_car, kind) for car, kind in picked],
+            "progress": progress / self.track.racing_line.length,  # 이번 틱에 나아간 거리 (한 바퀴 = 1)
+            "wrong_way": self.lap_tracker.state(self.player_car).wrong_way,
+            "border_hit": self.player_car.border_contact is not None,
+        }
+        return self.observe(), done, info
+
+    def get_state(self):
+        """
+        경기 전체 상태 스냅샷 (시계, 난수 상태, 레벨, 차량, 진행 거리, 아이템)
+        set_state 로 되돌린 뒤 같은 행동을 넣으면 같은 결과가 나온다.
+        """
+        cars = self.manager.cars
+        return {
+            "ticks": self.clock.ticks,
+            "steps": self.steps,
+            "rng": self.context.rng.getstate(),
+            "game_info": self.game_info.get_state(),
+            "cars": [car.get_state() for car in cars],
+            "progress": [self.lap_tracker.get_state(car) for car in cars],
+            "items": self.items.get_state(),
+        }
+
+    def set_state(self, state):
+        self.clock.ticks = state["ticks"]
+        self.steps = state["steps"]
+        self.context.rng.setstate(state["rng"])
+        self.game_info.set_state(state["game_info"])
+        for car, car_state, progress in zip(self.manager.cars, state["cars"], state["progress"]):
+            car.set_state(car_state)
+            self.lap_tracker.set_state(car, progress)
+        self.items.set_state(state["items"])
+
+    def observe(self):
+        """현재 차량 상태를 dict 로 반환"""
+        player, ai = self.player_car, self.ai_car
+        return {
+            "x": player.x,
+            "y": player.y,
+            "angle": player.angle,
+            "vel": player.vel,
+            "max_vel": player.max_vel,
+            "ai_x": ai.x,
+            "ai_y": ai.y,
+            "ai_angle": ai.angle,
+            "level": self.game_info.level,
+        }
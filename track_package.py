@@ -0,0 +1,257 @@
+"""
+트랙 패키지 (폴더 하나 = 트랙 하나)
+
+    tracks/<이름>/track.json   목록: 이미지, 도로 색, 결승선, 출발 격자
+    tracks/<이름>/baked.npz    미리 계산한 데이터 (없거나 목록/이미지가 바뀌면 불러올 때 새로 만듦)
+
+track.json:
+    images: background/track/border/finish 이미지 (file 은 폴더 기준 경로, transform 은 assets.IMAGES 와 같은 형식)
+    track_color, track_threshold: 트랙 이미지에서 도로(아이템 배치 영역)로 볼 색과 허용 오차
+    finish: position(결승선 좌상단), margin(판정 마스크를 키우는 픽셀), direction(출발 직후 진행 방향)
+    start_grid: start_grid 인자 (origin, lanes, row_gap, rows) 와 출발 각도(angle)
+
+baked.npz 에는 도로/경계/결승선 마스크, 주행 가능 영역, 중앙선과 진행 거리 지도, 경계 거리장,
+아이템 크기별 유효 좌표 표가 들어 있어서 트랙을 불러올 때 아무것도 다시 계산하지 않는다.
+트랙 이미지는 배율/회전을 적용한 픽셀을 에셋 팩 파일(assets.AssetRegistry)에 저장해 두고 그릴 때 읽는다.
+load_track 은 불러온 트랙을 경로별로 보관하므로, 여러 트랙을 번갈아 쓰는 학습에서 트랙 교체는 객체를 바꿔 끼우는 것뿐이다.
+
+미리 만들기 (작업 프로세스를 띄우기 전에 한 번): python track_package.py [트랙 폴더 ...]
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+import pygame
+
+import items
+from assets import ASSETS, AssetRegistry
+from collision import SweptCollider
+from mask_grid import array_to_mask, mask_to_array, place_mask
+from racing_line import RacingLine, drivable_mask, load_racing_line
+
+TRACKS_DIR = "tracks"
+DEFAULT_TRACK_PATH = os.path.join(TRACKS_DIR, "default")
+MANIFEST = "track.json"
+BAKED = "baked.npz"
+BAKE_VERSION = 2               # 미리 계산하는 방식이 바뀌면 올려서 기존 baked.npz 무효화
+SPAWN_KINDS = ("trap", "boost")  # 유효 좌표 표를 미리 만들 아이템 (assets 이미지 크기 기준)
+
+_tracks = {}  # 정규화한 폴더 경로 -> Track
+
+
+def start_grid(count, origin, lanes, row_gap, rows):
+    """
+    출발 격자 좌표 count 개
+    :param origin: 첫 칸 좌상단 좌표 (결승선 바로 앞)
+    :param lanes: 차선별 y 오프셋
+    :param row_gap: 진행 방향(+x) 줄 간격
+    :param rows: 줄 수
+    :return: [(x, y), ...] 차량 좌상단 좌표
+    """
+    if count > len(lanes) * rows:
+        raise ValueError(f"start grid has only {len(lanes) * rows} slots, got {count} cars")
+    origin_x, origin_y = origin
+    return [
+        (origin_x + (i // len(lanes)) * row_gap, origin_y + lanes[i % len(lanes)])
+        for i in range(count)
+    ]
+
+
+def load_manifest(path):
+    """트랙 폴더의 track.json 읽기"""
+    with open(os.path.join(path, MANIFEST)) as f:
+        return json.load(f)
+
+
+def track_assets(path, manifest):
+    """
+    목록의 이미지 항목 {"file", "transform"} 으로 만든 트랙 이미지 등록소 (transform 이 없으면 원본 그대로)
+    이미지는 assets.ASSETS 와 같은 방식으로 한 번만 디코딩/변환해 팩 파일에 저장하고 이후에는 팩 파일에서 읽는다.
+    """
+    images = {
+        name: (os.path.join(path, spec["file"]), spec.get("transform"))
+        for name, spec in manifest["images"].items()
+    }
+    return AssetRegistry(images=images, masks={})
+
+
+def track_key(path, manifest):
+    """목록, 이미지 파일 내용, 아이템 크기로 만든 baked.npz 검증용 해시"""
+    digest = hashlib.sha1(f"{BAKE_VERSION}:{json.dumps(manifest, sort_keys=True)}:".encode())
+    for kind in SPAWN_KINDS:
+        digest.update(str(ASSETS.size(kind)).encode())
+    for name in sorted(manifest["images"]):
+        with open(os.path.join(path, manifest["images"][name]["file"]), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def bake(manifest, assets):
+    """
+    트랙 목록으로 충돌/주행 데이터 계산
+    :param assets: track_assets 로 만든 트랙 이미지 등록소
+    :return: {이름: numpy 배열} (baked.npz 내용)
+    """
+    images = {name: assets.raw_image(name) for name in manifest["images"]}
+    track, border, finish = images["track"], images["border"], images["finish"]
+    finish_spec = manifest["finish"]
+    margin = finish_spec.get("margin", 0)
+
+    track_mask = pygame.mask.from_threshold(track, tuple(manifest["track_color"]), tuple(manifest["track_threshold"]))
+    border_mask = pygame.mask.from_surface(border)
+    finish_mask = pygame.mask.from_surface(
+        pygame.transform.scale(finish, (finish.get_width() + margin, finish.get_height() + margin))
+    )
+    finish_rect = (*finish_spec["position"], *finish.get_size())
+    line = load_racing_line(track, border_mask, finish_rect, tuple(finish_spec["direction"]))
+
+    data = {
+        "track": mask_to_array(track_mask),
+        "border": mask_to_array(border_mask),
+        "finish": mask_to_array(finish_mask),
+        "drivable": mask_to_array(drivable_mask(track, border_mask)),
+        "line_points": line.points,
+        "line_progress": line.progress_map,
+        "border_field": SweptCollider(border_mask).field,
+    }
+    for kind in SPAWN_KINDS:
+        width, height = ASSETS.size(kind)
+        data[f"spawn-{width}x{height}-xs"], data[f"spawn-{width}x{height}-ys"] = items.build_spawn_table(
+            width, height, track_mask
+        )
+    return data
+
+
+def _load_baked(file, key):
+    """baked.npz 를 읽되 해시가 다르거나 손상됐으면 None"""
+    if not os.path.exists(file):
+        return None
+    try:
+        with np.load(file) as baked:
+            if str(baked["key"]) != key:
+                return None
+            return {name: baked[name] for name in baked.files if name != "key"}
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _save_baked(file, key, data):
+    try:
+        tmp_path = f"{file}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, key=np.array(key), **data)
+        os.replace(tmp_path, file)  # 여러 프로세스가 동시에 만들어도 완성된 파일만 보이도록
+    except OSError:
+        pass
+
+
+def load_track(path=DEFAULT_TRACK_PATH):
+    """
+    트랙 패키지 불러오기 (같은 경로는 한 번만 불러와 보관)
+    :param path: 트랙 폴더 경로 (Track 객체면 그대로 반환)
+    :return: Track
+    """
+    if isinstance(path, Track):
+        return path
+    path = os.path.normpath(path)
+    track = _tracks.get(path)
+    if track is None:
+        manifest = load_manifest(path)
+        assets = track_assets(path, manifest)
+        key = track_key(path, manifest)
+        file = os.path.join(path, BAKED)
+        data = _load_baked(file, key)
+        if data is None:
+            data = bake(manifest, assets)
+            _save_baked(file, key, data)
+        track = _tracks[path] = Track(path, manifest, data, assets)
+    return track
+
+
+def list_tracks(root=TRACKS_DIR):
+    """root 아래 트랙 패키지 폴더 목록 (이름순)"""
+    return sorted(
+        os.path.join(root, name) for name in os.listdir(root) if os.path.exists(os.path.join(root, name, MANIFEST))
+    )
+
+
+class Track:
+    """불러온 트랙 (마스크, 격자, 중앙선, 충돌 검사기, 출발 격자)"""
+
+    def __init__(self, path, manifest, data, assets):
+        """
+        :param path: 트랙 폴더 경로
+        :param manifest: track.json 내용
+        :param data: bake 결과 (baked.npz 내용)
+        :param assets: 트랙 이미지 등록소 (track_assets)
+        """
+        self.path = path
+        self.manifest = manifest
+        self.assets = assets
+        self.name = manifest.get("name", os.path.basename(path))
+
+        # 격자 (높이, 너비) bool 배열과 pygame.Mask
+        self.track_grid = data["track"]
+        self.border_grid = data["border"]
+        self.drivable_grid = data["drivable"]
+        height, width = self.border_grid.shape
+        self.size = (width, height)
+        self.track_mask = array_to_mask(self.track_grid)
+        self.border_mask = array_to_mask(self.border_grid)
+        self.finish_mask = array_to_mask(data["finish"])
+
+        finish = manifest["finish"]
+        self.finish_position = tuple(finish["position"])
+        self.direction = tuple(finish["direction"])
+        self.finish_grid = place_mask(self.finish_mask, self.size, self.finish_position)
+
+        grid = dict(manifest["start_grid"])
+        self.start_angle = grid.pop("angle")
+        self._grid = grid
+
+        self.racing_line = RacingLine(data["line_points"], data["line_progress"])
+        self.collider = SweptCollider(self.border_mask, field=data["border_field"])
+        self._spawn_tables = {}  # (너비, 높이) -> (xs, ys)
+        for name in data:
+            if name.startswith("spawn-") and name.endswith("-xs"):
+                width, height = map(int, name[len("spawn-"):-len("-xs")].split("x"))
+                self._spawn_tables[width, height] = (data[name], data[name[:-3] + "-ys"])
+
+    def __repr__(self):
+        return f"Track({self.name!r}, size={self.size})"
+
+    def start_grid(self, count):
+        """출발 격자 좌표 count 개 [(x, y), ...]"""
+        return start_grid(count, **self._grid)
+
+    def spawn_table(self, item_width, item_height):
+        """아이템 크기별 유효 중심 좌표 표 (미리 계산하지 않은 크기는 처음 요청 시 계산)"""
+        key = (item_width, item_height)
+        table = self._spawn_tables.get(key)
+        if table is None:
+            table = self._spawn_tables[key] = items.build_spawn_table(item_width, item_height, self.track_mask)
+        return table
+
+    def image(self, name):
+        """트랙 이미지 (처음 요청할 때 팩 파일에서 읽음, 화면이 있으면 화면 픽셀 형식으로 변환)"""
+        return self.assets.image(name)
+
+    def background_layers(self):
+        """DirtyRenderer 용 고정 배경 레이어 (그리는 순서대로)"""
+        return [
+            (self.image("background"), (0, 0)),
+            (self.image("track"), (0, 0)),
+            (self.image("finish"), self.finish_position),
+            (self.image("border"), (0, 0)),
+        ]
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    for track_path in sys.argv[1:] or list_tracks():
+        start = time.time()
+        loaded = load_track(track_path)
+        print(f"{loaded.name}: {loaded.size[0]}x{loaded.size[1]}, lap {loaded.racing_line.length:.0f}px, "
+              f"{time.time() - start:.2f}s")
@@ -1,16 +1,103 @@
 import pygame
+from collections import OrderedDict
 
 def scale_image(img, factor):
     size = round(img.get_width() * factor), round(img.get_height() * factor)
     return pygame.transform.scale(img, size)
 
 def blit_rotate_center(win, image, top_left, angle):
-    rotated_image = pygame.transform.rotate(image, angle)
-    new_rect = rotated_image.get_rect(
-        center=image.get_rect(topleft=top_left).center)
-    win.blit(rotated_image, new_rect.topleft)
+    rotated_image, offset = ROTATION_CACHE.get_image(image, angle)
+    return win.blit(rotated_image, (int(top_left[0]) + offset[0], int(top_left[1]) + offset[1]))
 
 def blit_text_center(win, font, text):
     render = font.render(text, 1, (200, 200, 200))
     win.blit(render, (win.get_width() / 2 - render.get_width() / 2,
                       win.get_height() / 2 - render.get_height() / 2))
+
+
+def create_border_mask(surface):
+    """
+    차량의 테두리 마스크 생성
+    이미지 가장자리에 있거나 상하좌우 이웃 중 하나라도 비어 있는 픽셀이 테두리가 된다.
+    픽셀 단위 반복 대신 마스크 연산(이동한 빈 영역을 겹쳐 그리기)으로 계산한다.
+    :param surface: 차량 이미지 (pygame.Surface)
+    :return: 테두리 마스크 (pygame.Mask)
+    """
+    original_mask = pygame.mask.from_surface(surface)
+    width, height = original_mask.get_size()
+
+    # 빈 픽셀 영역
+    empty_mask = original_mask.copy()
+    empty_mask.invert()
+
+    # 이미지 가장자리 한 줄은 항상 테두리 후보
+    border_mask = pygame.mask.Mask((width, height), fill=True)
+    if width > 2 and height > 2:
+        border_mask.erase(pygame.mask.Mask((width - 2, height - 2), fill=True), (1, 1))
+
+    # 상하좌우 이웃이 비어 있는 픽셀 표시
+    for offset in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+        border_mask.draw(empty_mask, offset)
+
+    # 원래 마스크에 속한 픽셀만 남김
+    return border_mask.overlap_mask(original_mask, (0, 0))
+
+
+class RotationCache:
+    """
+    회전된 이미지/테두리 마스크 캐시
+    각도를 step 도 단위로 양자화하고, 이미지별로 회전 결과를 처음 사용할 때 만들어 저장한다.
+    저장 개수가 max_size 를 넘으면 가장 오래 사용하지 않은 항목부터 제거한다 (LRU).
+    """
+
+    def __init__(self, step=3, max_size=720):
+        self.step = step
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+    def quantize(self, angle):
+        """각도를 step 단위 구간의 대표 각도(0 이상 360 미만)로 변환"""
+        return (round(angle / self.step) * self.step) % 360
+
+    def _entry(self, image, angle):
+        key = (image, self.quantize(angle))
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+
+        rotated_image = pygame.transform.rotate(image, key[1])
+        # 원본 이미지 중심을 유지하도록 원본 좌상단 기준 오프셋 계산
+        center = image.get_rect().center
+        new_rect = rotated_image.get_rect(center=center)
+        entry = [rotated_image, new_rect.topleft, None]
+
+        self._entries[key] = entry
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return entry
+
+    def get_image(self, image, angle):
+        """
+        회전된 이미지와 좌상단 오프셋
+        :return: (회전된 이미지, (dx, dy)) - 원본 좌상단 좌표에 더하면 회전된 이미지의 좌상단
+        """
+        entry = self._entry(image, angle)
+        return entry[0], entry[1]
+
+    def get_border_mask(self, image, angle):
+        """
+        회전된 이미지의 테두리 마스크와 좌상단 오프셋
+        :return: (테두리 마스크, (dx, dy))
+        """
+        entry = self._entry(image, angle)
+        if entry[2] is None:
+            entry[2] = create_border_mask(entry[0])
+        return entry[2], entry[1]
+
+    def clear(self):
+        self._entries.clear()
+
+
+# 게임 전체에서 공유하는 회전 캐시
+ROTATION_CACHE = RotationCache()